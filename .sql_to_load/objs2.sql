@@ -145,15 +145,15 @@ BEGIN;
 SELECT patch_object('dup', 112, '{"t101":"H&H","t111":"77","t108":"770007777","t109":"20120823","t110":"Ленина, 22"}');
 COMMIT;
 
+-- Deletes the objects and their whole subtrees with one recursive statement
 CREATE OR REPLACE FUNCTION public.delete_object_rec(db text, ids text) RETURNS void
 AS $$
-DECLARE i record;
 BEGIN
-	EXECUTE format('SELECT string_agg(id::text, '','') ids FROM %s WHERE up IN(%s)', db, ids) into i;
-	IF i.ids IS NOT NULL THEN
-		PERFORM delete_object_rec(db, i.ids);
-	END IF;
-	EXECUTE format('DELETE FROM %s WHERE id IN(%s)', db, ids);
+	EXECUTE format('WITH RECURSIVE tree AS ('
+				||' SELECT id FROM %1$s WHERE id IN(%2$s)'
+				||' UNION ALL'
+				||' SELECT objs.id FROM %1$s objs JOIN tree ON objs.up=tree.id WHERE objs.id!=objs.up)'
+				||' DELETE FROM %1$s WHERE id IN (SELECT id FROM tree)', db, ids);
 END;
 $$ LANGUAGE plpgsql;
 
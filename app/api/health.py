@@ -2,8 +2,13 @@ from fastapi import APIRouter
 from sqlalchemy import text
 from pydantic import BaseModel
 
+from app.auth.auth import token_cache
 from app.db.db import engine
 from app.logger import setup_logger
+from app.services.metadata_cache import metadata_cache
+from app.services.object_count import count_cache
+from app.services.report import report_cache
+from app.services.response_cache import response_cache
 
 router = APIRouter()
 logger = setup_logger()
@@ -41,3 +46,19 @@ async def health_check() -> dict:
         dict: Service and DB status.
     """
     return await check_database_connection()
+
+
+@router.get("/health/cache")
+async def cache_stats() -> dict:
+    """Reports in-process cache statistics.
+
+    Returns:
+        dict: Size, capacity and hit/miss counters of each cache.
+    """
+    return {
+        "metadata": metadata_cache.stats(),
+        "counts": count_cache.stats(),
+        "reports": report_cache.stats(),
+        "responses": response_cache.stats(),
+        "tokens": token_cache.stats(),
+    }
@@ -0,0 +1,41 @@
+from typing import List
+
+from fastapi import APIRouter, Response
+
+from app.api.video.service import video_service
+from app.metrics import CONTENT_TYPE, Gauge, Metric, registry
+
+router = APIRouter()
+
+
+@registry.collector
+def collect_video_streams() -> List[Metric]:
+    connected = Gauge("video_streams_connected", "Connected drone video sources.")
+    fps = Gauge("video_stream_fps", "Frame rate reported by the video source.", ("drone_id",))
+    frames = Gauge(
+        "video_stream_frames_captured", "Frames captured since the source connected.", ("drone_id",)
+    )
+    queued = Gauge(
+        "video_stream_queued_frames", "Frames captured but not yet read by a viewer.", ("drone_id",)
+    )
+    viewers = Gauge("video_stream_viewers", "Open HTTP and websocket streams.", ("drone_id",))
+
+    stats = video_service.stats()
+    connected.set((), len(stats))
+    for drone_id, stream in stats.items():
+        fps.set((drone_id,), stream["fps"])
+        frames.set((drone_id,), stream["frame_count"])
+        queued.set((drone_id,), stream["queued_frames"])
+        viewers.set((drone_id,), stream["viewers"])
+    return [connected, fps, frames, queued, viewers]
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Exposes the process metrics in the Prometheus text format.
+
+    Returns:
+        Response: HTTP latency and status codes by route, SQL timings by
+        template, engine pool and video stream gauges.
+    """
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
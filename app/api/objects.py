@@ -1,23 +1,51 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Path, Query, Request
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, status, Depends, Path, Query, Request, Body
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy import text, bindparam, String, Integer, JSON
 from sqlalchemy.exc import SQLAlchemyError
 import json
 
-from app.db.db import engine, validate_table_exists, load_sql
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.db.db import engine, get_read_engine, validate_table_exists, get_sql
 from app.models.objects import *
 from app.models.filter import FilterQuery
 from app.logger import setup_logger
 from app.services.error_manager import error_manager as em
 from app.services.object_by_term import (
-    _build_header,
-    _detect_ordered_reqs,
-    _fetch_metadata,
+    _get_term_header,
     _fetch_objects,
-    _fetch_ordered_reqs,
-    _build_reqs_map,
+    _stream_objects,
+    _build_reqs_maps,
+    _next_cursor,
+)
+from app.services.object_count import count_objects
+from app.services.object_sort import parse_sort
+from app.services.pagination import decode_cursor
+from app.services.term_pivot import pivot_registry
+from app.services.versions import (
+    TENANT,
+    bump_objects,
+    bump_subtree,
+    bump_terms,
+    listing_etag,
+    not_modified,
+)
+from app.services.serialization import (
+    FastJSONResponse,
+    dumps,
+    object_payload,
+    term_objects_payload,
 )
 from app.services.filter_builder import FilterBuilder
+from app.services.object_bulk import insert_objects, patch_objects
+from app.services.object_tree import stream_object_tree
+from app.services.tree_delete import (
+    check_object_deletable,
+    delete_subtree,
+    delete_subtree_batched,
+    get_subtree_ids,
+)
+from app.settings import settings
 
 
 router = APIRouter()
@@ -66,6 +94,7 @@ async def create_object(
                 },
             )
             row = result.fetchone()
+            await bump_terms(conn, db_name, [payload.id])
         logger.info(f"DB response: {row}")
         if not row:
             logger.exception(
@@ -111,6 +140,86 @@ async def create_object(
         raise HTTPException(status_code=500, detail="Database error")
 
 
+@router.post(
+    "/{db_name}/objects/bulk",
+    response_model=BulkObjectCreateResponse,
+)
+async def create_objects_bulk(
+    payload: List[ObjectCreateRequest] = Body(..., description="Objects to create"),
+    db_name: str = Depends(validate_table_exists),
+):
+    """
+    Create many objects with their attributes in a single transaction.
+
+    Every item is validated like POST /{db_name}/objects. Items that fail validation
+    are not created and get their own error in the result; all other items are
+    inserted together with set-based statements.
+
+    Returns:
+        BulkObjectCreateResponse: Number of created objects and one result per item.
+    """
+    if len(payload) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many items, the limit is {settings.BULK_MAX_ITEMS}",
+        )
+
+    try:
+        async with engine.begin() as conn:
+            results = await insert_objects(conn, db_name, payload)
+            await bump_terms(conn, db_name, {item.id for item in payload})
+    except SQLAlchemyError:
+        logger.exception(f"Database error during bulk object creation in {db_name}")
+        raise HTTPException(status_code=500, detail="Database error")
+
+    return JSONResponse(
+        BulkObjectCreateResponse(
+            created=sum(1 for r in results if r.status == 200),
+            results=results,
+        ).model_dump(exclude_none=True)
+    )
+
+
+@router.patch(
+    "/{db_name}/objects/bulk",
+    response_model=BulkObjectPatchResponse,
+)
+async def patch_objects_bulk(
+    payload: List[BulkObjectPatchItem] = Body(..., description="Objects to patch"),
+    db_name: str = Depends(validate_table_exists),
+):
+    """
+    Update many objects along with their attributes in a single transaction.
+
+    Every item is validated like PATCH /{db_name}/objects/{object_id}. Objects that fail
+    validation are left untouched and get their own error in the result; the changes of
+    all other objects are applied with batched UPDATE, INSERT and DELETE statements.
+
+    Returns:
+        BulkObjectPatchResponse: Number of patched objects and one result per item.
+    """
+    if len(payload) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many items, the limit is {settings.BULK_MAX_ITEMS}",
+        )
+
+    try:
+        async with engine.begin() as conn:
+            results = await patch_objects(conn, db_name, payload)
+            await bump_objects(conn, db_name, [item.id for item in payload])
+    except SQLAlchemyError:
+        logger.exception(f"Database error during bulk object patch in {db_name}")
+        raise HTTPException(status_code=500, detail="Database error")
+
+    return JSONResponse(
+        BulkObjectPatchResponse(
+            updated=sum(1 for r in results if r.status == 200),
+            results=results,
+        ).model_dump(exclude_none=True)
+    )
+
+
 @router.patch(
     "/{db_name}/objects/{object_id}",
     response_model=PatchObjectResponse,
@@ -146,6 +255,7 @@ async def patch_object(
                 },
             )
             res = result.scalar_one_or_none()
+            await bump_objects(conn, db_name, [object_id])
 
     except SQLAlchemyError as e:
         logger.exception(f"DB error while patching object {object_id} in {db_name}")
@@ -174,39 +284,54 @@ async def patch_object(
     response_model=DeleteObjectResponse,
 )
 async def delete_object(
-    db_name: str = Path(..., description="Database name"),
+    db_name: str = Depends(validate_table_exists),
     object_id: int = Path(..., description="ID of the object to delete"),
+    batch_size: Optional[int] = Query(
+        None, ge=1, description="Delete nested records in batches of this size"
+    ),
 ):
     """
     Deletes an object and its nested records recursively.
     Validates references and ensures the object is not metadata.
+
+    Without batch_size the whole subtree is deleted with one statement in the same
+    transaction as the checks. With batch_size nested records are deleted deepest
+    first in separate transactions of at most batch_size rows each.
     """
+    ids = None
     try:
         async with engine.begin() as conn:
-            result = await conn.execute(
-                text("SELECT delete_object(:db, :id)"),
-                {"db": db_name, "id": object_id},
+            res = await check_object_deletable(conn, db_name, object_id)
+            if res == "1":
+                term_ids = await bump_subtree(conn, db_name, object_id)
+                if batch_size:
+                    ids = await get_subtree_ids(conn, db_name, object_id)
+                else:
+                    deleted_count = await delete_subtree(conn, db_name, object_id)
+
+        if res == "1" and batch_size:
+            deleted_count = await delete_subtree_batched(
+                db_name, object_id, ids, batch_size
             )
-            res = result.scalar_one_or_none()
+            # Listings read between the batches saw a partly deleted subtree
+            async with engine.begin() as conn:
+                await bump_terms(conn, db_name, term_ids)
 
     except SQLAlchemyError as e:
         logger.exception(f"DB error during DELETE object {object_id} in {db_name}")
         raise HTTPException(status_code=500, detail="Database error")
 
-    if res is None:
-        logger.error(f"DELETE returned NULL for object_id={object_id}")
-        raise HTTPException(status_code=500, detail="Unexpected DB error")
-
     if res != "1":
         em.raise_if_error(res, log_context=f"DELETE object {object_id} in {db_name}")
 
-    return DeleteObjectResponse(id=object_id)
+    return DeleteObjectResponse(id=object_id, deleted_count=deleted_count)
 
 
 @router.get("/{db_name}/object/{object_id}")
 async def get_object(
     db_name: str = Depends(validate_table_exists),
     object_id: int = Path(..., description="Object ID to fetch"),
+    read_engine: AsyncEngine = Depends(get_read_engine),
 ):
     """
     Fetches a specific object and its requisites by ID.
@@ -229,8 +354,8 @@ async def get_object(
         }
     """
     try:
-        async with engine.connect() as conn:
-            sql_obj = text(load_sql("get_object.sql", db=db_name))
+        async with read_engine.connect() as conn:
+            sql_obj = get_sql("get_object.sql", db=db_name)
             result = await conn.execute(sql_obj, {"object_id": object_id})
             obj_row = result.mappings().fetchone()
 
@@ -243,7 +368,7 @@ async def get_object(
             obj = dict(obj_row)
             term_type = obj["t"]
 
-            sql_reqs = text(load_sql("get_object_requisites.sql", db=db_name))
+            sql_reqs = get_sql("get_object_requisites.sql", db=db_name)
             result = await conn.execute(
                 sql_reqs, {"object_id": object_id, "type_id": term_type}
             )
@@ -269,13 +394,72 @@ async def get_object(
         raise HTTPException(status_code=500, detail="Database error")
 
 
+@router.get("/{db_name}/object/{object_id}/tree")
+async def get_object_tree(
+    db_name: str = Depends(validate_table_exists),
+    object_id: int = Path(..., description="Object ID to fetch"),
+    depth: int = Query(
+        settings.TREE_MAX_DEPTH,
+        ge=0,
+        le=settings.TREE_MAX_DEPTH,
+        description="Levels of child objects to include",
+    ),
+    read_engine: AsyncEngine = Depends(get_read_engine),
+):
+    """
+    Fetches an object with its child objects as one nested JSON document.
+
+    The subtree is read with one recursive query and written in chunks of
+    STREAM_CHUNK_SIZE nodes. Requisites are resolved as in GET /{db_name}/objects/{term_id}.
+
+    Returns:
+        {
+            "id": 129,
+            "up": 1,
+            "t": 114,
+            "val": "Client 01",
+            "reqs": {"ИНН": "1001", ...},
+            "children": [
+                {"id": 190, "up": 129, "t": 118, "val": "Contact 1", "reqs": {...}, "children": []},
+                ...
+            ]
+        }
+    """
+    try:
+        async with read_engine.connect() as conn:
+            sql = get_sql("get_objects_by_ids.sql", db=db_name)
+            found = (await conn.execute(sql, {"ids": [object_id]})).fetchone()
+    except SQLAlchemyError:
+        logger.exception(f"DB error while fetching object {object_id} in {db_name}")
+        raise HTTPException(status_code=500, detail="Database error")
+
+    if not found:
+        raise HTTPException(status_code=404, detail=f"Object {object_id} not found")
+
+    async def generate():
+        try:
+            async with read_engine.connect() as conn:
+                async for part in stream_object_tree(
+                    conn, db_name, object_id, depth, settings.STREAM_CHUNK_SIZE
+                ):
+                    yield part
+        except SQLAlchemyError:
+            logger.exception(
+                f"DB error while streaming tree of {object_id} in {db_name}"
+            )
+            raise
+
+    return StreamingResponse(generate(), media_type="application/json")
+
+
 @router.get("/{db_name}/objects/{term_id}", response_model=TermObjectsResponse)
 async def get_term_objects(
     request: Request,
-    db_name: str = Path(..., description="Database name"),
+    db_name: str = Depends(validate_table_exists),
     term_id: int = Path(..., description="ID of the term"),
     parent_id: int = Query(1, alias="up", description="Parent ID"),
     filters: FilterQuery = Depends(),
+    read_engine: AsyncEngine = Depends(get_read_engine),
 ):
     """
     Returns:
@@ -290,31 +474,53 @@ async def get_term_objects(
     try:
         _filters = {k: v for k, v in request.query_params.items()}
 
-        async with engine.connect() as conn:
-            meta_rows = await _fetch_metadata(conn, db_name, term_id)
-            if not meta_rows:
+        async with read_engine.connect() as conn:
+            term = await _get_term_header(conn, db_name, term_id)
+            if not term:
                 raise HTTPException(status_code=404, detail="Term not found")
 
-            header, header_map = _build_header(meta_rows)
+            # Objects of referenced terms and table requisites are part of the page
+            etag = await listing_etag(
+                conn,
+                request,
+                db_name,
+                [TENANT, term_id, *term.req_refs.values(), *term.table_reqs],
+            )
+            response = not_modified(request, etag)
+            if response:
+                return response
+
             # FILTER
 
             joins = where_clause = ""
             sql_params = {}
 
+            # A fresh pivot of the term replaces the tenant table in the page query
+            pivot = await pivot_registry.get(db_name, term_id)
+            source = pivot.table if pivot else None
+            sort = parse_sort(filters.sort, term) if filters.sort else None
+            if pivot:
+                sort = pivot.cover_sort(sort)
+
             if _filters:
-                logger.debug(f"Applying filters: {_filters}")
+                logger.debug("Applying filters: %s", _filters)
                 filter_builder = FilterBuilder(
                     _filters,
                     term_id=term_id,
                     db_name=db_name,
-                    term_name=meta_rows[0].obj,
-                    header=header,
+                    term_name=term.name,
+                    header=term.header,
+                    pivot_columns=pivot.columns if pivot else None,
+                )
+                try:
+                    joins, where_clause, sql_params = filter_builder.build()
+                except ValueError as e:
+                    raise HTTPException(status_code=422, detail=str(e))
+
+                logger.debug(
+                    "Generated joins: %s, where clause: %s, parameters: %s",
+                    joins, where_clause, sql_params,
                 )
-                joins, where_clause, sql_params = filter_builder.build()
-
-                logger.debug(f"Generated joins: {joins}")
-                logger.debug(f"Generated where clause: {where_clause}")
-                logger.debug(f"SQL parameters: {sql_params}")
 
             object_rows = await _fetch_objects(
                 conn,
@@ -325,77 +531,142 @@ async def get_term_objects(
                 where_clause=where_clause,
                 limit=filters.limit,
                 offset=filters.offset,
+                cursor=(
+                    decode_cursor(filters.cursor, filters.sort) if filters.cursor else None
+                ),
+                sort=sort,
+                source=source,
                 sql_params=sql_params,
             )
 
-            table_reqs, ordered_table_reqs = _detect_ordered_reqs(header)
-            logger.debug(f"Ordered table requisites: {ordered_table_reqs}")
-
-            reqs_template = load_sql(
-                "get_object_reqs.sql", db=db_name, obj_id=":obj_id"
+            reqs_maps = await _build_reqs_maps(
+                conn,
+                db_name,
+                [obj.id for obj in object_rows],
+                term.header_map,
+                term.ordered_table_reqs,
             )
-            agg_template = load_sql(
-                "get_object_table_reqs.sql",
-                db=db_name,
-                not_in_clause="NOT",
-                obj_id=":obj_id",
-                array_ids=":array_ids",
+
+            # The total is counted on the page's connection: a second connection
+            # per listing could wait forever on a pool drained by listings waiting
+            # for theirs
+            total = await count_objects(
+                conn, db_name, term_id, parent_id, filters.count,
+                joins, where_clause, sql_params, source,
             )
-            agg_ordered_template = load_sql(
-                "get_object_table_reqs.sql",
-                db=db_name,
-                not_in_clause="",
-                obj_id=":obj_id",
-                array_ids=":array_ids",
+
+            return FastJSONResponse(
+                term_objects_payload(
+                    term,
+                    object_rows,
+                    reqs_maps,
+                    _next_cursor(object_rows, filters.limit, sort),
+                    total,
+                ),
+                headers={"ETag": etag},
             )
 
-            objects = []
-            for obj in object_rows:
-                ordered_req_map = {}
-                if ordered_table_reqs:
-                    ordered_req_map = await _fetch_ordered_reqs(
-                        conn, obj.id, agg_ordered_template, ordered_table_reqs
-                    )
+    except SQLAlchemyError:
+        logger.exception(f"DB error while fetching term {term_id} in {db_name}")
+        raise HTTPException(status_code=500, detail="Database error")
 
-                row_data = await _build_reqs_map(
-                    conn,
-                    obj.id,
-                    reqs_template,
-                    header_map,
-                    ordered_table_reqs,
-                    ordered_req_map,
-                )
 
-                objects.append(
-                    ObjectRow(
-                        id=int(obj.id),
-                        up=int(obj.up),
-                        val=str(obj.val),
-                        reqs=row_data,
-                    )
-                )
+@router.get("/{db_name}/objects/{term_id}/stream")
+async def stream_term_objects(
+    request: Request,
+    db_name: str = Depends(validate_table_exists),
+    term_id: int = Path(..., description="ID of the term"),
+    parent_id: int = Query(1, alias="up", description="Parent ID"),
+    read_engine: AsyncEngine = Depends(get_read_engine),
+):
+    """
+    Streams all objects of a term as newline-delimited JSON.
 
-            return JSONResponse(
-                TermObjectsResponse(
-                    t=meta_rows[0].id,
-                    name=meta_rows[0].obj,
-                    base=meta_rows[0].base,
-                    header=header,
-                    objects=objects,
-                ).model_dump(exclude_none=True)
-            )
+    Accepts the same filters as GET /{db_name}/objects/{term_id}. Objects are read
+    through a server-side cursor and written in chunks of STREAM_CHUNK_SIZE rows,
+    one object per line:
+
+        {"id": 252, "up": 1, "val": "Yuri", "reqs": {"ИНН": "1001", ...}}
+    """
+    _filters = {k: v for k, v in request.query_params.items()}
 
+    try:
+        async with read_engine.connect() as conn:
+            term = await _get_term_header(conn, db_name, term_id)
+        pivot = await pivot_registry.get(db_name, term_id)
     except SQLAlchemyError:
         logger.exception(f"DB error while fetching term {term_id} in {db_name}")
         raise HTTPException(status_code=500, detail="Database error")
 
+    if not term:
+        raise HTTPException(status_code=404, detail="Term not found")
+
+    sort = parse_sort(_filters["sort"], term) if _filters.get("sort") else None
+    if pivot:
+        sort = pivot.cover_sort(sort)
+    joins = where_clause = ""
+    sql_params = {}
+
+    if _filters:
+        filter_builder = FilterBuilder(
+            _filters,
+            term_id=term_id,
+            db_name=db_name,
+            term_name=term.name,
+            header=term.header,
+            pivot_columns=pivot.columns if pivot else None,
+        )
+        try:
+            joins, where_clause, sql_params = filter_builder.build()
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+
+    async def generate():
+        try:
+            async with read_engine.connect() as conn:
+                async for chunk in _stream_objects(
+                    conn,
+                    db_name,
+                    term_id,
+                    parent_id,
+                    settings.STREAM_CHUNK_SIZE,
+                    joins=joins,
+                    where_clause=where_clause,
+                    sort=sort,
+                    source=pivot.table if pivot else None,
+                    sql_params=sql_params,
+                ):
+                    reqs_maps = await _build_reqs_maps(
+                        conn,
+                        db_name,
+                        [obj.id for obj in chunk],
+                        term.header_map,
+                        term.ordered_table_reqs,
+                    )
+                    yield b"".join(
+                        dumps(object_payload(obj, reqs_maps[obj.id])) + b"\n"
+                        for obj in chunk
+                    )
+        except SQLAlchemyError:
+            logger.exception(f"DB error while streaming term {term_id} in {db_name}")
+            # The status is already sent: mark the export as failed, then abort
+            # the chunked response so the client sees it was truncated
+            yield dumps({"error": "Database error"}) + b"\n"
+            raise
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
 
 @router.post("/{db_name}/objects/graphql")
 async def get_term_objects_post(
-    query: ObjectQuery, db_name: str = Path(..., description="Database name")
+    query: ObjectQuery,
+    db_name: str = Depends(validate_table_exists),
+    read_engine: AsyncEngine = Depends(get_read_engine),
 ):
     """
     Альтернатива GET-запросу на /objects/{termId}?up={parentId}, но с телом POST.
+
+    Фильтры можно группировать: {"f120": "10%", "$or": [{"f121": "2024%"}, {"$not": {"Роль": "admin"}}]}.
     """
     term_id = query.term_id
     parent_id = query.up
@@ -403,25 +674,33 @@ async def get_term_objects_post(
     offset = query.offset
     filters = query.filters or {}
 
-    async with engine.connect() as conn:
-        meta_rows = await _fetch_metadata(conn, db_name=db_name, term_id=term_id)
-        if not meta_rows:
+    async with read_engine.connect() as conn:
+        term = await _get_term_header(conn, db_name, term_id)
+        if not term:
             raise HTTPException(status_code=404, detail="Term not found")
 
-        header, header_map = _build_header(meta_rows)
-
         joins = where_clause = ""
         sql_params = {}
 
+        pivot = await pivot_registry.get(db_name, term_id)
+        source = pivot.table if pivot else None
+        sort = parse_sort(query.sort, term) if query.sort else None
+        if pivot:
+            sort = pivot.cover_sort(sort)
+
         if filters:
             filter_builder = FilterBuilder(
                 filters,
                 term_id=term_id,
                 db_name=db_name,
-                term_name=meta_rows[0].obj,
-                header=header,
+                term_name=term.name,
+                header=term.header,
+                pivot_columns=pivot.columns if pivot else None,
             )
-            joins, where_clause, sql_params = filter_builder.build()
+            try:
+                joins, where_clause, sql_params = filter_builder.build()
+            except ValueError as e:
+                raise HTTPException(status_code=422, detail=str(e))
 
         object_rows = await _fetch_objects(
             conn,
@@ -432,59 +711,30 @@ async def get_term_objects_post(
             where_clause=where_clause,
             limit=limit,
             offset=offset,
+            cursor=decode_cursor(query.cursor, query.sort) if query.cursor else None,
+            sort=sort,
+            source=source,
             sql_params=sql_params,
         )
 
-        table_reqs, ordered_table_reqs = _detect_ordered_reqs(header)
-
-        reqs_template = load_sql("get_object_reqs.sql", db=db_name, obj_id=":obj_id")
-        agg_template = load_sql(
-            "get_object_table_reqs.sql",
-            db=db_name,
-            not_in_clause="NOT",
-            obj_id=":obj_id",
-            array_ids=":array_ids",
+        reqs_maps = await _build_reqs_maps(
+            conn,
+            db_name,
+            [obj.id for obj in object_rows],
+            term.header_map,
+            term.ordered_table_reqs,
         )
-        agg_ordered_template = load_sql(
-            "get_object_table_reqs.sql",
-            db=db_name,
-            not_in_clause="",
-            obj_id=":obj_id",
-            array_ids=":array_ids",
+        total = await count_objects(
+            conn, db_name, term_id, parent_id, query.count,
+            joins, where_clause, sql_params, source,
         )
 
-        objects = []
-        for obj in object_rows:
-            ordered_req_map = {}
-            if ordered_table_reqs:
-                ordered_req_map = await _fetch_ordered_reqs(
-                    conn, obj.id, agg_ordered_template, ordered_table_reqs
-                )
-
-            row_data = await _build_reqs_map(
-                conn,
-                obj.id,
-                reqs_template,
-                header_map,
-                ordered_table_reqs,
-                ordered_req_map,
-            )
-
-            objects.append(
-                ObjectRow(
-                    id=int(obj.id),
-                    up=int(obj.up),
-                    val=str(obj.val),
-                    reqs=row_data,
-                )
+        return FastJSONResponse(
+            term_objects_payload(
+                term,
+                object_rows,
+                reqs_maps,
+                _next_cursor(object_rows, limit, sort),
+                total,
             )
-
-        return JSONResponse(
-            TermObjectsResponse(
-                t=meta_rows[0].id,
-                name=meta_rows[0].obj,
-                base=meta_rows[0].base,
-                header=header,
-                objects=objects,
-            ).model_dump(exclude_none=True)
         )
@@ -10,6 +10,11 @@ from app.models.references import (
     CreateReferenceResponse,
 )
 from app.services.error_manager import error_manager as em
+from app.services.metadata_cache import metadata_cache
+from app.services.response_cache import response_cache
+from app.services.term_catalog import refresh_terms
+from app.services.term_pivot import pivot_registry
+from app.services.versions import TENANT, bump_terms
 from app.logger import setup_logger
 
 router = APIRouter()
@@ -39,6 +44,9 @@ async def create_reference(
                 {"db": db_name, "term_id": payload.id},
             )
             row = result.mappings().fetchone()
+            await bump_terms(conn, db_name, [TENANT])
+            if row:
+                await refresh_terms(conn, db_name, [row["newid"], payload.id])
 
     except SQLAlchemyError as e:
         logger.exception(
@@ -54,6 +62,9 @@ async def create_reference(
 
     result_flag = row["res"]
     ref_id = row["newid"]
+    metadata_cache.invalidate(db_name)
+    response_cache.invalidate(db_name)
+    pivot_registry.expire()
 
     status_code, message = em.get_status_and_message(result_flag) or (None, None)
 
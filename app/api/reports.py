@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.exc import DBAPIError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.db.db import get_read_engine, validate_table_exists
+from app.logger import setup_logger
+from app.models.report import ReportQuery, ReportResponse
+from app.services.object_by_term import _get_term_header
+from app.services.report import run_report
+from app.services.serialization import FastJSONResponse
+
+router = APIRouter()
+logger = setup_logger(__name__)
+
+
+@router.post("/{db_name}/report", response_model=ReportResponse)
+async def report(
+    query: ReportQuery,
+    db_name: str = Depends(validate_table_exists),
+    read_engine: AsyncEngine = Depends(get_read_engine),
+):
+    """
+    Groups the objects of a term by requisites and computes aggregates in one query.
+
+    Body:
+        {"term_id": 114, "group_by": ["Дата рег"],
+         "aggregates": [{"fn": "count"}, {"fn": "sum", "field": "f120", "name": "Сумма"}],
+         "filters": {"f126": "%note%"}}
+
+    Returns:
+        {"t": 114, "name": "Клиент", "columns": ["Дата рег", "count", "Сумма"],
+         "data": [["20240101", "20240102"], [3, 4], [3054.0, 4058.0]], "rows": 2}
+    """
+    try:
+        async with read_engine.begin() as conn:
+            term = await _get_term_header(conn, db_name, query.term_id)
+            if not term:
+                raise HTTPException(status_code=404, detail="Term not found")
+            try:
+                payload = await run_report(conn, db_name, term, query)
+            except ValueError as e:
+                raise HTTPException(status_code=422, detail=str(e))
+    except DBAPIError as e:
+        if getattr(e.orig, "sqlstate", None) == "57014":
+            raise HTTPException(status_code=504, detail="Report timed out")
+        logger.exception(f"DB error while running report on term {query.term_id} in {db_name}")
+        raise HTTPException(status_code=500, detail="Database error")
+    except SQLAlchemyError:
+        logger.exception(f"DB error while running report on term {query.term_id} in {db_name}")
+        raise HTTPException(status_code=500, detail="Database error")
+
+    return FastJSONResponse(payload)
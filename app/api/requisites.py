@@ -13,6 +13,11 @@ from app.models.requisites import (
     RequisiteModifiers,
 )
 from app.services.error_manager import error_manager as em
+from app.services.metadata_cache import metadata_cache
+from app.services.response_cache import response_cache
+from app.services.term_catalog import refresh_terms
+from app.services.term_pivot import pivot_registry
+from app.services.versions import TENANT, bump_terms
 from app.logger import setup_logger
 
 
@@ -61,6 +66,8 @@ async def post_requisite(
                 },
             )
             row = result.mappings().fetchone()
+            await bump_terms(conn, db_name, [TENANT, payload.id])
+            await refresh_terms(conn, db_name, [payload.id, payload.t])
 
     except SQLAlchemyError as e:
         logger.exception(f"DB error while posting requisite for term {payload.id}")
@@ -74,6 +81,9 @@ async def post_requisite(
 
     result_flag = row["res"]
     req_id = row["newid"]
+    metadata_cache.invalidate(db_name)
+    response_cache.invalidate(db_name)
+    pivot_registry.expire()
 
     status_code, msg = em.get_status_and_message(result_flag) or (None, None)
 
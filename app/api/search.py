@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.db.db import get_read_engine, validate_table_exists
+from app.logger import setup_logger
+from app.models.search import SearchResponse
+from app.services.search import search_objects
+from app.services.serialization import FastJSONResponse
+from app.settings import settings
+
+router = APIRouter()
+logger = setup_logger(__name__)
+
+
+@router.get("/{db_name}/search", response_model=SearchResponse)
+async def search(
+    db_name: str = Depends(validate_table_exists),
+    q: str = Query(..., min_length=1, description="Substring to search for in object values"),
+    limit: int = Query(
+        settings.SEARCH_DEFAULT_LIMIT,
+        ge=1,
+        le=settings.SEARCH_MAX_LIMIT,
+        description="Maximum number of matches",
+    ),
+    read_engine: AsyncEngine = Depends(get_read_engine),
+):
+    """
+    Searches object values of all terms for a case-insensitive substring.
+
+    Exact matches come first, then values starting with the query, then the
+    rest by score. With the pg_trgm index (see `python -m app.db.trigram`)
+    the search is served from the index and scored by trigram similarity.
+
+    Returns:
+        {"q": "client", "results": [{"id": 129, "up": 1, "t": 114, "term": "Клиент",
+                                     "val": "Client 01", "score": 0.6}]}
+    """
+    if not q.strip():
+        raise HTTPException(status_code=422, detail="Query must not be blank")
+
+    try:
+        async with read_engine.connect() as conn:
+            results = await search_objects(conn, db_name, q, limit)
+    except SQLAlchemyError:
+        logger.exception(f"DB error while searching {db_name}")
+        raise HTTPException(status_code=500, detail="Database error")
+
+    return FastJSONResponse({"q": q, "results": results})
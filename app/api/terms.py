@@ -1,14 +1,29 @@
-from fastapi import APIRouter, Path, HTTPException, Depends, status
+from fastapi import APIRouter, Path, HTTPException, Depends, Query, Request, status
 from fastapi.responses import JSONResponse
 from sqlalchemy import text, bindparam
 from sqlalchemy.exc import SQLAlchemyError
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncEngine
+from typing import List, Optional
 import json
 
-from app.db.db import engine, load_sql, validate_table_exists
+from app.db.db import (
+    engine,
+    get_read_engine,
+    get_sql,
+    reads_own_writes,
+    validate_table_exists,
+)
 from app.models.terms import *
+from app.services.response_cache import response_cache
+from app.services.serialization import FastJSONResponse, dumps
 from app.services.term_builder import build_terms_from_rows
 from app.services.error_manager import error_manager as em
+from app.services.metadata_cache import metadata_cache
+from app.services.object_by_term import _get_term_header
+from app.services.term_pivot import build_pivot, drop_pivot, pivot_registry
+from app.services.versions import TENANT, bump_terms, listing_etag, not_modified
+from app.services.term_catalog import catalog_ready, refresh_terms, requisite_types
+from app.services.tree_delete import delete_subtree, delete_subtree_batched, get_subtree_ids
 from app.auth.auth import verify_token
 from app.logger import setup_logger
 from app.settings import settings
@@ -18,12 +33,42 @@ router = APIRouter()
 logger = setup_logger(__name__)
 
 
+async def _tenant_listing(request: Request, db_name: str, read_engine, endpoint: str, load):
+    """Serves a tenant-wide listing from the response cache.
+
+    ``load(conn)`` returns the payload. Cache entries are built on the
+    primary: a lagging replica could store the listing from before the write
+    that has just invalidated it for the whole RESPONSE_CACHE_TTL. Fills are
+    rare, so they do not need the replicas. Read-your-writes requests bypass
+    the cache and are served from the primary, still answering 304 after the
+    version lookup alone.
+    """
+
+    async def build():
+        async with engine.connect() as conn:
+            etag = await listing_etag(conn, request, db_name, [TENANT])
+            return dumps(await load(conn)), etag
+
+    if not reads_own_writes(request):
+        entry = await response_cache.get_or_build((db_name, endpoint), build)
+        return entry.response(request)
+
+    async with read_engine.connect() as conn:
+        etag = await listing_etag(conn, request, db_name, [TENANT])
+        response = not_modified(request, etag)
+        if response:
+            return response
+        return FastJSONResponse(await load(conn), headers={"ETag": etag})
+
+
 @router.get(
     "/{db_name}/terms",
     response_model=List[Term],
 )
 async def get_all_terms(
+    request: Request,
     db_name: str = Depends(validate_table_exists),
+    read_engine: AsyncEngine = Depends(get_read_engine),
 ):
     """Fetches all metadata terms from the database.
 
@@ -33,14 +78,15 @@ async def get_all_terms(
     Returns:
         List[TermMetadata]: A list of term entries.
     """
-    try:
-        sql = load_sql("get_terms.sql", db=db_name)
+    async def load(conn):
+        if await catalog_ready(conn, db_name):
+            result = await conn.execute(get_sql("catalog_terms.sql"), {"db_name": db_name})
+        else:
+            result = await conn.execute(get_sql("get_terms.sql", db=db_name))
+        return [dict(row) for row in result.mappings().all()]
 
-        async with engine.connect() as conn:
-            result = await conn.execute(text(sql))
-            rows = result.mappings().all()
-
-        return JSONResponse([dict(row) for row in rows])
+    try:
+        return await _tenant_listing(request, db_name, read_engine, "terms", load)
     except SQLAlchemyError as e:
         logger.exception(f"DB error while fetching terms from {db_name}")
         raise HTTPException(status_code=500, detail="Database error")
@@ -53,6 +99,7 @@ async def get_all_terms(
 async def get_term(
     term_id: int = Path(..., description="Term ID to fetch"),
     db_name: str = Depends(validate_table_exists),
+    read_engine: AsyncEngine = Depends(get_read_engine),
 ):
     """
     Fetches data for a specific term by ID.
@@ -69,10 +116,15 @@ async def get_term(
         Term: A dictionary containing the term's ID, value, and base type.
     """
     try:
-        sql = load_sql("get_term.sql", db=db_name, term_id=term_id)
-
-        async with engine.connect() as conn:
-            result = await conn.execute(text(sql))
+        async with read_engine.connect() as conn:
+            if await catalog_ready(conn, db_name):
+                result = await conn.execute(
+                    get_sql("catalog_term.sql"), {"db_name": db_name, "term_id": term_id}
+                )
+            else:
+                result = await conn.execute(
+                    get_sql("get_term.sql", db=db_name), {"term_id": term_id}
+                )
             rows = result.mappings().all()
         if not rows:
             raise HTTPException(status_code=404, detail=f"Term {term_id} not found")
@@ -89,6 +141,7 @@ async def get_term(
 async def get_metadata_by_id(
     term_id: int = Path(..., description="Term ID to fetch"),
     db_name: str = Depends(validate_table_exists),
+    read_engine: AsyncEngine = Depends(get_read_engine),
 ):
     """Fetches metadata for a specific term by its ID.
 
@@ -105,25 +158,29 @@ async def get_metadata_by_id(
     Raises:
         HTTPException: If the term with given ID does not exist.
     """
-    sql = load_sql(
+    sql = get_sql(
         "get_metadata.sql", db=db_name, filter_clause="AND obj.id = :term_id"
     )
 
-    async with engine.connect() as conn:
-        result = await conn.execute(text(sql), {"term_id": term_id})
+    async with read_engine.connect() as conn:
+        result = await conn.execute(sql, {"term_id": term_id})
         rows = result.mappings().all()
 
     if not rows:
         raise HTTPException(status_code=404, detail=f"Term {term_id} not found")
 
-    return JSONResponse(build_terms_from_rows(rows)[0])
+    return FastJSONResponse(build_terms_from_rows(rows)[0])
 
 
 @router.get(
     "/{db_name}/metadata",
     response_model=List[TermMetadata],
 )
-async def get_all_metadata(db_name: str = Depends(validate_table_exists)):
+async def get_all_metadata(
+    request: Request,
+    db_name: str = Depends(validate_table_exists),
+    read_engine: AsyncEngine = Depends(get_read_engine),
+):
     """Fetches all metadata terms from the database.
 
     This endpoint returns a list of all defined terms and their metadata.
@@ -132,13 +189,13 @@ async def get_all_metadata(db_name: str = Depends(validate_table_exists)):
     Returns:
         List[TermMetadata]: A list of term metadata entries.
     """
-    sql = load_sql("get_metadata.sql", db=db_name, filter_clause="")
-
-    async with engine.connect() as conn:
-        result = await conn.execute(text(sql))
-        rows = result.mappings().all()
+    async def load(conn):
+        result = await conn.execute(
+            get_sql("get_metadata.sql", db=db_name, filter_clause="")
+        )
+        return build_terms_from_rows(result.mappings().all())
 
-    return JSONResponse(build_terms_from_rows(rows))
+    return await _tenant_listing(request, db_name, read_engine, "metadata", load)
 
 
 @router.post(
@@ -172,6 +229,9 @@ async def create_term(
                 },
             )
             row = result.fetchone()
+            await bump_terms(conn, db_name, [TENANT])
+            if row:
+                await refresh_terms(conn, db_name, [row[0]])
 
     except SQLAlchemyError as e:
         logger.exception(f"Database error while executing post_terms: {e}")
@@ -182,6 +242,9 @@ async def create_term(
         raise HTTPException(status_code=500, detail="Empty DB response")
 
     term_id, result_flag = row
+    metadata_cache.invalidate(db_name)
+    response_cache.invalidate(db_name)
+    pivot_registry.expire()
 
     # Обработка ошибок и предупреждений через error_manager
     status_code, message = em.get_status_and_message(result_flag) or (None, None)
@@ -208,7 +271,7 @@ async def create_term(
     response_model=PatchTermResponse,
 )
 async def patch_term(
-    db_name: str = Path(..., description="Database name"),
+    db_name: str = Depends(validate_table_exists),
     term_id: int = Path(..., description="ID of the term to update"),
     payload: PatchTermRequest = ...,
 ):
@@ -248,7 +311,7 @@ async def patch_term(
             extra = payload.__pydantic_extra__ or {}
             if extra:
                 vals = list(extra.keys())
-                logger.info(f"Modifier rows: {vals}")
+                logger.debug("Modifier rows: %s", vals)
                 placeholders = bindparam("placeholders", expanding=True)
 
                 sql = text(
@@ -262,7 +325,7 @@ async def patch_term(
                 )
 
                 mods = mod_rows.mappings().all()
-                logger.debug(f"Found modifiers: {mods}")
+                logger.debug("Found modifiers: %s", mods)
 
                 for mod in mods:
                     mid, mval = mod["id"], mod["val"]
@@ -271,8 +334,7 @@ async def patch_term(
                         {"t": mid, "up": term_id},
                     )
                     mod_val = extra.get(mval) or extra.get(mval.lower())
-                    logger.info(f"mod_val = {mod_val!r} for mval = {mval}")
-                    logger.info(f"BOOLEAN_MODIFIERS: {settings.BOOLEAN_MODIFIERS}")
+                    logger.debug("mod_val = %r for mval = %s", mod_val, mval)
                     if not mod_val:
                         continue
                     if mval.upper() in settings.BOOLEAN_MODIFIERS:
@@ -288,6 +350,13 @@ async def patch_term(
                             {"up": term_id, "t": mid, "val": mod_val},
                         )
 
+            await bump_terms(conn, db_name, [TENANT, term_id])
+            await refresh_terms(conn, db_name, [term_id])
+
+        metadata_cache.invalidate(db_name)
+        response_cache.invalidate(db_name)
+
+        pivot_registry.expire()
         return PatchTermResponse(id=term_id, t=payload.t, val=payload.val)
 
     except SQLAlchemyError as e:
@@ -300,15 +369,23 @@ async def patch_term(
     response_model=DeleteTermResponse,
 )
 async def delete_term(
-    db_name: str = Path(..., description="Database name"),
+    db_name: str = Depends(validate_table_exists),
     term_id: int = Path(..., description="ID of the term to delete"),
+    batch_size: Optional[int] = Query(
+        None, ge=1, description="Delete nested records in batches of this size"
+    ),
 ):
     """
     Deletes a term and all its children.
 
+    The children are deleted with one recursive statement in the same transaction,
+    or deepest first in separate transactions of at most batch_size rows each.
     """
     try:
         async with engine.begin() as conn:
+            # Types of the term's requisites may become top-level without it
+            req_types = await requisite_types(conn, db_name, term_id)
+
             # === 1. Попытка удаления основного термина ===
             result = await conn.execute(
                 text("SELECT delete_terms(:db, :term_id)"),
@@ -324,33 +401,83 @@ async def delete_term(
                 logger.error(f"Unexpected result from delete_terms: {res}")
                 raise HTTPException(status_code=500, detail="Unexpected DB error")
 
-            # === 2. Поиск всех вложенных терминов (обход дерева) ===
-            subs = []
-            queue = [term_id]
-            idx = 0
+            await bump_terms(conn, db_name, [TENANT, term_id])
 
-            while idx < len(queue):
-                parent = queue[idx]
-                result = await conn.execute(
-                    text(f"SELECT id FROM {db_name} WHERE up = :parent"),
-                    {"parent": parent},
-                )
-                children = result.mappings().all()
-                ids = [r["id"] for r in children]
-                queue.extend(ids)
-                subs.extend(ids)
-                idx += 1
-
-            # === 3. Удаление вложенных терминов ===
-            if subs:
-                stmt = text(f"DELETE FROM {db_name} WHERE id IN :ids").bindparams(
-                    bindparam("ids", expanding=True)
-                )
-                await conn.execute(stmt, {"ids": subs})
+            # === 2. Удаление вложенных записей одним рекурсивным запросом ===
+            if batch_size:
+                ids = await get_subtree_ids(conn, db_name, term_id)
+            else:
+                deleted_count = 1 + await delete_subtree(conn, db_name, term_id)
+            await refresh_terms(conn, db_name, [term_id, *req_types])
+
+        # === 3. Пакетное удаление в отдельных транзакциях ===
+        if batch_size:
+            deleted_count = 1 + await delete_subtree_batched(
+                db_name, term_id, ids, batch_size
+            )
+            async with engine.begin() as conn:
+                await bump_terms(conn, db_name, [TENANT, term_id])
+                await refresh_terms(conn, db_name, req_types)
 
-            # === 4. Финальный ответ ===
-            return JSONResponse(DeleteTermResponse(id=term_id, deleted_count=1 + len(subs)).model_dump(exclude_none=True))
+        # === 4. Финальный ответ ===
+        metadata_cache.invalidate(db_name)
+        response_cache.invalidate(db_name)
+        pivot_registry.expire()
+        return JSONResponse(DeleteTermResponse(id=term_id, deleted_count=deleted_count).model_dump(exclude_none=True))
 
     except SQLAlchemyError as e:
         logger.exception(f"DB error during DELETE term {term_id} in {db_name}")
         raise HTTPException(status_code=500, detail="Database error")
+
+
+@router.post(
+    "/{db_name}/terms/{term_id}/pivot",
+    response_model=TermPivotResponse,
+)
+async def create_term_pivot(
+    db_name: str = Depends(validate_table_exists),
+    term_id: int = Path(..., description="ID of the term"),
+):
+    """
+    Builds (or rebuilds) the materialized pivot of a term: one row per object with a
+    column per single-valued requisite. Listings, filters and sorting of the term read
+    from it while it is current; triggers keep it current on every write.
+
+    Writes to the table wait until the pivot is built.
+    """
+    try:
+        async with engine.begin() as conn:
+            metadata_cache.invalidate(db_name)
+            term = await _get_term_header(conn, db_name, term_id)
+            if not term:
+                raise HTTPException(status_code=404, detail="Term not found")
+            pivot = await build_pivot(conn, db_name, term)
+    except SQLAlchemyError:
+        logger.exception(f"DB error while building pivot of term {term_id} in {db_name}")
+        raise HTTPException(status_code=500, detail="Database error")
+
+    pivot_registry.set(pivot)
+    return TermPivotResponse(term_id=term_id, table=pivot.table, columns=pivot.columns)
+
+
+@router.delete(
+    "/{db_name}/terms/{term_id}/pivot",
+    response_model=TermPivotResponse,
+)
+async def delete_term_pivot(
+    db_name: str = Depends(validate_table_exists),
+    term_id: int = Path(..., description="ID of the term"),
+):
+    """
+    Drops the pivot of a term; its listings read the EAV table again.
+    """
+    try:
+        async with engine.begin() as conn:
+            dropped = await drop_pivot(conn, db_name, term_id)
+    except SQLAlchemyError:
+        logger.exception(f"DB error while dropping pivot of term {term_id} in {db_name}")
+        raise HTTPException(status_code=500, detail="Database error")
+
+    if not dropped:
+        raise HTTPException(status_code=404, detail="Term has no pivot")
+    return TermPivotResponse(term_id=term_id)
@@ -125,26 +125,27 @@ async def video_stream_http(drone_id: str):
     async def generate() -> AsyncGenerator[bytes, None]:
         """Generate MJPEG frames"""
         try:
-            while True:
-                frame = await video_service.get_frame(drone_id)
-
-                if frame is None:
-                    break
-
-                # Encode frame as JPEG
-                _, buffer = cv2.imencode(
-                    '.jpg',
-                    frame,
-                    [cv2.IMWRITE_JPEG_QUALITY, 80]
-                )
-
-                # Yield as multipart frame
-                yield (
-                    b'--frame\r\n'
-                    b'Content-Type: image/jpeg\r\n\r\n' +
-                    buffer.tobytes() +
-                    b'\r\n'
-                )
+            with video_service.viewer(drone_id):
+                while True:
+                    frame = await video_service.get_frame(drone_id)
+
+                    if frame is None:
+                        break
+
+                    # Encode frame as JPEG
+                    _, buffer = cv2.imencode(
+                        '.jpg',
+                        frame,
+                        [cv2.IMWRITE_JPEG_QUALITY, 80]
+                    )
+
+                    # Yield as multipart frame
+                    yield (
+                        b'--frame\r\n'
+                        b'Content-Type: image/jpeg\r\n\r\n' +
+                        buffer.tobytes() +
+                        b'\r\n'
+                    )
 
         except Exception as e:
             logger.error(f"Error in video stream: {e}")
@@ -172,21 +173,22 @@ async def video_stream_websocket(websocket: WebSocket, drone_id: str):
     logger.info(f"WebSocket video stream connected for {drone_id}")
 
     try:
-        while True:
-            frame = await video_service.get_frame(drone_id)
+        with video_service.viewer(drone_id):
+            while True:
+                frame = await video_service.get_frame(drone_id)
 
-            if frame is None:
-                break
+                if frame is None:
+                    break
 
-            # Encode frame as JPEG
-            _, buffer = cv2.imencode(
-                '.jpg',
-                frame,
-                [cv2.IMWRITE_JPEG_QUALITY, 80]
-            )
+                # Encode frame as JPEG
+                _, buffer = cv2.imencode(
+                    '.jpg',
+                    frame,
+                    [cv2.IMWRITE_JPEG_QUALITY, 80]
+                )
 
-            # Send frame as binary data
-            await websocket.send_bytes(buffer.tobytes())
+                # Send frame as binary data
+                await websocket.send_bytes(buffer.tobytes())
 
     except WebSocketDisconnect:
         logger.info(f"WebSocket video stream disconnected for {drone_id}")
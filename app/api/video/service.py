@@ -4,7 +4,8 @@ Video capture service for drone video streaming
 import cv2
 import asyncio
 import logging
-from typing import Dict, Optional
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
 from datetime import datetime
 import numpy as np
 
@@ -19,6 +20,7 @@ class VideoStreamService:
         self._frame_queues: Dict[str, asyncio.Queue] = {}
         self._tasks: Dict[str, asyncio.Task] = {}
         self._info: Dict[str, dict] = {}
+        self._viewers: Dict[str, int] = {}
 
     async def connect(
         self,
@@ -221,6 +223,40 @@ class VideoStreamService:
         """
         return drone_id in self._captures
 
+    @contextmanager
+    def viewer(self, drone_id: str) -> Iterator[None]:
+        """
+        Count a client reading the stream of a drone while the block runs
+
+        Args:
+            drone_id: Unique identifier for the drone
+        """
+        self._viewers[drone_id] = self._viewers.get(drone_id, 0) + 1
+        try:
+            yield
+        finally:
+            self._viewers[drone_id] -= 1
+            if not self._viewers[drone_id]:
+                del self._viewers[drone_id]
+
+    def stats(self) -> Dict[str, dict]:
+        """
+        Get the state of every connected stream for monitoring
+
+        Returns:
+            dict: Per drone fps, captured frames, queued frames and viewers
+        """
+        return {
+            drone_id: {
+                "fps": info["fps"],
+                "frame_count": info["frame_count"],
+                "queued_frames": self._frame_queues[drone_id].qsize()
+                if drone_id in self._frame_queues else 0,
+                "viewers": self._viewers.get(drone_id, 0),
+            }
+            for drone_id, info in self._info.items()
+        }
+
 
 # Global service instance
 video_service = VideoStreamService()
@@ -1,12 +1,224 @@
-from fastapi import Header, HTTPException, status, Depends
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+"""Bearer token verification.
+
+Tokens are checked by a pluggable verifier: a callable taking the raw token
+and returning its claims, raising :class:`InvalidToken` otherwise. By
+default it is:
+
+- :class:`JwtVerifier` (HS256/HS384/HS512 signatures, ``exp``, ``nbf``,
+  ``aud`` and ``iss``) when ``AUTH_JWT_SECRET`` is set;
+- :class:`StaticTokenVerifier` accepting ``AUTH_STATIC_TOKEN`` otherwise,
+  for development and tests.
+
+``AUTH_VERIFIER`` (``"package.module:attribute"``) replaces both with a
+custom verifier. Verified tokens and their claims are kept in a bounded LRU
+cache for up to ``AUTH_TOKEN_CACHE_TTL`` seconds and never past their
+``exp``, so repeated requests with the same token skip the signature check.
+"""
+
+from collections import OrderedDict
+from importlib import import_module
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+import base64
+import hashlib
+import hmac
+import json
+import time
+
+from fastapi import HTTPException, status
+from fastapi.security import HTTPBearer
+
+from app.settings import settings
+
 
 class CustomBearer(HTTPBearer):
     def __init__(self):
-        super().__init__(scheme_name="BearerAuth") 
+        super().__init__(scheme_name="BearerAuth")
 
 security = CustomBearer()
 
+Claims = Dict[str, Any]
+TokenVerifier = Callable[[str], Claims]
+
+
+class InvalidToken(Exception):
+    """Raised by token verifiers for tokens that must be rejected."""
+
+
+class StaticTokenVerifier:
+    """Accepts a single shared token and returns fixed admin claims."""
+
+    def __init__(self, token: str):
+        self.token = token
+
+    def __call__(self, token: str) -> Claims:
+        # Headers are decoded as latin-1; compare_digest only takes ASCII str
+        if not self.token or not hmac.compare_digest(
+            token.encode("utf-8"), self.token.encode("utf-8")
+        ):
+            raise InvalidToken("Invalid token")
+        return {"user_id": 1, "username": "admin", "role": "admin"}
+
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def _numeric_date(value: Any) -> Optional[float]:
+    """Returns a NumericDate claim (RFC 7519) as float, None if it is not a number."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value)
+
+
+class JwtVerifier:
+    """Verifies HMAC-signed JWTs (RFC 7519) with the standard library."""
+
+    DIGESTS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+
+    def __init__(
+        self,
+        secret: str,
+        algorithms: Iterable[str] = ("HS256",),
+        audience: Optional[str] = None,
+        issuer: Optional[str] = None,
+        leeway: float = 0,
+    ):
+        unknown = set(algorithms) - set(self.DIGESTS)
+        if unknown:
+            raise ValueError(f"Unsupported JWT algorithms: {sorted(unknown)}")
+        self.secret = secret.encode("utf-8")
+        self.algorithms = set(algorithms)
+        self.audience = audience
+        self.issuer = issuer
+        self.leeway = leeway
+
+    def __call__(self, token: str) -> Claims:
+        try:
+            header_b64, payload_b64, signature_b64 = token.split(".")
+            header = json.loads(_b64decode(header_b64))
+            signature = _b64decode(signature_b64)
+            # UnicodeEncodeError is a ValueError too
+            signing_input = f"{header_b64}.{payload_b64}".encode("ascii")
+        except ValueError:
+            raise InvalidToken("Malformed token")
+
+        algorithm = header.get("alg") if isinstance(header, dict) else None
+        if algorithm not in self.algorithms:
+            raise InvalidToken("Unsupported token algorithm")
+        expected = hmac.new(self.secret, signing_input, self.DIGESTS[algorithm]).digest()
+        if not hmac.compare_digest(signature, expected):
+            raise InvalidToken("Invalid token signature")
+
+        try:
+            claims = json.loads(_b64decode(payload_b64))
+        except ValueError:
+            raise InvalidToken("Malformed token")
+        if not isinstance(claims, dict):
+            raise InvalidToken("Malformed token")
+
+        dates = {}
+        for name in ("exp", "nbf"):
+            if name in claims:
+                dates[name] = _numeric_date(claims[name])
+                if dates[name] is None:
+                    raise InvalidToken(f"Malformed token: {name} is not a number")
+
+        now = time.time()
+        if "exp" in dates and now > dates["exp"] + self.leeway:
+            raise InvalidToken("Token expired")
+        if "nbf" in dates and now < dates["nbf"] - self.leeway:
+            raise InvalidToken("Token not yet valid")
+        if self.issuer is not None and claims.get("iss") != self.issuer:
+            raise InvalidToken("Invalid token issuer")
+        if self.audience is not None:
+            audience = claims.get("aud")
+            audiences = audience if isinstance(audience, list) else [audience]
+            if self.audience not in audiences:
+                raise InvalidToken("Invalid token audience")
+        return claims
+
+
+class TokenCache:
+    """LRU cache of verified tokens and their claims."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, Claims]]" = OrderedDict()
+
+    def get(self, token: str) -> Optional[Claims]:
+        entry = self._entries.get(token)
+        if entry is None or time.time() >= entry[0]:
+            self._entries.pop(token, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, token: str, claims: Claims) -> None:
+        expires_at = time.time() + self.ttl
+        if "exp" in claims:
+            # Custom verifiers may return any exp; an unusable one is not cached
+            expires_at = min(expires_at, _numeric_date(claims["exp"]) or 0.0)
+        self._entries[token] = (expires_at, claims)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def load_verifier() -> TokenVerifier:
+    """Builds the verifier configured by the AUTH_* settings."""
+    if settings.AUTH_VERIFIER:
+        module, _, attribute = settings.AUTH_VERIFIER.partition(":")
+        return getattr(import_module(module), attribute)
+    if settings.AUTH_JWT_SECRET:
+        return JwtVerifier(
+            settings.AUTH_JWT_SECRET,
+            settings.AUTH_JWT_ALGORITHMS,
+            audience=settings.AUTH_JWT_AUDIENCE,
+            issuer=settings.AUTH_JWT_ISSUER,
+            leeway=settings.AUTH_JWT_LEEWAY,
+        )
+    return StaticTokenVerifier(settings.AUTH_STATIC_TOKEN)
+
+
+verifier: TokenVerifier = load_verifier()
+token_cache = TokenCache(
+    maxsize=settings.AUTH_TOKEN_CACHE_SIZE, ttl=settings.AUTH_TOKEN_CACHE_TTL
+)
+
+
+def verify_bearer(token: str) -> Claims:
+    """Verifies a bare token through the cache.
+
+    Raises:
+        HTTPException: 403 if the verifier rejects the token.
+    """
+    claims = token_cache.get(token)
+    if claims is not None:
+        return claims
+    try:
+        claims = verifier(token)
+    except InvalidToken as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+    token_cache.set(token, claims)
+    return claims
+
+
 def verify_token(raw_token: str):
     """
     Validates a Bearer token string manually extracted from headers.
@@ -15,7 +227,7 @@ def verify_token(raw_token: str):
         raw_token (str): The value of the 'Authorization' header.
 
     Returns:
-        dict: Mock user identity if token is valid.
+        dict: Claims of the token.
 
     Raises:
         HTTPException: If token is missing, malformed, or invalid.
@@ -23,16 +235,4 @@ def verify_token(raw_token: str):
     if not raw_token or not raw_token.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Missing or malformed token")
 
-    token = raw_token[len("Bearer "):].strip()
-
-    if token != "secret-token":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Invalid token",
-        )
-
-    return {
-        "user_id": 1,
-        "username": "admin",
-        "role": "admin",
-    }
\ No newline at end of file
+    return verify_bearer(raw_token[len("Bearer "):].strip())
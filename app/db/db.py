@@ -1,23 +1,109 @@
 """Database engine and session management for async PostgreSQL operations."""
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, AsyncEngine
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.sql import text
+from sqlalchemy import text, TextClause
 from app.settings import settings
-from pathlib import Path
-from fastapi import Depends, Path, HTTPException
+from app.db.sql_registry import sql_registry
+from app.metrics import TimedQueuePool, instrument_engine
+from app.profiling import profile_engine
+from fastapi import Path, HTTPException, Request
+from typing import List, Optional, Set
+import asyncio
+import itertools
+import time
 
-# Construct the async PostgreSQL database URL
-DATABASE_URL = (
-    f"postgresql+asyncpg://{settings.DB_USER}:{settings.DB_PASSWORD}"
-    f"@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
+
+def database_url(host: str, port: int, user: str, password: str) -> str:
+    """Builds the async PostgreSQL database URL."""
+    return f"postgresql+asyncpg://{user}:{password}@{host}:{port}/{settings.DB_NAME}"
+
+
+DATABASE_URL = database_url(
+    settings.DB_HOST, settings.DB_PORT, settings.DB_USER, settings.DB_PASSWORD
 )
 
 # Create async SQLAlchemy engine and session factory
-engine = create_async_engine(DATABASE_URL, echo=True)
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=settings.SQL_ECHO,
+    poolclass=TimedQueuePool,
+    pool_logging_name="primary",
+)
+instrument_engine(engine, "primary")
+profile_engine(engine, "primary")
 SessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
+class ReadEngines:
+    """Engines of the read replicas.
+
+    Each call to ``get`` picks a replica round-robin, or the one with the
+    fewest checked-out connections for the ``least_connections`` strategy.
+    Without replicas the primary engine is returned.
+    """
+
+    STRATEGIES = ("round_robin", "least_connections")
+
+    def __init__(self, primary: AsyncEngine, replicas: List[AsyncEngine], strategy: str):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(
+                f"Unknown read strategy '{strategy}', expected one of {self.STRATEGIES}"
+            )
+        self.primary = primary
+        self.replicas = replicas
+        self.strategy = strategy
+        self._cycle = itertools.cycle(replicas)
+
+    def get(self) -> AsyncEngine:
+        if not self.replicas:
+            return self.primary
+        if self.strategy == "least_connections":
+            return min(self.replicas, key=lambda replica: replica.pool.checkedout())
+        return next(self._cycle)
+
+
+def _create_read_engines() -> List[AsyncEngine]:
+    """Creates an engine per replica listed in DB_READ_HOST ("host[:port],...")."""
+    replicas = []
+    for address in filter(None, (a.strip() for a in settings.DB_READ_HOST.split(","))):
+        host, _, port = address.partition(":")
+        url = database_url(
+            host,
+            int(port or settings.DB_READ_PORT or settings.DB_PORT),
+            settings.DB_READ_USER or settings.DB_USER,
+            settings.DB_READ_PASSWORD or settings.DB_PASSWORD,
+        )
+        replica = create_async_engine(
+            url, echo=settings.SQL_ECHO, poolclass=TimedQueuePool, pool_logging_name=address
+        )
+        instrument_engine(replica, address)
+        profile_engine(replica, address)
+        replicas.append(replica)
+    return replicas
+
+
+read_engines = ReadEngines(engine, _create_read_engines(), settings.DB_READ_STRATEGY)
+
+
+def reads_own_writes(request: Request) -> bool:
+    """Whether the request carries the READ_YOUR_WRITES_HEADER header."""
+    value = request.headers.get(settings.READ_YOUR_WRITES_HEADER)
+    return value is not None and value.lower() not in ("0", "false")
+
+
+def get_read_engine(request: Request) -> AsyncEngine:
+    """Returns the engine for read-only queries (used as a FastAPI dependency).
+
+    Reads go to a replica unless the request carries the READ_YOUR_WRITES_HEADER
+    header, which sends them to the primary to see the caller's own writes
+    regardless of replication lag.
+    """
+    if reads_own_writes(request):
+        return engine
+    return read_engines.get()
+
+
 async def get_db():
     """Yields an async database session (used as a FastAPI dependency)."""
     async with SessionLocal() as session:
@@ -25,7 +111,7 @@ async def get_db():
 
 
 def load_sql(name: str, **replacements) -> str:
-    """Loads a .sql file and formats it with optional replacements.
+    """Formats a preloaded .sql template with optional replacements.
 
     Args:
         name (str): The name of the SQL file (relative to the configured SQL_DIR).
@@ -34,28 +120,114 @@ def load_sql(name: str, **replacements) -> str:
     Returns:
         str: The formatted SQL query string.
     """
-    sql_path: Path = settings.SQL_DIR / name
-    content: str = sql_path.read_text(encoding="utf-8")
-    return content.format(**replacements)
+    return sql_registry.render(name, **replacements)
+
+
+def get_sql(name: str, **replacements) -> TextClause:
+    """Returns a cached executable clause for a .sql template.
+
+    Replacements are limited to structural parts of the query (the table
+    identifier and generated fragments); values must be passed as bind
+    parameters at execution time.
+
+    Args:
+        name (str): The name of the SQL file (relative to the configured SQL_DIR).
+        **replacements: Keyword arguments substituted in the SQL via str.format.
+
+    Returns:
+        TextClause: The query, shared between requests with the same replacements.
+    """
+    return sql_registry.text(name, **replacements)
+
+
+async def execute_script(conn, sql: str) -> None:
+    """Runs several statements at once; SQLAlchemy prepares one statement per call."""
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.execute(sql)
+
+
+class TableRegistry:
+    """In-memory set of tenant tables in the 'public' schema.
+
+    The set is loaded at startup and reloaded when older than ``ttl`` seconds.
+    A name missing from the set is confirmed against the catalog before it is
+    rejected, so tables created with create_public_ru_table are picked up
+    without a restart.
+
+    Tables that have the optional pg_trgm index ``{table}_trgm_idx`` are
+    tracked as well; that set is only updated by the periodic reload.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._tables: Set[str] = set()
+        self._trigram: Set[str] = set()
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def _expired(self) -> bool:
+        return self._loaded_at is None or (
+            self.ttl > 0 and time.monotonic() - self._loaded_at > self.ttl
+        )
+
+    async def refresh(self) -> None:
+        """Reloads the list of tables from the catalog."""
+        async with engine.connect() as conn:
+            result = await conn.execute(
+                text(
+                    "SELECT t.tablename, i.indexname IS NOT NULL "
+                    "FROM pg_catalog.pg_tables t "
+                    "LEFT JOIN pg_catalog.pg_indexes i "
+                    "ON i.schemaname = t.schemaname AND i.tablename = t.tablename "
+                    "AND i.indexname = t.tablename || '_trgm_idx' "
+                    "WHERE t.schemaname = 'public'"
+                )
+            )
+            rows = result.fetchall()
+        self._tables = {name for name, _ in rows}
+        self._trigram = {name for name, trigram in rows if trigram}
+        self._loaded_at = time.monotonic()
+
+    def has_trigram(self, name: str) -> bool:
+        """Whether the table has the pg_trgm index on ``lower(val)``."""
+        return name in self._trigram
+
+    async def exists(self, name: str) -> bool:
+        if self._expired():
+            async with self._lock:
+                if self._expired():
+                    await self.refresh()
+
+        if name in self._tables:
+            return True
+
+        async with engine.connect() as conn:
+            result = await conn.execute(
+                text(
+                    "SELECT 1 FROM pg_catalog.pg_tables "
+                    "WHERE schemaname = 'public' AND tablename = :table"
+                ),
+                {"table": name},
+            )
+            found = result.scalar() is not None
+
+        if found:
+            self._tables.add(name)
+        return found
+
+
+table_registry = TableRegistry(ttl=settings.TABLE_REGISTRY_TTL)
 
 
 async def validate_table_exists(
     db_name: str = Path(..., description="Target table name"),
-    engine: AsyncEngine = Depends(lambda: engine),
 ) -> str:
     """
     Validates that a table with the given name exists in the current database schema (e.g., 'public').
+    Known tables are served from the in-memory registry without a database round trip.
     Raises 404 error if not found.
     """
-    query = text("""
-        SELECT table_name
-        FROM information_schema.tables
-        WHERE table_schema = 'public' AND table_name = :table
-    """)
-
-    async with engine.begin() as conn:
-        result = await conn.execute(query, {"table": db_name})
-        if not result.scalar():
-            raise HTTPException(status_code=404, detail=f"Table '{db_name}' not found.")
+    if not await table_registry.exists(db_name):
+        raise HTTPException(status_code=404, detail=f"Table '{db_name}' not found.")
 
     return db_name
@@ -0,0 +1,81 @@
+"""Registry of the SQL templates in app/sql, loaded once at startup."""
+
+from collections import OrderedDict
+from pathlib import Path
+from string import Formatter
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from sqlalchemy import text, TextClause
+
+from app.settings import settings
+
+
+class SqlTemplate:
+    """A parsed .sql file.
+
+    Attributes:
+        name (str): File name relative to the SQL directory.
+        source (str): Raw template text.
+        fields (FrozenSet[str]): ``str.format`` placeholders used by the template.
+            Only structural parts (the table identifier and generated fragments)
+            are placeholders; values are passed as bind parameters.
+    """
+
+    def __init__(self, name: str, source: str):
+        self.name = name
+        self.source = source
+        self.fields: FrozenSet[str] = frozenset(
+            field for _, field, _, _ in Formatter().parse(source) if field
+        )
+
+    def render(self, **replacements) -> str:
+        return self.source.format(**replacements)
+
+
+class SqlRegistry:
+    """Loads every template once and caches rendered ``TextClause`` objects.
+
+    Rendered clauses are cached per ``(template, replacements)`` with LRU
+    eviction, so the same SQL string is reused across requests and asyncpg's
+    prepared-statement cache gets hits.
+    """
+
+    def __init__(self, sql_dir: Path, maxsize: int):
+        self.maxsize = maxsize
+        self.templates: Dict[str, SqlTemplate] = {
+            path.name: SqlTemplate(path.name, path.read_text(encoding="utf-8"))
+            for path in sorted(sql_dir.glob("*.sql"))
+        }
+        self._clauses: "OrderedDict[Tuple, TextClause]" = OrderedDict()
+        self._names: Dict[str, str] = {}
+
+    def template(self, name: str) -> SqlTemplate:
+        try:
+            return self.templates[name]
+        except KeyError:
+            raise FileNotFoundError(f"SQL template '{name}' not found") from None
+
+    def render(self, name: str, **replacements) -> str:
+        return self.template(name).render(**replacements)
+
+    def text(self, name: str, **replacements) -> TextClause:
+        key = (name, tuple(sorted(replacements.items())))
+        clause = self._clauses.get(key)
+        if clause is not None:
+            self._clauses.move_to_end(key)
+            return clause
+
+        clause = text(self.render(name, **replacements))
+        self._clauses[key] = clause
+        self._names[clause.text] = name
+        if len(self._clauses) > self.maxsize:
+            _, evicted = self._clauses.popitem(last=False)
+            self._names.pop(evicted.text, None)
+        return clause
+
+    def template_name(self, sql: str) -> Optional[str]:
+        """Name of the template a cached clause's SQL was rendered from."""
+        return self._names.get(sql)
+
+
+sql_registry = SqlRegistry(settings.SQL_DIR, maxsize=settings.SQL_CACHE_SIZE)
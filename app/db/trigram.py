@@ -0,0 +1,45 @@
+"""Migration command creating the optional pg_trgm index of tenant tables.
+
+The index is built with ``CREATE INDEX CONCURRENTLY`` so existing tables stay
+writable. New tables get it from create_public_ru_table when the extension
+is installed.
+
+Usage:
+    python -m app.db.trigram rep [other_table ...]
+"""
+
+import asyncio
+import sys
+
+from sqlalchemy import text
+
+from app.db.db import engine, get_sql, table_registry
+from app.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+async def create_trigram_index(db_name: str) -> None:
+    """Installs pg_trgm if needed and indexes ``lower(val)`` of the table."""
+    if not await table_registry.exists(db_name):
+        raise ValueError(f"Table '{db_name}' not found")
+
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.execute(get_sql("create_trgm_index.sql", db=db_name))
+    logger.info("Created trigram index of %s", db_name)
+
+
+async def main(db_names) -> None:
+    try:
+        for db_name in db_names:
+            await create_trigram_index(db_name)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python -m app.db.trigram <table> [<table> ...]")
+    asyncio.run(main(sys.argv[1:]))
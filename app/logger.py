@@ -1,41 +1,106 @@
+import atexit
+import json
 import logging
-from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 from pathlib import Path
+import queue
 import sys
+import time
+
+from app.settings import settings
 
 LOG_DIR = Path("logs")
 LOG_DIR.mkdir(exist_ok=True)
 
-def setup_logger(
-    name: str = "app",
-    level: int = logging.DEBUG,
-    file_name: str | None = None,
-    stream: bool = True,
-) -> logging.Logger:
-    logger = logging.getLogger(name)
-    logger.setLevel(level)
-
-    if logger.hasHandlers():
-        return logger
-
-    formatter = logging.Formatter(
-        "[%(asctime)s] %(levelname)s in %(name)s: %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S"
-    )
-
-    if stream:
-        stream_handler = logging.StreamHandler(sys.stdout)
-        stream_handler.setFormatter(formatter)
-        logger.addHandler(stream_handler)
-
-    if file_name:
-        file_handler = TimedRotatingFileHandler(
-            filename=LOG_DIR / file_name,
-            when="midnight",
-            backupCount=7,
-            encoding="utf-8",
+_listener: QueueListener | None = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class DebugSampler(logging.Filter):
+    """Lets through at most ``per_second`` DEBUG records per call site each second.
+
+    Per-row debug messages of listing loops are sampled instead of flooding the
+    queue; records of higher levels always pass.
+    """
+
+    def __init__(self, per_second: int):
+        super().__init__()
+        self.per_second = per_second
+        self._windows: dict[tuple[str, int], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.per_second <= 0:
+            return True
+
+        second = int(time.monotonic())
+        window = self._windows.setdefault((record.name, record.lineno), [second, 0])
+        if window[0] != second:
+            window[0], window[1] = second, 0
+        window[1] += 1
+        return window[1] <= self.per_second
+
+
+def _configure() -> None:
+    """Routes all records through a queue to handlers run by a background listener."""
+    global _listener
+
+    if settings.LOG_JSON:
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            "[%(asctime)s] %(levelname)s in %(name)s: %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if settings.LOG_FILE:
+        handlers.append(
+            TimedRotatingFileHandler(
+                filename=LOG_DIR / settings.LOG_FILE,
+                when="midnight",
+                backupCount=7,
+                encoding="utf-8",
+            )
         )
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(DebugSampler(settings.LOG_DEBUG_SAMPLE_PER_SECOND))
+
+    root = logging.getLogger()
+    root.addHandler(queue_handler)
+    root.setLevel(settings.LOG_LEVEL)
+    for name, level in settings.LOG_LEVELS.items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def setup_logger(name: str = "app") -> logging.Logger:
+    """Returns a logger writing through the shared background queue.
 
-    return logger
+    The level of the logger comes from LOG_LEVELS (by logger name or any of
+    its parents) and defaults to LOG_LEVEL. Messages should use lazy
+    ``%s`` arguments so they are only formatted when actually emitted.
+    """
+    if _listener is None:
+        _configure()
+    return logging.getLogger(name)
@@ -1,14 +1,44 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.security import HTTPBearer
 from fastapi.openapi.utils import get_openapi
 
-from app.api import health, objects, requisites, references, terms
+from app.api import health, metrics, objects, reports, requisites, references, search, terms
 from app.api.video import routes as video
-from app.middleware.auth_middleware import AuthMiddleware
+from app.db.db import table_registry
+from app.logger import setup_logger
+from app.services.versions import ensure_versions
+from app.middleware.auth_middleware import EXCLUDE_PATHS, AuthMiddleware
+from app.middleware.metrics_middleware import MetricsMiddleware
+from app.middleware.profiling_middleware import ProfilingMiddleware
+from app.settings import settings
+
+
+logger = setup_logger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        await table_registry.refresh()
+    except Exception as e:
+        logger.exception(f"Could not preload tenant tables, loading lazily: {e}")
+    try:
+        await ensure_versions()
+    except Exception as e:
+        logger.exception(f"Could not create version counters, creating on first write: {e}")
+    yield
 
 
-app = FastAPI()
-app.add_middleware(AuthMiddleware)
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(
+    AuthMiddleware,
+    exclude_paths=EXCLUDE_PATHS | {"/metrics"} if settings.METRICS_PUBLIC else EXCLUDE_PATHS,
+)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 security = HTTPBearer()
 
 def custom_openapi():
@@ -43,5 +73,9 @@ app.include_router(terms.router)
 app.include_router(objects.router)
 app.include_router(requisites.router)
 app.include_router(references.router)
+app.include_router(search.router)
+app.include_router(reports.router)
 app.include_router(video.router)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router)
 
@@ -0,0 +1,290 @@
+"""Process metrics in the Prometheus text exposition format.
+
+Counters and histograms are plain dictionaries updated in place: the event
+loop and the SQLAlchemy greenlets run on one thread, so recording a sample
+costs a dictionary lookup and a ``bisect`` without locks. Gauges (pool and
+video stream state) are read when ``/metrics`` is scraped, by collectors
+registered with :meth:`MetricsRegistry.collector`.
+
+SQL statements are timed with the ``before_cursor_execute`` and
+``after_cursor_execute`` events of each engine and labelled with the
+``app/sql`` template they were rendered from: ``inline`` for other
+``text()`` clauses and ``raw`` for driver-level SQL.
+"""
+
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+import math
+import time
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.db.sql_registry import sql_registry
+from app.settings import settings
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class Metric:
+    """A metric family: name, help text and label names."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> Iterable[Tuple[str, Sequence[str], Sequence[str], float]]:
+        """Yields ``(sample name, label names, label values, value)``."""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        for name, labelnames, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: Labels = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        for labels, value in self._values.items():
+            yield self.name, self.labelnames, labels, value
+
+
+class Gauge(Metric):
+    """Gauge whose samples are set by a collector at scrape time."""
+
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def set(self, labels: Labels, value: float) -> None:
+        self._values[labels] = value
+
+    def samples(self):
+        for labels, value in self._values.items():
+            yield self.name, self.labelnames, labels, value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = (),
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = sorted(float(bucket) for bucket in buckets)
+        # Per label set: a count per bucket plus +Inf, then the sum
+        self._series: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, labels: Labels = ()) -> int:
+        series = self._series.get(labels)
+        return int(sum(series[:-1])) if series else 0
+
+    def samples(self):
+        bucket_labels = self.labelnames + ("le",)
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + [math.inf], series[:-1]):
+                cumulative += count
+                yield f"{self.name}_bucket", bucket_labels, labels + (_format_value(bound),), cumulative
+            yield f"{self.name}_count", self.labelnames, labels, cumulative
+            yield f"{self.name}_sum", self.labelnames, labels, series[-1]
+
+
+class MetricsRegistry:
+    """Metric families of the process and the collectors of its gauges."""
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._collectors: List[Callable[[], Iterable[Metric]]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, collect: Callable[[], Iterable[Metric]]) -> Callable:
+        """Registers a function returning metrics built at scrape time."""
+        self._collectors.append(collect)
+        return collect
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            for metric in collect():
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.register(
+    Counter(
+        "http_requests_total",
+        "HTTP responses by method, route template and status code.",
+        ("method", "route", "status"),
+    )
+)
+http_duration = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Time until the HTTP response is fully sent, by method and route template.",
+        ("method", "route"),
+        settings.METRICS_HTTP_BUCKETS,
+    )
+)
+sql_duration = registry.register(
+    Histogram(
+        "db_query_duration_seconds",
+        "Execution time of SQL statements by engine and app/sql template.",
+        ("engine", "template"),
+        settings.METRICS_SQL_BUCKETS,
+    )
+)
+sql_errors = registry.register(
+    Counter(
+        "db_query_errors_total",
+        "SQL statements that raised, by engine and app/sql template.",
+        ("engine", "template"),
+    )
+)
+pool_wait = registry.register(
+    Histogram(
+        "db_pool_wait_seconds",
+        "Time spent waiting for a connection from the engine pool.",
+        ("engine",),
+        settings.METRICS_SQL_BUCKETS,
+    )
+)
+
+
+def statement_template(context) -> str:
+    """Name of the ``app/sql`` template an execution context was compiled from."""
+    compiled = getattr(context, "compiled", None)
+    if compiled is None:
+        return "raw"
+    sql = getattr(compiled.statement, "text", None)
+    return (sql is not None and sql_registry.template_name(sql)) or "inline"
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Async queue pool recording the checkout wait of each connection.
+
+    The histogram is labelled with the engine's ``pool_logging_name``, which
+    the pool keeps when it is recreated.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if settings.METRICS_ENABLED:
+                pool_wait.observe(
+                    time.perf_counter() - start, (getattr(self, "logging_name", None) or "default",)
+                )
+
+
+_engines: Dict[str, AsyncEngine] = {}
+
+
+def instrument_engine(engine: AsyncEngine, name: str) -> None:
+    """Times the statements of ``engine`` and reports its pool on scrape."""
+    if not settings.METRICS_ENABLED or name in _engines:
+        return
+    _engines[name] = engine
+    labels_by_template: Dict[str, Labels] = {}
+
+    def labels(context) -> Labels:
+        template = statement_template(context)
+        result = labels_by_template.get(template)
+        if result is None:
+            result = labels_by_template[template] = (name, template)
+        return result
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_start = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_metrics_start", None)
+        if start is not None:
+            sql_duration.observe(time.perf_counter() - start, labels(context))
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def handle_error(exception_context):
+        context = exception_context.execution_context
+        if context is not None:
+            sql_errors.inc(labels(context))
+
+
+@registry.collector
+def collect_pools() -> List[Metric]:
+    checked_out = Gauge("db_pool_checked_out", "Connections currently checked out.", ("engine",))
+    idle = Gauge("db_pool_checked_in", "Idle connections in the pool.", ("engine",))
+    overflow = Gauge(
+        "db_pool_overflow", "Connections open beyond the pool size.", ("engine",)
+    )
+    size = Gauge("db_pool_size", "Configured pool size.", ("engine",))
+    for name, engine in _engines.items():
+        pool = engine.pool
+        if not isinstance(pool, AsyncAdaptedQueuePool):
+            continue
+        checked_out.set((name,), pool.checkedout())
+        idle.set((name,), pool.checkedin())
+        overflow.set((name,), max(pool.overflow(), 0))
+        size.set((name,), pool.size())
+    return [checked_out, idle, overflow, size]
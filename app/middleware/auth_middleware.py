@@ -1,22 +1,65 @@
+"""Authentication of HTTP requests and websocket connections.
 
-from fastapi import Request, HTTPException
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from app.auth.auth import verify_token
+A plain ASGI middleware: it inspects the scope once and then hands the
+original ``receive``/``send`` to the application, so response bodies,
+including ``StreamingResponse`` video streams, pass through untouched.
+The claims of the verified token are stored in ``request.state.user``.
+
+Browsers cannot set headers on websocket handshakes, so websockets may pass
+the token as the ``access_token`` query parameter instead. A rejected
+handshake is closed with code 1008 (policy violation).
+"""
+
+from typing import Iterable, Optional
+from urllib.parse import parse_qs
+
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from starlette.websockets import WebSocketClose
+
+from app.auth.auth import verify_bearer, verify_token
 
 EXCLUDE_PATHS = {"/docs", "/openapi.json", "/health", "/custom-docs", "/redoc", "/favicon.ico"}
 
-class AuthMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        if request.url.path in EXCLUDE_PATHS:
-            return await call_next(request)
+
+def _authorization(scope: Scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            return value.decode("latin-1")
+    return None
+
+
+def _query_token(scope: Scope) -> Optional[str]:
+    tokens = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("access_token")
+    return tokens[0] if tokens else None
+
+
+class AuthMiddleware:
+    def __init__(self, app: ASGIApp, exclude_paths: Iterable[str] = EXCLUDE_PATHS):
+        self.app = app
+        self.exclude_paths = frozenset(exclude_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket") or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
 
         try:
-            token = request.headers.get("Authorization")
-            if not token:
+            authorization = _authorization(scope)
+            if authorization:
+                claims = verify_token(authorization)
+            elif scope["type"] == "websocket" and _query_token(scope):
+                claims = verify_bearer(_query_token(scope))
+            else:
                 raise HTTPException(status_code=401, detail="Missing token")
-            verify_token(token)  # или просто verify_token(...) если sync
         except HTTPException as exc:
-            return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+            if scope["type"] == "websocket":
+                await WebSocketClose(code=1008, reason=str(exc.detail))(scope, receive, send)
+            else:
+                response = JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+                await response(scope, receive, send)
+            return
 
-        return await call_next(request)
+        scope.setdefault("state", {})["user"] = claims
+        await self.app(scope, receive, send)
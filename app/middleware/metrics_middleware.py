@@ -0,0 +1,48 @@
+"""Latency and status code metrics of HTTP requests.
+
+A plain ASGI middleware, added outside :class:`AuthMiddleware` so rejected
+requests are counted too. Requests are labelled with the template of the
+route that served them (``/{db_name}/objects/{term_id}``), never the raw
+path, to keep the number of series bounded; requests that reached no route
+are labelled ``unmatched``. The duration covers the whole response, so
+streaming routes such as the MJPEG video stream report how long the stream
+was open.
+"""
+
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.metrics import http_duration, http_requests
+
+
+def _route(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            method = scope["method"]
+            route = _route(scope)
+            http_duration.observe(time.perf_counter() - start, (method, route))
+            http_requests.inc((method, route, str(status)))
@@ -0,0 +1,55 @@
+"""Per-request SQL profiling, enabled by a header or by sampling.
+
+A plain ASGI middleware, added inside :class:`AuthMiddleware` so only
+authenticated requests can ask for a profile. The profile of the request is
+kept in a context variable read by the engine cursor events (see
+:mod:`app.profiling`); the ``Server-Timing`` header is added when the
+response starts and slow statements are reported after it is sent.
+"""
+
+import random
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.profiling import RequestProfile, current_profile, schedule_report
+from app.settings import settings
+
+
+def _sampled() -> bool:
+    rate = settings.SQL_PROFILE_SAMPLE_RATE
+    return rate > 0 and random.random() < rate
+
+
+def _requested(scope: Scope) -> bool:
+    header = settings.SQL_PROFILE_HEADER.lower().encode("latin-1")
+    if not header:
+        return False
+    for name, value in scope["headers"]:
+        if name == header:
+            return value.lower() not in (b"0", b"false")
+    return False
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not (_requested(scope) or _sampled()):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("Server-Timing", profile.server_timing())
+            await send(message)
+
+        token = current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_profile.reset(token)
+            schedule_report(profile, scope["method"], scope["path"])
@@ -1,9 +1,12 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Literal, Optional
 
 
 class FilterQuery(BaseModel):
     up: Optional[int] = 1
     limit: Optional[int] = 20
     offset: Optional[int] = 0
+    cursor: Optional[str] = None
+    sort: Optional[str] = None
+    count: Literal["exact", "estimate", "none"] = "none"
 
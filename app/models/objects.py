@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, model_validator, ConfigDict
-from typing import Dict, Any, Optional, List, Union
+from typing import Dict, Any, Literal, Optional, List, Union
 
 
 class ObjectCreateRequest(BaseModel):
@@ -65,6 +65,42 @@ class ObjectCreateResponse(BaseModel):
     warning: Optional[str] = None
 
 
+class BulkObjectResult(BaseModel):
+    """
+    Result of a single item of a bulk object creation.
+
+    Attributes:
+        id (Optional[int]): ID of the created object, or of the conflicting object for err_non_unique_val.
+        up (int): ID of the parent object.
+        t (int): Type ID (term) of the object.
+        val (Optional[str]): The main value of the object.
+        status (int): HTTP status the single-object endpoint would have returned.
+        warning (Optional[str]): Warning message, as in ObjectCreateResponse.
+        error (Optional[str]): Error message from ErrorManager if the item was not created.
+    """
+
+    id: Optional[int] = None
+    up: int
+    t: int
+    val: Optional[str] = None
+    status: int = 200
+    warning: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BulkObjectCreateResponse(BaseModel):
+    """
+    Response model for bulk object creation.
+
+    Attributes:
+        created (int): Number of objects created.
+        results (List[BulkObjectResult]): One result per requested item, in request order.
+    """
+
+    created: int
+    results: List[BulkObjectResult]
+
+
 class PatchObjectRequest(BaseModel):
     """
     Arbitrary JSON map of attributes, where keys are of the form 't{id}' and values are strings.
@@ -83,8 +119,50 @@ class PatchObjectResponse(BaseModel):
     warnings: Optional[str] = None
     
 
+class BulkObjectPatchItem(PatchObjectRequest):
+    """
+    A single object of a bulk patch: the object ID plus attributes named like 't{id}'.
+    Example: {"id": 201, "t114": "value", "t120": "another"}
+    """
+
+    id: int = Field(..., description="ID of the object to patch")
+
+
+class BulkObjectPatchResult(BaseModel):
+    """
+    Result of a single object of a bulk patch.
+
+    Attributes:
+        id (int): ID of the object.
+        val (Optional[Any]): The main value of the object after the patch.
+        status (int): HTTP status the single-object endpoint would have returned.
+        warnings (Optional[str]): Warning message, as in PatchObjectResponse.
+        error (Optional[str]): Error message from ErrorManager if the object was not patched.
+    """
+
+    id: int
+    val: Optional[Any] = None
+    status: int = 200
+    warnings: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BulkObjectPatchResponse(BaseModel):
+    """
+    Response model for bulk object patch.
+
+    Attributes:
+        updated (int): Number of objects patched.
+        results (List[BulkObjectPatchResult]): One result per requested object, in request order.
+    """
+
+    updated: int
+    results: List[BulkObjectPatchResult]
+
+
 class DeleteObjectResponse(BaseModel):
     id: int = Field(..., description="ID of the deleted object")
+    deleted_count: Optional[int] = Field(None, description="Number of records deleted (including nested)")
     
 class HeaderField(BaseModel):
     id: int
@@ -109,10 +187,15 @@ class TermObjectsResponse(BaseModel):
     base: int
     header: List[HeaderField]
     objects: List[ObjectRow]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
     
 class ObjectQuery(BaseModel):
     term_id: int
     up: Optional[int] = 1
     limit: Optional[int] = 20
     offset: Optional[int] = 0
-    filters: Optional[Dict[str, Any]] = None
\ No newline at end of file
+    cursor: Optional[str] = None
+    sort: Optional[str] = None
+    filters: Optional[Dict[str, Any]] = None
+    count: Literal["exact", "estimate", "none"] = "none"
\ No newline at end of file
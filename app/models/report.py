@@ -0,0 +1,60 @@
+"""Pydantic models of the report endpoint."""
+
+from typing import Any, Dict, List, Literal, Optional
+from pydantic import BaseModel, Field
+
+from app.settings import settings
+
+
+class ReportAggregate(BaseModel):
+    """An aggregate column of a report.
+
+    Attributes:
+        fn: Aggregate function. ``sum`` and ``avg`` need a NUMBER or FLOAT field.
+        field: Requisite (``f{id}`` or name) or the term itself; ``count`` without
+            a field counts objects.
+        name: Column name in the result, ``fn(field)`` by default.
+    """
+
+    fn: Literal["count", "sum", "avg", "min", "max"]
+    field: Optional[str] = None
+    name: Optional[str] = None
+
+
+class ReportQuery(BaseModel):
+    """Definition of a report over the objects of a term.
+
+    Attributes:
+        term_id: Term whose objects are aggregated.
+        up: Parent ID of the objects; None aggregates objects of all parents.
+        group_by: Requisites (``f{id}`` or name) or the term itself to group by.
+        aggregates: Aggregate columns, a single ``count`` by default.
+        filters: Object filters as in POST /objects/graphql; in reports a bare
+            requisite ID (``"120": "10%"``) filters on the joined report column.
+        limit: Maximum number of groups.
+    """
+
+    term_id: int
+    up: Optional[int] = 1
+    group_by: List[str] = []
+    aggregates: List[ReportAggregate] = [ReportAggregate(fn="count")]
+    filters: Optional[Dict[str, Any]] = None
+    limit: int = Field(1000, ge=1, le=settings.REPORT_MAX_ROWS)
+
+
+class ReportResponse(BaseModel):
+    """Columnar result of a report.
+
+    Attributes:
+        t: Term ID.
+        name: Term name.
+        columns: Column names, group-by columns first.
+        data: Values per column, in the order of ``columns``.
+        rows: Number of result rows.
+    """
+
+    t: int
+    name: str
+    columns: List[str]
+    data: List[List[Any]]
+    rows: int
@@ -0,0 +1,36 @@
+"""Pydantic models of the object search endpoint."""
+
+from typing import List
+from pydantic import BaseModel
+
+
+class SearchResult(BaseModel):
+    """A single object matching the search query.
+
+    Attributes:
+        id: ID of the object.
+        up: ID of the parent object.
+        t: Type ID (term) of the object.
+        term: Name of the term.
+        val: Value of the object.
+        score: Rank of the match from 0 to 1 (trigram similarity when the table has the pg_trgm index).
+    """
+
+    id: int
+    up: int
+    t: int
+    term: str
+    val: str
+    score: float
+
+
+class SearchResponse(BaseModel):
+    """Response model of the object search.
+
+    Attributes:
+        q: The search query.
+        results: Matches, best first.
+    """
+
+    q: str
+    results: List[SearchResult]
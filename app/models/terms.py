@@ -106,4 +106,12 @@ class PatchTermResponse(BaseModel):
 class DeleteTermResponse(BaseModel):
     id: Optional[int] = Field(None, description="ID of the deleted term")
     deleted_count: Optional[int] = Field(None, description="Number of terms deleted (including children)")
-    error: Optional[str] = Field(None, description="Error message, if any")
\ No newline at end of file
+    error: Optional[str] = Field(None, description="Error message, if any")
+
+class TermPivotResponse(BaseModel):
+    term_id: int = Field(..., description="ID of the term")
+    table: Optional[str] = Field(None, description="Pivot table, null once dropped")
+    columns: Dict[int, str] = Field(
+        default_factory=dict,
+        description="Value kind (text, numeric, date) of each requisite stored in the pivot",
+    )
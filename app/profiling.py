@@ -0,0 +1,179 @@
+"""Opt-in SQL profiling of single requests.
+
+A request is profiled when it carries the SQL_PROFILE_HEADER header or is
+picked by SQL_PROFILE_SAMPLE_RATE. Its statements are counted and timed by
+cursor events of each engine, grouped by the ``app/sql`` template they were
+rendered from, and reported in the ``Server-Timing`` header of the response:
+
+    Server-Timing: db;dur=12.4;desc="7 statements, 151 rows",
+                   sql.get_objects_reqs.sql;dur=3.1;desc="1x, 120 rows", ...
+
+Only statements that ran before the response started are included; rows read
+through server-side cursors are not counted. Statements slower than
+SQL_PROFILE_SLOW_MS are logged with their bound parameters once the response
+is sent. The slowest read statements are re-run in the background with
+``EXPLAIN (ANALYZE, BUFFERS)`` on a separate, read-only connection of the same
+engine, and the plan is added to the log record.
+"""
+
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Set
+import asyncio
+import reprlib
+import time
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.logger import setup_logger
+from app.metrics import statement_template
+from app.settings import settings
+
+logger = setup_logger(__name__)
+
+EXPLAINABLE = ("SELECT", "WITH", "VALUES")
+
+_params_repr = reprlib.Repr()
+_params_repr.maxstring = 200
+_params_repr.maxother = 200
+_params_repr.maxlist = _params_repr.maxtuple = 20
+
+
+@dataclass
+class SlowStatement:
+    engine: str
+    template: str
+    statement: str
+    parameters: Optional[Sequence]
+    duration: float
+
+
+@dataclass
+class RequestProfile:
+    """SQL statistics of one request."""
+
+    statements: int = 0
+    duration: float = 0.0
+    rows: int = 0
+    # template -> [statements, seconds, rows]
+    templates: Dict[str, List[float]] = field(default_factory=dict)
+    slow: List[SlowStatement] = field(default_factory=list)
+
+    def add(self, template: str, duration: float, rows: int) -> None:
+        self.statements += 1
+        self.duration += duration
+        self.rows += rows
+        stats = self.templates.get(template)
+        if stats is None:
+            stats = self.templates[template] = [0, 0.0, 0]
+        stats[0] += 1
+        stats[1] += duration
+        stats[2] += rows
+
+    def server_timing(self) -> str:
+        """Value of the ``Server-Timing`` header, slowest templates first."""
+        entries = [
+            f'db;dur={self.duration * 1000:.1f};desc="{self.statements} statements, {self.rows} rows"'
+        ]
+        for template, (count, duration, rows) in sorted(
+            self.templates.items(), key=lambda item: -item[1][1]
+        ):
+            entries.append(f'sql.{template};dur={duration * 1000:.1f};desc="{count}x, {rows} rows"')
+        return ", ".join(entries)
+
+
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar(
+    "current_profile", default=None
+)
+
+_engines: Dict[str, AsyncEngine] = {}
+_tasks: Set[asyncio.Task] = set()
+
+
+def profile_engine(engine: AsyncEngine, name: str) -> None:
+    """Adds the statements of ``engine`` to the profile of the current request."""
+    if name in _engines:
+        return
+    _engines[name] = engine
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if current_profile.get() is not None:
+            context._profile_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        profile = current_profile.get()
+        start = getattr(context, "_profile_start", None)
+        if profile is None or start is None:
+            return
+        duration = time.perf_counter() - start
+        template = statement_template(context)
+        profile.add(template, duration, max(cursor.rowcount, 0))
+        if duration * 1000 >= settings.SQL_PROFILE_SLOW_MS:
+            profile.slow.append(
+                SlowStatement(
+                    name, template, statement, None if executemany else parameters, duration
+                )
+            )
+
+
+async def explain(slow: SlowStatement) -> Optional[str]:
+    """Runs ``EXPLAIN (ANALYZE, BUFFERS)`` of a read statement on a new connection.
+
+    The transaction is read-only and limited by SQL_PROFILE_EXPLAIN_TIMEOUT_MS,
+    so statements with side effects fail instead of running twice.
+    """
+    engine = _engines.get(slow.engine)
+    if engine is None or slow.parameters is None:
+        return None
+    if slow.statement.lstrip().split(None, 1)[0].upper() not in EXPLAINABLE:
+        return None
+
+    async with engine.connect() as conn:
+        raw = await conn.get_raw_connection()
+        driver = raw.driver_connection
+        async with driver.transaction(readonly=True):
+            await driver.execute(
+                f"SET LOCAL statement_timeout = {int(settings.SQL_PROFILE_EXPLAIN_TIMEOUT_MS)}"
+            )
+            rows = await driver.fetch(
+                f"EXPLAIN (ANALYZE, BUFFERS) {slow.statement}", *slow.parameters
+            )
+    return "\n".join(row[0] for row in rows)
+
+
+async def report_slow(profile: RequestProfile, method: str, path: str) -> None:
+    """Logs the slow statements of a finished request, with plans of the slowest."""
+    # Statements of the plans must not be added to a profile
+    current_profile.set(None)
+    slowest = sorted(profile.slow, key=lambda slow: -slow.duration)
+    for index, slow in enumerate(slowest):
+        plan = None
+        if settings.SQL_PROFILE_EXPLAIN and index < settings.SQL_PROFILE_EXPLAIN_LIMIT:
+            try:
+                plan = await explain(slow)
+            except Exception as e:
+                logger.debug("Could not explain %s: %s", slow.template, e)
+        logger.warning(
+            "Slow SQL %.1f ms in %s %s [%s on %s]: %s\nparams: %s%s",
+            slow.duration * 1000,
+            method,
+            path,
+            slow.template,
+            slow.engine,
+            slow.statement.strip(),
+            _params_repr.repr(slow.parameters),
+            f"\n{plan}" if plan else "",
+        )
+
+
+def schedule_report(profile: RequestProfile, method: str, path: str) -> None:
+    """Reports the slow statements of a request in the background."""
+    if not profile.slow:
+        return
+    task = asyncio.create_task(report_slow(profile, method, path))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
@@ -20,6 +20,10 @@ class ErrorManager:
         "err_type_not_found": (status.HTTP_400_BAD_REQUEST, "Invalid type"),
         "err_invalid_ref": (status.HTTP_400_BAD_REQUEST, "Invalid reference"),
         "err_obj_not_found": (status.HTTP_404_NOT_FOUND, "Object not found"),
+        "err_duplicate_obj": (
+            status.HTTP_409_CONFLICT,
+            "Object is already changed by an earlier item of the request",
+        ),
         "err_is_metadata": (
             status.HTTP_400_BAD_REQUEST,
             "Object is metadata and cannot be deleted",
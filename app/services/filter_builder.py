@@ -1,4 +1,4 @@
-from typing import Dict, Optional, Tuple, Literal, List, Any
+from typing import Collection, Dict, Optional, Tuple, Literal, List, Any
 from app.models.objects import (
     HeaderField,
 )  # Предполагается, что HeaderField определён в models.objects
@@ -6,18 +6,45 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Query parameters of the listings that are not filters
+RESERVED_KEYS = {"up", "limit", "offset", "cursor", "sort", "count"}
+# Nested groups of the POST /objects/graphql filters
+GROUP_KEYS = {"$and": "AND", "$or": "OR", "$not": "NOT"}
+
 
 class SingleFilter:
-    def __init__(self, value: str, field_id: int, db_name: str, mode: Literal["a", "b", "c"]):
-        self.value = value.strip().lower()
+    def __init__(
+        self,
+        value: str,
+        field_id: int,
+        db_name: str,
+        mode: Literal["a", "b", "c"],
+        param: Optional[str] = None,
+        pivot: bool = False,
+    ):
+        self.value = str(value).strip().lower()
         self.field_id = field_id
         self.mode = mode
         self.db_name = db_name
+        self.param = param or f"filter_{field_id}"
+        self.pivot = pivot
 
     def build(self) -> Tuple[Optional[str], str]:
+        return None, f"AND {self.predicate()}"
+
+    def predicate(self) -> str:
+        """Returns the SQL condition of the filter; values are bound parameters.
+
+        Requisite filters (mode "b") are ``EXISTS`` semi-joins over the
+        ``(up, t)`` index, so an object with several matching requisite rows
+        is still returned once. Against a term pivot they compare its
+        ``r{id}`` column instead.
+        """
         col = "val"
 
-        if self.mode == "a":
+        if self.mode == "b" and self.pivot:
+            prefix, col = "vals", f"r{self.field_id}"
+        elif self.mode == "a":
             prefix = "vals"
         elif self.mode == "b":
             prefix = f"f{self.field_id}"
@@ -37,28 +64,35 @@ class SingleFilter:
             self.like_type = "startswith"
 
         if self.like_type:
-            where = f"AND lower({prefix}.{col}) LIKE :filter_{self.field_id}"
+            condition = f"lower({prefix}.{col}) LIKE :{self.param}"
         else:
-            where = f"AND lower(left({prefix}.{col}, 127)) = :filter_{self.field_id}"
-
-        from_ = None
-        if self.mode == "b":
-            from_ = f"LEFT JOIN {self.db_name} {prefix} ON {prefix}.up=vals.id AND {prefix}.t={self.field_id}"
-
-        return from_, where
-
-    def get_params(self) -> Dict[str, str]:
-        key = f"filter_{self.field_id}"
+            condition = f"lower(left({prefix}.{col}, 127)) = :{self.param}"
+
+        if self.mode == "b" and not self.pivot:
+            return (
+                f"EXISTS (SELECT 1 FROM {self.db_name} {prefix} "
+                f"WHERE {prefix}.up = vals.id AND {prefix}.t = :{self.param}_t "
+                f"AND {condition})"
+            )
+        return condition
+
+    def get_params(self) -> Dict[str, Any]:
+        key = self.param
         val = self.value
 
+        params: Dict[str, Any] = {}
+        if self.mode == "b" and not self.pivot:
+            params[f"{key}_t"] = self.field_id
+
         if self.like_type == "contains":
-            return {key: f"%{val.strip('%')}" + "%"}
+            params[key] = f"%{val.strip('%')}" + "%"
         elif self.like_type == "startswith":
-            return {key: f"{val.strip('%')}" + "%"}
+            params[key] = f"{val.strip('%')}" + "%"
         elif self.like_type == "endswith":
-            return {key: "%" + f"{val.strip('%')}"}
+            params[key] = "%" + f"{val.strip('%')}"
         else:
-            return {key: val}
+            params[key] = val
+        return params
 
 
 class FilterBuilder:
@@ -70,6 +104,7 @@ class FilterBuilder:
         header: List[HeaderField],
         db_name: str,
         context_mode: Literal["default", "report"] = "default",
+        pivot_columns: Optional[Collection[int]] = None,
     ):
         self.filters = filters
         self.term_id = term_id
@@ -77,50 +112,98 @@ class FilterBuilder:
         self.header = header
         self.context_mode = context_mode
         self.db_name = db_name
-
-    def build(self) -> Tuple[str, str, Dict[str, str]]:
-        from_clauses = []
-        where_clauses = []
-        params = {}
-
-        for key, value in self.filters.items():
-            if key in {"up", "limit", "offset"}:
+        # Requisites stored in the term pivot the listing reads from, if any
+        self.pivot_columns = pivot_columns or ()
+
+    def build(self) -> Tuple[str, str, Dict[str, Any]]:
+        """Compiles the filters into ``(joins, where_clause, params)``.
+
+        A flat mapping is an implicit AND. The groups ``{"$and": [...]}``,
+        ``{"$or": [...]}`` and ``{"$not": {...}}`` nest arbitrarily; every
+        element of a group is itself a filter mapping. All requisite filters
+        are correlated ``EXISTS`` subqueries, so ANDed filters become
+        semi-joins the planner can order by selectivity and no joins are
+        added to the object query.
+
+        Raises:
+            ValueError: If a group has an invalid structure.
+        """
+        self._params: Dict[str, Any] = {}
+        self._count = 0
+        condition = self._compile(self.filters, "AND")
+        where = f"AND {condition}" if condition else ""
+        return "", where, self._params
+
+    def _compile(self, filters: Dict[str, Any], op: str) -> Optional[str]:
+        parts = []
+        for key, value in filters.items():
+            if key in RESERVED_KEYS:
                 continue
 
-            filt = self._resolve_filter(key, value)
-            if not filt:
-                logger.warning(f"Unknown filter field: {key}, skipping")
-                continue
-
-            from_sql, where_sql = filt.build()
-            if from_sql:
-                from_clauses.append(from_sql)
-            where_clauses.append(where_sql)
-            params.update(filt.get_params())
-
-        return "\n".join(from_clauses), " ".join(where_clauses), params
-
-    def _resolve_filter(self, key: str, value: str) -> Optional[SingleFilter]:
+            if key in GROUP_KEYS:
+                part = self._compile_group(key, value)
+            else:
+                filt = self._resolve_filter(key, value)
+                if not filt:
+                    logger.warning("Unknown filter field: %s, skipping", key)
+                    continue
+                part = filt.predicate()
+                self._params.update(filt.get_params())
+
+            if part:
+                parts.append(part)
+
+        if not parts:
+            return None
+        if len(parts) == 1:
+            return parts[0]
+        return "(" + f" {op} ".join(parts) + ")"
+
+    def _compile_group(self, key: str, value: Any) -> Optional[str]:
+        items = [value] if isinstance(value, dict) else value
+        if not isinstance(items, list) or not all(isinstance(i, dict) for i in items):
+            raise ValueError(f"Filter group {key} expects an object or a list of objects")
+
+        if key == "$not":
+            condition = self._compile({k: v for i in items for k, v in i.items()}, "AND")
+            return f"NOT ({condition})" if condition else None
+
+        parts = [p for p in (self._compile(i, "AND") for i in items) if p]
+        if not parts:
+            return None
+        if len(parts) == 1:
+            return parts[0]
+        return "(" + f" {GROUP_KEYS[key]} ".join(parts) + ")"
+
+    def _resolve_filter(self, key: str, value: Any) -> Optional[SingleFilter]:
         key_lower = key.lower()
-        value = value.strip()
+        value = str(value).strip()
+        param = f"filter_{self._count}"
+        self._count += 1
 
         if key.startswith("f") and key[1:].isdigit():
             field_id = int(key[1:])
-            mode = "a" if field_id == self.term_id else "b"
-            return SingleFilter(value, field_id, self.db_name, mode)
+            if field_id == self.term_id:
+                return SingleFilter(value, field_id, self.db_name, "a", param)
+            return self._requisite_filter(value, field_id, param)
 
         if key_lower == self.term_name.lower():
-            return SingleFilter(value, self.term_id, self.db_name, "a")
+            return SingleFilter(value, self.term_id, self.db_name, "a", param)
 
         for field in self.header:
-            if field.name.lower() == key_lower:
-                return SingleFilter(value, field.id, self.db_name, "b")
+            if field.name and field.name.lower() == key_lower:
+                return self._requisite_filter(value, field.id, param)
 
         if self.context_mode == "report":
             try:
                 field_id = int(key)
-                return SingleFilter(value, field_id, self.db_name, "c")
+                return SingleFilter(value, field_id, self.db_name, "c", param)
             except ValueError:
                 pass
 
         return None
+
+    def _requisite_filter(self, value: str, field_id: int, param: str) -> SingleFilter:
+        return SingleFilter(
+            value, field_id, self.db_name, "b", param, pivot=field_id in self.pivot_columns
+        )
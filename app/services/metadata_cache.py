@@ -0,0 +1,101 @@
+"""In-process LRU cache of built term headers used by object listings."""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import time
+
+from app.models.objects import HeaderField
+from app.settings import settings
+
+
+@dataclass(frozen=True)
+class TermHeader:
+    """Listing metadata of a term built from get_term_metadata.sql.
+
+    Attributes:
+        id: Term ID.
+        name: Term name.
+        base: Base type ID of the term.
+        header: Header fields in requisite order.
+        header_map: Header fields keyed by requisite ID.
+        table_reqs: Table requisites keyed by requisite type.
+        ordered_table_reqs: Table requisites with the ORDER modifier keyed by type.
+        unique: Whether object values of the term must be unique under a parent.
+        ref_id: ID of the referenced term if the term itself is a reference.
+        req_refs: Referenced term ID keyed by requisite ID, for reference requisites.
+        req_bases: Base type ID of the requisite's type keyed by requisite ID.
+    """
+
+    id: int
+    name: str
+    base: int
+    header: List[HeaderField]
+    header_map: Dict[int, HeaderField]
+    table_reqs: Dict[int, HeaderField]
+    ordered_table_reqs: Dict[int, HeaderField]
+    unique: bool = False
+    ref_id: Optional[int] = None
+    req_refs: Dict[int, int] = field(default_factory=dict)
+    req_bases: Dict[int, int] = field(default_factory=dict)
+
+
+class MetadataCache:
+    """LRU cache of TermHeader entries keyed by ``(db_name, term_id)``.
+
+    Entries expire after ``ttl`` seconds (0 disables expiry) so that workers
+    which did not see a mutation eventually pick up schema changes. Writers
+    of term metadata call :meth:`invalidate` for the affected tenant.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[float, TermHeader]]" = (
+            OrderedDict()
+        )
+
+    def get(self, db_name: str, term_id: int) -> Optional[TermHeader]:
+        key = (db_name, term_id)
+        entry = self._entries.get(key)
+        if entry is None or (self.ttl and time.monotonic() - entry[0] > self.ttl):
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, db_name: str, term_id: int, value: TermHeader) -> None:
+        key = (db_name, term_id)
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, db_name: str, term_id: Optional[int] = None) -> None:
+        """Drops one term's entry, or every entry of the tenant if term_id is None."""
+        if term_id is not None:
+            self._entries.pop((db_name, term_id), None)
+            return
+        for key in [key for key in self._entries if key[0] == db_name]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+metadata_cache = MetadataCache(
+    maxsize=settings.METADATA_CACHE_SIZE, ttl=settings.METADATA_CACHE_TTL
+)
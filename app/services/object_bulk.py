@@ -0,0 +1,332 @@
+"""Set-based creation and update of many objects in a single transaction.
+
+Mirrors the validation of the post_objects() and patch_object() SQL procedures,
+but checks every item against the cached term header first and then writes all
+objects and their requisites with a few set-based statements.
+"""
+
+from typing import Any, Dict, List, Optional, Set, Tuple
+import json
+
+from app.db.db import get_sql
+from app.logger import setup_logger
+from app.models.objects import (
+    BulkObjectPatchItem,
+    BulkObjectPatchResult,
+    BulkObjectResult,
+    ObjectCreateRequest,
+)
+from app.services.error_manager import error_manager as em
+from app.services.object_by_term import _get_term_header
+
+logger = setup_logger(__name__)
+
+
+def _attr_text(value: Any) -> str:
+    """Converts an attribute value to text the way ``attrs->>'t{id}'`` does."""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _build_result(item: ObjectCreateRequest, res: str, obj_id: Optional[int] = None):
+    result = BulkObjectResult(
+        id=obj_id, up=item.up, t=item.id, val=_attr_text(item.attrs.get(f"t{item.id}"))
+    )
+    if res != "1":
+        status_code, message = em.get_status_and_message(res) or (500, None)
+        result.status = status_code
+        if status_code == 200:
+            result.warning = message
+        else:
+            result.error = message or "Unexpected database response"
+    return result
+
+
+async def insert_objects(
+    conn, db_name: str, items: List[ObjectCreateRequest]
+) -> List[BulkObjectResult]:
+    """Validates and inserts objects with their requisites.
+
+    Items failing validation are skipped and reported with the error code
+    post_objects() would return; the remaining items are inserted together.
+
+    Returns:
+        List[BulkObjectResult]: One result per item, in request order.
+    """
+    terms = {}
+    for type_id in {item.id for item in items}:
+        terms[type_id] = await _get_term_header(conn, db_name, type_id)
+
+    errors: Dict[int, str] = {}
+    # (requisite ID, value, referenced term ID or None) per item
+    item_reqs: List[List[Tuple[int, str, Optional[int]]]] = []
+    ref_ids: Set[int] = set()
+
+    for idx, item in enumerate(items):
+        reqs = []
+        item_reqs.append(reqs)
+        term = terms[item.id]
+        if term is None or term.ref_id is not None:
+            errors[idx] = "err_type_not_found"
+            continue
+
+        for req_id in term.header_map:
+            val = _attr_text(item.attrs.get(f"t{req_id}"))
+            if val == "":
+                continue
+            ref = term.req_refs.get(req_id)
+            if ref is not None:
+                if not val.isdigit():
+                    errors[idx] = f"err_invalid_ref {val}"
+                    break
+                ref_ids.add(int(val))
+            reqs.append((req_id, val, ref))
+
+    # Reference values must point to objects of the referenced term
+    if ref_ids:
+        sql = get_sql("get_objects_by_ids.sql", db=db_name)
+        rows = (await conn.execute(sql, {"ids": list(ref_ids)})).fetchall()
+        # Unpacked by position: Row.t is SQLAlchemy's tuple accessor, not the column
+        ref_types = {obj_id: obj_type for obj_id, obj_type, _, _ in rows}
+        for idx, reqs in enumerate(item_reqs):
+            for _, val, ref in reqs:
+                if ref is not None and ref_types.get(int(val)) != ref:
+                    errors.setdefault(idx, f"err_invalid_ref {val}")
+                    break
+
+    # UNIQUE terms: no equal value under the same parent, in the table or the batch
+    existing_ids: Dict[int, int] = {}
+    unique_keys = {
+        idx: (item.id, item.up, _attr_text(item.attrs.get(f"t{item.id}")))
+        for idx, item in enumerate(items)
+        if idx not in errors and terms[item.id].unique
+    }
+    if unique_keys:
+        ts, ups, vals = (list(col) for col in zip(*unique_keys.values()))
+        sql = get_sql("get_existing_objects.sql", db=db_name)
+        rows = (await conn.execute(sql, {"ts": ts, "ups": ups, "vals": vals})).fetchall()
+        existing = {(t, up, val): obj_id for obj_id, t, up, val in rows}
+        seen: Set[Tuple[int, int, str]] = set()
+        for idx, key in unique_keys.items():
+            if key in existing or key in seen:
+                errors[idx] = "err_non_unique_val"
+                if key in existing:
+                    existing_ids[idx] = existing[key]
+            seen.add(key)
+
+    valid = [idx for idx in range(len(items)) if idx not in errors]
+    new_ids: Dict[int, int] = {}
+    if valid:
+        count = len(valid) + sum(len(item_reqs[idx]) for idx in valid)
+        sql = get_sql("allocate_ids.sql")
+        ids = iter(
+            (await conn.execute(sql, {"table": db_name, "count": count})).scalars().all()
+        )
+
+        rows: Dict[str, list] = {"ids": [], "ups": [], "ts": [], "vals": []}
+
+        def add_row(row_id, up, t, val):
+            rows["ids"].append(row_id)
+            rows["ups"].append(up)
+            rows["ts"].append(t)
+            rows["vals"].append(val)
+
+        for idx in valid:
+            item = items[idx]
+            obj_id = new_ids[idx] = next(ids)
+            add_row(obj_id, item.up, item.id, _attr_text(item.attrs.get(f"t{item.id}")))
+            for req_id, val, ref in item_reqs[idx]:
+                # Reference value is stored as type, while the requisite ID goes to value
+                if ref is None:
+                    add_row(next(ids), obj_id, req_id, val)
+                else:
+                    add_row(next(ids), obj_id, int(val), str(req_id))
+
+        await conn.execute(get_sql("post_objects_bulk.sql", db=db_name), rows)
+        logger.info("Bulk insert into %s: %d objects, %d rows", db_name, len(valid), count)
+
+    return [
+        _build_result(item, errors.get(idx, "1"), new_ids.get(idx) or existing_ids.get(idx))
+        for idx, item in enumerate(items)
+    ]
+
+
+def _build_patch_result(obj_id: int, val: Optional[str], res: str):
+    result = BulkObjectPatchResult(id=obj_id, val=val)
+    if res != "1":
+        status_code, message = em.get_status_and_message(res) or (500, None)
+        result.status = status_code
+        if status_code == 200:
+            result.warnings = message
+        else:
+            result.error = message or "Unexpected database response"
+    return result
+
+
+async def patch_objects(
+    conn, db_name: str, items: List[BulkObjectPatchItem]
+) -> List[BulkObjectPatchResult]:
+    """Validates and applies attribute changes to many objects.
+
+    Follows patch_object(): the main value ``t{type}`` is required, an empty
+    requisite value deletes the requisite, a missing one leaves it as is.
+    Objects failing validation are left untouched, as are items repeating an
+    object of an earlier valid item; the changes of all other objects are
+    applied with one UPDATE, one INSERT and one DELETE.
+
+    Returns:
+        List[BulkObjectPatchResult]: One result per item, in request order.
+    """
+    payloads = [item.get_payload() for item in items]
+    ref_ids: Set[int] = {
+        int(val)
+        for attrs in payloads
+        for val in map(_attr_text, attrs.values())
+        if val.isdigit()
+    }
+
+    # Patched objects and possible reference targets in one lookup
+    sql = get_sql("get_objects_by_ids.sql", db=db_name)
+    rows = (
+        await conn.execute(sql, {"ids": list({item.id for item in items} | ref_ids)})
+    ).fetchall()
+    objects = {row[0]: row for row in rows}
+
+    terms = {}
+    for obj_type in {objects[item.id][1] for item in items if item.id in objects}:
+        terms[obj_type] = await _get_term_header(conn, db_name, obj_type)
+
+    errors: Dict[int, str] = {}
+    new_vals: Dict[int, str] = {}
+    for idx, (item, attrs) in enumerate(zip(items, payloads)):
+        obj = objects.get(item.id)
+        if obj is None:
+            errors[idx] = "err_obj_not_found"
+            continue
+        obj_id, obj_type, up, _ = obj
+        if up == 0:
+            errors[idx] = "err_is_metadata"
+            continue
+        new_vals[idx] = _attr_text(attrs.get(f"t{obj_type}"))
+        if new_vals[idx] == "":
+            errors[idx] = "err_empty_val"
+            continue
+
+        term = terms[obj_type]
+        for req_id, ref in (term.req_refs.items() if term else ()):
+            val = attrs.get(f"t{req_id}")
+            if val is None or _attr_text(val) == "":
+                continue
+            val = _attr_text(val)
+            if not val.isdigit() or objects.get(int(val), (None, None))[1] != ref:
+                errors[idx] = f"err_invalid_ref {val}"
+                break
+
+    # Each object is written once: later items of an object already patched are rejected
+    patched: Set[int] = set()
+    for idx, item in enumerate(items):
+        if idx in errors:
+            continue
+        if item.id in patched:
+            errors[idx] = "err_duplicate_obj"
+        patched.add(item.id)
+
+    # UNIQUE terms: a changed value must not clash with another object under the same parent
+    unique_keys = {}
+    for idx, item in enumerate(items):
+        if idx in errors:
+            continue
+        obj_id, obj_type, up, val = objects[item.id]
+        term = terms[obj_type]
+        if term and term.unique and new_vals[idx] != val:
+            unique_keys[idx] = (obj_type, up, new_vals[idx])
+    if unique_keys:
+        ts, ups, vals = (list(col) for col in zip(*unique_keys.values()))
+        sql = get_sql("get_existing_objects.sql", db=db_name)
+        rows = (await conn.execute(sql, {"ts": ts, "ups": ups, "vals": vals})).fetchall()
+        claimed = {(t, up, val): obj_id for obj_id, t, up, val in rows}
+        for idx, key in unique_keys.items():
+            other_id = claimed.setdefault(key, items[idx].id)
+            if other_id != items[idx].id:
+                errors[idx] = f"err_non_unique_val {items[idx].id} -> {other_id}"
+
+    valid = [idx for idx in range(len(items)) if idx not in errors]
+    if valid:
+        # Current requisite values: plain ones by type, references by the requisite ID in value
+        valid_terms = [terms[objects[items[idx].id][1]] for idx in valid]
+        req_ids = {req_id for term in valid_terms if term for req_id in term.header_map}
+        ref_req_ids = {req_id for term in valid_terms if term for req_id in term.req_refs}
+        sql = get_sql("get_objects_req_values.sql", db=db_name)
+        rows = (
+            await conn.execute(
+                sql,
+                {
+                    "obj_ids": [items[idx].id for idx in valid],
+                    "req_ids": list(req_ids - ref_req_ids),
+                    "ref_req_ids": [str(req_id) for req_id in ref_req_ids],
+                },
+            )
+        ).fetchall()
+        current: Dict[Tuple[int, int], Tuple[int, int, str]] = {}
+        for row_id, up, t, val in rows:
+            req_id = int(val) if t not in req_ids and val.isdigit() else t
+            current.setdefault((up, req_id), (row_id, t, val))
+
+        updates: Dict[str, list] = {"ids": [], "ts": [], "vals": []}
+        inserts: Dict[str, list] = {"ups": [], "ts": [], "vals": []}
+        deletes: List[int] = []
+
+        def update_row(row_id, t, val):
+            updates["ids"].append(row_id)
+            updates["ts"].append(t)
+            updates["vals"].append(val)
+
+        def insert_row(up, t, val):
+            inserts["ups"].append(up)
+            inserts["ts"].append(t)
+            inserts["vals"].append(val)
+
+        for idx in valid:
+            obj_id, obj_type, _, val = objects[items[idx].id]
+            if new_vals[idx] != val:
+                update_row(obj_id, obj_type, new_vals[idx])
+            term = terms[obj_type]
+            for req_id in (term.header_map if term else ()):
+                val = payloads[idx].get(f"t{req_id}")
+                if val is None:
+                    continue
+                val = _attr_text(val)
+                ref = term.req_refs.get(req_id)
+                row = current.get((obj_id, req_id))
+                if val == "":
+                    if row:
+                        deletes.append(row[0])
+                elif ref is None:
+                    if row is None:
+                        insert_row(obj_id, req_id, val)
+                    elif row[2] != val:
+                        update_row(row[0], req_id, val)
+                # Reference value is stored as type, while the requisite ID goes to value
+                elif row is None:
+                    insert_row(obj_id, int(val), str(req_id))
+                elif row[1] != int(val):
+                    update_row(row[0], int(val), str(req_id))
+
+        if updates["ids"]:
+            await conn.execute(get_sql("patch_objects_bulk.sql", db=db_name), updates)
+        if inserts["ups"]:
+            await conn.execute(get_sql("post_reqs_bulk.sql", db=db_name), inserts)
+        if deletes:
+            await conn.execute(get_sql("delete_rows_bulk.sql", db=db_name), {"ids": deletes})
+        logger.info(
+            "Bulk patch in %s: %d objects, %d updated, %d inserted, %d deleted rows",
+            db_name, len(valid), len(updates["ids"]), len(inserts["ups"]), len(deletes),
+        )
+
+    return [
+        _build_patch_result(item.id, new_vals.get(idx) or None, errors.get(idx, "1"))
+        for idx, item in enumerate(items)
+    ]
@@ -2,12 +2,15 @@ from fastapi import APIRouter, HTTPException, Path, Query
 from fastapi.responses import JSONResponse
 from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
-from typing import Tuple, Dict, Any, List
+from typing import Tuple, Dict, Any, List, AsyncIterator, Optional
 import json
 
-from app.db.db import engine, load_sql
+from app.db.db import engine, get_sql
 from app.models.objects import TermObjectsResponse, ObjectRow, HeaderField
 from app.logger import setup_logger
+from app.services.metadata_cache import TermHeader, metadata_cache
+from app.services.object_sort import DEFAULT_SORT, SortSpec
+from app.services.pagination import encode_cursor
 
 logger = setup_logger(__name__)
 
@@ -17,7 +20,9 @@ def _build_header(meta_rows):
     header = []
     for row in meta_rows:
         r = row._mapping
-        logger.debug(f"Processing header row: {r}")
+        logger.debug("Processing header row: %s", r)
+        if r["req_id"] is None:
+            continue
         if r["req_id"] not in header_map:
             field = HeaderField(
                 id=r["req_id"],
@@ -45,12 +50,59 @@ def _detect_ordered_reqs(header):
 
 
 async def _fetch_metadata(conn, db_name, term_id):
-    sql = text(load_sql("get_term_metadata.sql", db=db_name, term_id=term_id))
-    return (await conn.execute(sql)).fetchall()
+    sql = get_sql("get_term_metadata.sql", db=db_name)
+    return (await conn.execute(sql, {"term_id": term_id})).fetchall()
 
 
-async def _fetch_objects(
-    conn,
+async def _get_term_header(conn, db_name, term_id) -> Optional[TermHeader]:
+    """Returns the built header of a term, served from the metadata cache when possible.
+
+    On a miss the header is read from the primary even when ``conn`` belongs to a
+    read replica, so replication lag never ends up in the shared cache.
+
+    Returns:
+        TermHeader | None: None if the term does not exist.
+    """
+    term = metadata_cache.get(db_name, term_id)
+    if term is not None:
+        return term
+
+    if conn.engine is engine:
+        meta_rows = await _fetch_metadata(conn, db_name, term_id)
+    else:
+        async with engine.connect() as primary:
+            meta_rows = await _fetch_metadata(primary, db_name, term_id)
+    if not meta_rows:
+        return None
+
+    header, header_map = _build_header(meta_rows)
+    table_reqs, ordered_table_reqs = _detect_ordered_reqs(header)
+    term = TermHeader(
+        id=meta_rows[0].id,
+        name=meta_rows[0].obj,
+        base=meta_rows[0].base,
+        header=header,
+        header_map=header_map,
+        table_reqs=table_reqs,
+        ordered_table_reqs=ordered_table_reqs,
+        unique=any(
+            str(mod).split(" ")[0] == "UNIQUE" for mod in meta_rows[0].obj_mods or []
+        ),
+        ref_id=meta_rows[0].ref_id,
+        req_refs={
+            row.req_id: row.req_ref_id
+            for row in meta_rows
+            if row.req_id is not None and row.req_ref_id is not None
+        },
+        req_bases={
+            row.req_id: row.req_base for row in meta_rows if row.req_id is not None
+        },
+    )
+    metadata_cache.set(db_name, term_id, term)
+    return term
+
+
+def _objects_query(
     db_name,
     term_id,
     parent_id,
@@ -59,49 +111,155 @@ async def _fetch_objects(
     sql_params=None,
     limit=100,
     offset=0,
+    keyset="",
+    sort: Optional[SortSpec] = None,
+    source: Optional[str] = None,
 ):
-    sql = text(
-        load_sql(
-            "get_term_objects.sql",
-            db=db_name,
-            term_id=term_id,
-            parent_id=parent_id,
-            joins=joins,
-            where_clauses=where_clause,
-            limit=limit,
-            offset=offset,
+    sort = sort or DEFAULT_SORT
+    sort_join, sort_column, order_by = sort.clauses(db_name)
+    sql_params = {**(sql_params or {}), **sort.params()}
+    if keyset:
+        where_clause = f"{where_clause} {keyset}"
+
+    sql_params.update(
+        term_id=term_id, parent_id=parent_id, limit=limit, offset=offset
+    )
+    sql = get_sql(
+        "get_term_objects.sql",
+        db=source or db_name,
+        joins=joins,
+        where_clauses=where_clause,
+        sort_join=sort_join,
+        sort_column=sort_column,
+        order_by=order_by,
+    )
+    return sql, sql_params
+
+
+async def _fetch_objects(
+    conn, db_name, term_id, parent_id, limit=100, cursor=None, sql_params=None, **kwargs
+):
+    """Fetches a page of objects, after the keyset ``cursor`` if given.
+
+    The rows after a cursor are read range by range of SortSpec.keyset; the
+    next range is only queried when the page is not full yet.
+    """
+    if cursor is None:
+        sql, params = _objects_query(
+            db_name, term_id, parent_id, limit=limit, sql_params=sql_params, **kwargs
+        )
+        return (await conn.execute(sql, params)).fetchall()
+
+    kwargs["offset"] = 0
+    cursor_params = dict(sql_params or {})
+    object_rows = []
+    for keyset in (kwargs.get("sort") or DEFAULT_SORT).keyset(cursor, cursor_params):
+        sql, params = _objects_query(
+            db_name, term_id, parent_id, limit=limit - len(object_rows),
+            keyset=keyset, sql_params=cursor_params, **kwargs,
         )
+        object_rows.extend((await conn.execute(sql, params)).fetchall())
+        if len(object_rows) >= limit:
+            break
+    return object_rows
+
+
+async def _stream_objects(
+    conn, db_name, term_id, parent_id, chunk_size, **kwargs
+) -> AsyncIterator[List[Any]]:
+    """Yields all objects of a term in chunks read from a server-side cursor.
+
+    Only ``chunk_size`` rows are held in memory at a time, whatever the term size.
+    """
+    sql, sql_params = _objects_query(
+        db_name, term_id, parent_id, limit=None, offset=0, **kwargs
     )
-    return (await conn.execute(sql, sql_params or {})).fetchall()
+    result = await conn.stream(sql, sql_params)
+    async for partition in result.partitions(chunk_size):
+        yield partition
 
 
-async def _fetch_ordered_reqs(conn, obj_id, template, ordered_table_reqs):
-    array_ids = ",".join(map(str, ordered_table_reqs))
-    sql_text = template.replace(":obj_id", str(obj_id)).replace(":array_ids", array_ids)
-    logger.debug(f"Ordered requisites SQL for object {obj_id}: {sql_text}")
-    rows = (await conn.execute(text(sql_text))).fetchall()
-    logger.debug(f"Ordered requisites rows for obj {obj_id}: {rows}")
-    return {r[1]: r[3] for r in rows}
+def _next_cursor(object_rows, limit, sort: Optional[SortSpec] = None):
+    """Returns the keyset cursor of the last row when the page is full."""
+    if not object_rows or len(object_rows) < limit:
+        return None
+    last = object_rows[-1]
+    if sort is None or sort.req_id is None:
+        return encode_cursor(
+            last.sort_key, last.id, sort=sort.param if sort is not None else None
+        )
+    sort_value = None if last.sort_value is None else str(last.sort_value)
+    return encode_cursor(last.sort_key, last.id, sort_value, sort.param)
 
 
-async def _build_reqs_map(
-    conn, obj_id, reqs_template, header_map, ordered_table_reqs, ordered_req_map
-):
-    sql_text = reqs_template.replace(":obj_id", str(obj_id))
-    reqs_rows = (await conn.execute(text(sql_text))).fetchall()
+async def _fetch_ordered_reqs(conn, db_name, obj_ids, ordered_table_reqs):
+    """Fetches ORDER table-requisite aggregates for a page of objects in one query.
+
+    Returns:
+        Dict[int, Dict[int, Any]]: ``{obj_id: {req_t: arr_num}}``.
+    """
+    ordered_maps: Dict[int, Dict[int, Any]] = {obj_id: {} for obj_id in obj_ids}
+    if not obj_ids or not ordered_table_reqs:
+        return ordered_maps
+
+    sql = get_sql("get_objects_table_reqs.sql", db=db_name)
+    rows = (
+        await conn.execute(
+            sql, {"obj_ids": list(obj_ids), "array_ids": list(ordered_table_reqs)}
+        )
+    ).fetchall()
+    logger.debug("Ordered requisites rows for %d objects: %d", len(obj_ids), len(rows))
+    for obj_id, _, req_t, _, arr_num in rows:
+        ordered_maps[obj_id][req_t] = arr_num
+    return ordered_maps
+
+
+async def _build_reqs_maps(
+    conn, db_name, obj_ids, header_map, ordered_table_reqs
+) -> Dict[int, Dict[str, Any]]:
+    """Builds the ``reqs`` maps for a page of objects with set-based queries.
+
+    Requisites of all objects are fetched with a single ``reqs.up = ANY(:obj_ids)``
+    query (plus one aggregate query when ORDER table requisites exist) and
+    grouped by object in Python.
+
+    Returns:
+        Dict[int, Dict[str, Any]]: ``{obj_id: row_data}`` for every requested id.
+    """
+    obj_ids = list(obj_ids)
+    if not obj_ids:
+        return {}
+
+    ordered_maps = await _fetch_ordered_reqs(
+        conn, db_name, obj_ids, ordered_table_reqs
+    )
+
+    reqs_rows: Dict[int, list] = {obj_id: [] for obj_id in obj_ids}
+    sql = get_sql("get_objects_reqs.sql", db=db_name)
+    for row in (await conn.execute(sql, {"obj_ids": obj_ids})).fetchall():
+        reqs_rows[row[0]].append(tuple(row[1:]))
+
+    return {
+        obj_id: _assemble_reqs(
+            reqs_rows[obj_id], header_map, ordered_table_reqs, ordered_maps[obj_id]
+        )
+        for obj_id in obj_ids
+    }
+
 
+def _assemble_reqs(reqs_rows, header_map, ordered_table_reqs, ordered_req_map):
     row_data = {}
     for row in reqs_rows:
         val, req_id, field_name, alt_val = row
         field = header_map.get(req_id)
-        logger.debug(f"Req row: {row}")
+        logger.debug("Req row: %s", row)
         if not field:
-            logger.warning(f"Field not found for req_id {req_id}, maybe it's referenced?")
+            logger.debug("Field not found for req_id %s, maybe it's referenced?", req_id)
             try:
                 field = header_map.get(int(val))
-                logger.info(f"Found field by val {val}: {field}")
+                logger.debug("Found field by val %s: %s", val, field)
             except ValueError:
-                logger.error(f"Invalid req_id {req_id} or val {val}, skipping")
+                logger.debug("Invalid req_id %s or val %s, skipping", req_id, val)
                 continue
             else:
                 key = str(field.name) if field.name is not None else str(field.original_name)
@@ -120,5 +278,5 @@ async def _build_reqs_map(
                     entry["q"] = ordered_req_map.get(req_id)
             elif alt_val and str(alt_val).isdigit():
                 row_data[field_name] = str(alt_val)
-    logger.debug(f"Built row_data: {row_data}")
+    logger.debug("Built row_data: %s", row_data)
     return row_data
@@ -0,0 +1,156 @@
+"""Total counts of term object listings.
+
+``exact`` runs ``COUNT(*)`` with the joins and filters of the listing on the
+connection of the page query, after it: a count waiting for a pool connection
+of its own could wait for one that only another waiting listing would free.
+A statement timeout keeps huge counts from holding the response, and on
+timeout the estimate is returned instead. ``estimate`` reads the planner's
+row estimate of the same query from ``EXPLAIN``. Both are cached per
+``(db, term, parent, filters)`` for COUNT_CACHE_TTL seconds.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import json
+import time
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from app.db.db import get_sql
+from app.logger import setup_logger
+from app.settings import settings
+
+logger = setup_logger(__name__)
+
+class CountCache:
+    """LRU cache of listing totals with a short TTL.
+
+    Totals are not invalidated by writes; they are allowed to be up to
+    ``ttl`` seconds stale.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple, Tuple[float, int]]" = OrderedDict()
+
+    def get(self, key: Tuple) -> Optional[int]:
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Tuple, value: int) -> None:
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+count_cache = CountCache(maxsize=settings.COUNT_CACHE_SIZE, ttl=settings.COUNT_CACHE_TTL)
+
+
+def filter_hash(joins: str, where_clause: str, sql_params: Dict[str, Any]) -> str:
+    """Identifies a compiled filter by its SQL and bound values."""
+    raw = json.dumps(
+        [joins, where_clause, sorted(sql_params.items())],
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+async def _exact_count(conn, sql, params) -> int:
+    # Rolling back the savepoint resets the timeout and recovers from its cancel
+    savepoint = await conn.begin_nested()
+    try:
+        await conn.execute(
+            text("SELECT set_config('statement_timeout', :timeout, true)"),
+            {"timeout": str(settings.COUNT_EXACT_TIMEOUT_MS)},
+        )
+        return (await conn.execute(sql, params)).scalar_one()
+    finally:
+        await savepoint.rollback()
+
+
+async def _estimated_count(conn, sql, params) -> int:
+    plan = (
+        await conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql.text}"), params)
+    ).scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def count_objects(
+    conn,
+    db_name: str,
+    term_id: int,
+    parent_id: int,
+    mode: str,
+    joins: str = "",
+    where_clause: str = "",
+    sql_params: Optional[Dict[str, Any]] = None,
+    source: Optional[str] = None,
+) -> Optional[int]:
+    """Returns the total of a listing in the given mode, or None for "none".
+
+    Runs on ``conn``, the connection of the page query. ``source`` is the
+    term pivot the listing reads from, if any.
+    """
+    if mode == "none":
+        return None
+
+    sql_params = sql_params or {}
+    key = (db_name, term_id, parent_id, mode, filter_hash(joins, where_clause, sql_params))
+    total = count_cache.get(key)
+    if total is not None:
+        return total
+
+    params = {**sql_params, "term_id": term_id, "parent_id": parent_id}
+    if mode == "exact":
+        sql = get_sql(
+            "count_term_objects.sql", db=source or db_name, joins=joins, where_clauses=where_clause
+        )
+        try:
+            total = await _exact_count(conn, sql, params)
+        except DBAPIError as e:
+            if getattr(e.orig, "sqlstate", None) != "57014":
+                raise
+            logger.warning(
+                "Exact count of term %s in %s timed out, using the estimate",
+                term_id, db_name,
+            )
+            return await count_objects(
+                conn, db_name, term_id, parent_id, "estimate",
+                joins, where_clause, sql_params, source,
+            )
+    else:
+        sql = get_sql(
+            "estimate_term_objects.sql", db=source or db_name, joins=joins, where_clauses=where_clause
+        )
+        total = await _estimated_count(conn, sql, params)
+
+    count_cache.set(key, total)
+    return total
+
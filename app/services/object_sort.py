@@ -0,0 +1,236 @@
+"""Server-side ordering of term object listings.
+
+``sort=f{req_id}`` / ``sort={name}`` orders by a requisite, ``-`` in front
+sorts descending; the term itself (``f{term_id}`` or its name) orders by the
+object value. The requisite row is joined once over the ``(up, t)`` index and
+ordered by a typed key: numeric for NUMBER/FLOAT, chronological for
+DATE/DATETIME, ``lower(left(val, 127))`` (the key of the ``(t, val)`` index)
+otherwise. Values that do not parse as their type sort like missing values,
+last in both directions; object value and ID break ties, so the ordering is
+total and keyset cursors work with it.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from app.models.objects import HeaderField
+from app.services.metadata_cache import TermHeader
+
+NUMERIC_BASES = {13, 14}  # NUMBER, FLOAT
+DATE_BASES = {4, 9}  # DATETIME, DATE
+
+OBJECT_KEY = "lower(left(vals.val, 127))"
+
+TEXT_KEY = "lower(left({value}, 127))"
+NUMERIC_KEY = (
+    "CASE WHEN replace(trim({value}), ',', '.') ~ '^-?[0-9]+([.][0-9]*)?$' "
+    "THEN CAST(replace(trim({value}), ',', '.') AS numeric) END"
+)
+# Digits of YYYYMMDD[HHMISS], ISO dates or unix timestamps and DD.MM.YYYY
+# reordered to YYYYMMDD: a numeric key that never fails to cast
+DATE_KEY = (
+    "CASE WHEN trim({value}) ~ '^[0-9]+$' THEN CAST(trim({value}) AS numeric) "
+    "WHEN trim({value}) ~ '^[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}' "
+    "THEN CAST(regexp_replace(trim({value}), '[^0-9]', '', 'g') AS numeric) "
+    "WHEN trim({value}) ~ '^[0-9]{{2}}[.][0-9]{{2}}[.][0-9]{{4}}$' "
+    "THEN CAST(substr(trim({value}), 7, 4) || substr(trim({value}), 4, 2) "
+    "|| substr(trim({value}), 1, 2) AS numeric) END"
+)
+
+
+@dataclass(frozen=True)
+class SortSpec:
+    """A resolved ``sort`` parameter.
+
+    Attributes:
+        param: The parameter as given, stored in cursors.
+        req_id: Requisite to sort by, None for the object value.
+        descending: Whether the order is descending.
+        kind: "text", "numeric" or "date".
+        reference: Whether the requisite is a reference, sorted by the referenced value.
+        pivot: Whether the value is read from the term's pivot table (see term_pivot).
+    """
+
+    param: str
+    req_id: Optional[int]
+    descending: bool = False
+    kind: str = "text"
+    reference: bool = False
+    pivot: bool = False
+
+    @property
+    def key(self) -> str:
+        """SQL expression of the typed sort value."""
+        if self.pivot:
+            if self.kind in ("numeric", "date"):
+                return f"vals.k{self.req_id}"
+            return TEXT_KEY.format(value=f"vals.r{self.req_id}")
+        if self.reference:
+            return TEXT_KEY.format(value="srt_ref.val")
+        if self.kind == "numeric":
+            return NUMERIC_KEY.format(value="srt.val")
+        if self.kind == "date":
+            return DATE_KEY.format(value="srt.val")
+        return TEXT_KEY.format(value="srt.val")
+
+    def clauses(self, db_name: str) -> Tuple[str, str, str]:
+        """Returns ``(join, select_column, order_by)`` for get_term_objects.sql."""
+        direction = "DESC" if self.descending else "ASC"
+        if self.req_id is None:
+            return "", "", f"vals.t, {OBJECT_KEY} {direction}, vals.id {direction}"
+
+        if self.pivot:
+            join = ""
+        elif self.reference:
+            join = (
+                f"LEFT JOIN {db_name} srt ON srt.up = vals.id AND srt.val = :sort_ref\n"
+                f"  LEFT JOIN {db_name} srt_ref ON srt_ref.id = srt.t"
+            )
+        else:
+            join = f"LEFT JOIN {db_name} srt ON srt.up = vals.id AND srt.t = :sort_t"
+        return (
+            join,
+            f", {self.key} AS sort_value",
+            f"{self.key} {direction} NULLS LAST, {OBJECT_KEY} {direction}, vals.id {direction}",
+        )
+
+    def params(self) -> Dict[str, Any]:
+        """Bind parameters of the join."""
+        if self.req_id is None or self.pivot:
+            return {}
+        if self.reference:
+            return {"sort_ref": str(self.req_id)}
+        return {"sort_t": self.req_id}
+
+    def after_row(
+        self, cursor_key: Optional[str], cursor_id: int, params: Dict[str, Any]
+    ) -> List[str]:
+        """Conditions of the rows after ``(cursor_key, cursor_id)`` in object value order.
+
+        Objects whose value is NULL have a NULL key, which PostgreSQL sorts
+        last in ascending and first in descending order; a row comparison
+        with NULL is never true. Those objects are a separate range of the
+        order: OR-ed into the comparison they would keep PostgreSQL from
+        starting the index scan at the cursor.
+
+        Returns:
+            One condition per range, in listing order.
+        """
+        params["cursor_id"] = cursor_id
+        if cursor_key is None:
+            if self.descending:
+                return [
+                    f"{OBJECT_KEY} IS NULL AND vals.id < :cursor_id",
+                    f"{OBJECT_KEY} IS NOT NULL",
+                ]
+            return [f"{OBJECT_KEY} IS NULL AND vals.id > :cursor_id"]
+
+        params["cursor_key"] = cursor_key
+        if self.descending:
+            return [f"({OBJECT_KEY}, vals.id) < (:cursor_key, :cursor_id)"]
+        return [f"({OBJECT_KEY}, vals.id) > (:cursor_key, :cursor_id)", f"{OBJECT_KEY} IS NULL"]
+
+    def keyset(self, cursor: Tuple, params: Dict[str, Any]) -> List[str]:
+        """Returns the WHERE fragments selecting rows after ``cursor``; fills ``params``.
+
+        Each fragment is a range of the listing order that an index scan can
+        start at; the page is read from them in turn until it is full.
+        """
+        after_row = self.after_row(cursor[0], cursor[1], params)
+        if self.req_id is None:
+            return [f"AND {where}" for where in after_row]
+
+        sort_value = cursor[2]
+        if sort_value is None:
+            # The cursor is in the tail of rows without a value
+            return [f"AND {self.key} IS NULL AND {where}" for where in after_row]
+
+        params["cursor_sort"] = sort_value
+        cursor_sort = (
+            "CAST(:cursor_sort AS numeric)"
+            if self.kind in ("numeric", "date") and not self.reference
+            else ":cursor_sort"
+        )
+        op = "<" if self.descending else ">"
+        # The bound on the value alone is the start of the scan, ties are filtered
+        ties = " OR ".join(f"({where})" for where in after_row)
+        return [
+            f"AND {self.key} {op}= {cursor_sort} AND ({self.key} {op} {cursor_sort} "
+            f"OR {self.key} = {cursor_sort} AND ({ties}))",
+            f"AND {self.key} IS NULL",
+        ]
+
+
+# Listing order without a sort parameter: by object value
+DEFAULT_SORT = SortSpec("", None)
+
+
+def resolve_field(name: str, term: TermHeader) -> Optional[HeaderField]:
+    """Finds a requisite of ``term`` by ``f{id}``, name or original name.
+
+    Returns:
+        The header field, or None if the term has no such requisite.
+    """
+    if name.startswith("f") and name[1:].isdigit():
+        return term.header_map.get(int(name[1:]))
+
+    name = name.lower()
+    for field in term.header:
+        if field.name and field.name.lower() == name:
+            return field
+    for field in term.header:
+        if field.original_name and field.original_name.lower() == name:
+            return field
+    return None
+
+
+def is_multi_valued(field: HeaderField) -> bool:
+    """Whether an object may have several values of the requisite."""
+    return field.is_table_req or any("MULTIPLE" in mod for mod in field.modifiers)
+
+
+def base_kind(base: Optional[int]) -> str:
+    """Returns "numeric", "date" or "text" for a base type ID."""
+    if base in NUMERIC_BASES:
+        return "numeric"
+    if base in DATE_BASES:
+        return "date"
+    return "text"
+
+
+def value_kind(term: TermHeader, req_id: int) -> str:
+    """Returns the kind of values of a requisite by the base type of its type."""
+    return base_kind(term.req_bases.get(req_id))
+
+
+def is_term_itself(name: str, term: TermHeader) -> bool:
+    """Whether ``name`` (``f{term_id}`` or the term name) denotes the object value."""
+    return name == f"f{term.id}" or name.lower() == str(term.name).lower()
+
+
+def parse_sort(sort: str, term: TermHeader) -> SortSpec:
+    """Resolves ``sort`` through the term header.
+
+    Raises:
+        HTTPException: 422 for unknown requisites and for table or MULTIPLE
+            requisites, which have several values per object.
+    """
+    descending = sort.startswith("-")
+    name = sort[1:] if descending else sort
+
+    if is_term_itself(name, term):
+        return SortSpec(sort, None, descending)
+
+    field = resolve_field(name, term)
+    if field is None:
+        raise HTTPException(status_code=422, detail=f"Unknown sort field: {name}")
+    if is_multi_valued(field):
+        raise HTTPException(
+            status_code=422, detail=f"Cannot sort by multi-valued requisite: {name}"
+        )
+
+    if field.id in term.req_refs:
+        return SortSpec(sort, field.id, descending, reference=True)
+    return SortSpec(sort, field.id, descending, value_kind(term, field.id))
@@ -0,0 +1,74 @@
+"""Nested JSON document of an object with its child objects.
+
+The subtree is read with one recursive CTE over ``up`` in depth-first order
+through a server-side cursor. Requisites are resolved per chunk with the
+batched queries of the term object listings, and the document is written as
+the rows arrive, so only one chunk is held in memory.
+"""
+
+from typing import Any, AsyncIterator, Dict, List
+import json
+
+from app.db.db import get_sql
+from app.logger import setup_logger
+from app.services.object_by_term import _build_reqs_maps, _get_term_header
+
+logger = setup_logger(__name__)
+
+
+async def _tree_reqs_maps(conn, db_name: str, rows: List[Any]) -> Dict[int, Dict[str, Any]]:
+    """Resolves requisites of a chunk of tree rows, one batch per term."""
+    ids_by_term: Dict[int, List[int]] = {}
+    for obj_id, _, t, _, _ in rows:
+        ids_by_term.setdefault(t, []).append(obj_id)
+
+    reqs_maps: Dict[int, Dict[str, Any]] = {}
+    for term_id, obj_ids in ids_by_term.items():
+        term = await _get_term_header(conn, db_name, term_id)
+        if term is None:
+            reqs_maps.update((obj_id, {}) for obj_id in obj_ids)
+            continue
+        reqs_maps.update(
+            await _build_reqs_maps(
+                conn, db_name, obj_ids, term.header_map, term.ordered_table_reqs
+            )
+        )
+    return reqs_maps
+
+
+async def stream_object_tree(
+    conn, db_name: str, object_id: int, depth: int, chunk_size: int
+) -> AsyncIterator[str]:
+    """Yields the JSON document of an object and its descendants down to ``depth``.
+
+    Every node looks like
+    ``{"id": 1, "up": 0, "t": 3, "val": "...", "reqs": {...}, "children": [...]}``.
+    Rows come in path order, so a node is complete once a row of the same or a
+    smaller depth arrives.
+    """
+    sql = get_sql("get_object_tree.sql", db=db_name)
+    result = await conn.stream(sql, {"object_id": object_id, "depth": depth})
+
+    open_depth = -1
+    async for chunk in result.partitions(chunk_size):
+        reqs_maps = await _tree_reqs_maps(conn, db_name, chunk)
+        parts = []
+        # Unpacked by position: Row.t is SQLAlchemy's tuple accessor, not the column
+        for obj_id, up, t, val, level in chunk:
+            if level <= open_depth:
+                parts.append("]}" * (open_depth - level + 1) + ",")
+            node = json.dumps(
+                {
+                    "id": int(obj_id),
+                    "up": int(up),
+                    "t": int(t),
+                    "val": val,
+                    "reqs": reqs_maps[obj_id],
+                },
+                ensure_ascii=False,
+            )
+            parts.append(node[:-1] + ',"children":[')
+            open_depth = level
+        yield "".join(parts)
+
+    yield "]}" * (open_depth + 1)
@@ -0,0 +1,61 @@
+"""Opaque keyset cursors for term object listings."""
+
+import base64
+import json
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+
+
+def encode_cursor(
+    sort_key: Optional[str],
+    obj_id: int,
+    sort_value: Optional[str] = None,
+    sort: Optional[str] = None,
+) -> str:
+    """Encodes the keyset position ``(lower(left(val, 127)), id)`` of a row.
+
+    Args:
+        sort_key: The row's sort key as computed by the database.
+        obj_id: The row's object ID.
+        sort_value: The row's value of the requisite the listing is sorted by.
+        sort: The ``sort`` parameter of the listing; stored so the cursor is
+            only accepted with the same ordering.
+
+    Returns:
+        str: A URL-safe opaque cursor string.
+    """
+    position = [sort_key, obj_id] if sort is None else [sort_key, obj_id, sort_value, sort]
+    raw = json.dumps(position, ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _sort_key(sort_key) -> Optional[str]:
+    # Objects without a value have a NULL sort key
+    return None if sort_key is None else str(sort_key)
+
+
+def decode_cursor(cursor: str, sort: Optional[str] = None) -> Tuple:
+    """Decodes a cursor produced by :func:`encode_cursor`.
+
+    Returns:
+        Tuple: ``(sort_key, obj_id)``, or ``(sort_key, obj_id, sort_value)``
+        when ``sort`` is given.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed or was produced for
+            another ordering.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded))
+        if sort is None:
+            sort_key, obj_id = position
+            return _sort_key(sort_key), int(obj_id)
+        sort_key, obj_id, sort_value, cursor_sort = position
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if cursor_sort != sort:
+        raise HTTPException(status_code=400, detail="Cursor does not match sort")
+    return _sort_key(sort_key), int(obj_id), sort_value
@@ -0,0 +1,259 @@
+"""Reports: grouped aggregates over the objects of a term.
+
+A report definition compiles into a single ``GROUP BY`` query over the EAV
+table. Every requisite used by the report is joined once as
+``repval_{id}`` over the ``(up, t)`` index (references additionally join the
+referenced object as ``repval_{id}_ref``), so the filters of the report
+context (mode "c" of :class:`FilterBuilder`) apply to the same rows that are
+grouped and aggregated. Values are cast by the requisite type with the guarded
+expressions of :mod:`app.services.object_sort`; numbers are returned as
+floats. Results are columnar and cached per definition for REPORT_CACHE_TTL
+seconds.
+"""
+
+from typing import Any, Dict, List, Set, Tuple
+import hashlib
+import json
+
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from app.db.db import get_sql
+from app.models.report import ReportAggregate, ReportQuery
+from app.services.filter_builder import GROUP_KEYS, FilterBuilder
+from app.services.metadata_cache import TermHeader
+from app.services.object_count import CountCache
+from app.services.object_sort import (
+    DATE_KEY,
+    NUMERIC_KEY,
+    base_kind,
+    is_multi_valued,
+    is_term_itself,
+    resolve_field,
+    value_kind,
+)
+from app.settings import settings
+
+# Same LRU/TTL policy as listing totals: results may be up to the TTL stale
+report_cache = CountCache(maxsize=settings.REPORT_CACHE_SIZE, ttl=settings.REPORT_CACHE_TTL)
+
+
+class _Column:
+    """A value of the report rows: the object value or a joined requisite."""
+
+    def __init__(
+        self, label: str, alias: str, kind: str, req_id: int = 0, reference: bool = False
+    ):
+        self.label = label
+        self.alias = alias
+        self.req_id = req_id
+        self.kind = kind
+        self.reference = reference
+
+    @property
+    def raw(self) -> str:
+        return f"{self.alias}_ref.val" if self.reference else f"{self.alias}.val"
+
+    @property
+    def numeric(self) -> str:
+        return NUMERIC_KEY.format(value=f"{self.alias}.val")
+
+    @property
+    def date(self) -> str:
+        return DATE_KEY.format(value=f"{self.alias}.val")
+
+    def group_expr(self) -> str:
+        if self.kind == "numeric":
+            return f"CAST({self.numeric} AS double precision)"
+        return self.raw
+
+    def order_expr(self) -> str:
+        if self.kind == "date":
+            return self.date
+        if self.kind == "numeric":
+            return self.group_expr()
+        return f"lower({self.raw})"
+
+    def aggregate(self, fn: str) -> str:
+        if fn == "count":
+            return f"count({self.raw})"
+        if fn in ("sum", "avg"):
+            if self.kind != "numeric":
+                raise HTTPException(
+                    status_code=422,
+                    detail=f"{fn} needs a NUMBER or FLOAT field: {self.label}",
+                )
+            return f"CAST({fn}({self.numeric}) AS double precision)"
+        if self.kind == "numeric":
+            return f"CAST({fn}({self.numeric}) AS double precision)"
+        if self.kind == "date":
+            # The stored value of the chronologically first/last date
+            direction = "ASC" if fn == "min" else "DESC"
+            return (
+                f"(array_agg({self.raw} ORDER BY {self.date} {direction}) "
+                f"FILTER (WHERE {self.date} IS NOT NULL))[1]"
+            )
+        return f"{fn}({self.raw})"
+
+
+class ReportCompiler:
+    """Compiles a :class:`ReportQuery` for a term into SQL and bind parameters."""
+
+    def __init__(self, db_name: str, term: TermHeader, query: ReportQuery):
+        self.db_name = db_name
+        self.term = term
+        self.query = query
+        self._joined: Dict[int, _Column] = {}
+        self._params: Dict[str, Any] = {}
+
+    def compile(self) -> Tuple[Any, Dict[str, Any], List[str]]:
+        """Returns ``(sql, params, column_names)``.
+
+        Raises:
+            HTTPException: 422 for unknown, multi-valued or mistyped fields.
+            ValueError: If a filter group has an invalid structure.
+        """
+        if not self.query.group_by and not self.query.aggregates:
+            raise HTTPException(status_code=422, detail="Report needs group_by or aggregates")
+
+        groups = [self._column(name) for name in self.query.group_by]
+        columns = [f"{col.group_expr()} AS g{i}" for i, col in enumerate(groups)]
+        names = [col.label for col in groups]
+        for i, agg in enumerate(self.query.aggregates):
+            columns.append(f"{self._aggregate(agg)} AS a{i}")
+            names.append(agg.name or (f"{agg.fn}({agg.field})" if agg.field else agg.fn))
+
+        where_clause = ""
+        filters = self.query.filters or {}
+        if filters:
+            for req_id in _report_filter_ids(filters):
+                self._report_filter_column(req_id)
+            _, where_clause, filter_params = FilterBuilder(
+                filters,
+                term_id=self.term.id,
+                term_name=self.term.name,
+                header=self.term.header,
+                db_name=self.db_name,
+                context_mode="report",
+            ).build()
+            self._params.update(filter_params)
+
+        if self.query.up is not None:
+            where_clause = f"AND vals.up = :parent_id {where_clause}"
+            self._params["parent_id"] = self.query.up
+
+        group_by = order_by = ""
+        if groups:
+            group_by = "GROUP BY " + ", ".join(col.group_expr() for col in groups)
+            order_by = "ORDER BY " + ", ".join(
+                f"{col.order_expr()} NULLS LAST" for col in groups
+            )
+
+        joins = "\n  ".join(self._join(col) for col in self._joined.values())
+        self._params.update(term_id=self.term.id, limit=self.query.limit)
+        sql = get_sql(
+            "report_term_objects.sql",
+            db=self.db_name,
+            columns=",\n       ".join(columns),
+            joins=joins,
+            where_clauses=where_clause,
+            group_by=group_by,
+            order_by=order_by,
+        )
+        return sql, self._params, names
+
+    def _aggregate(self, agg: ReportAggregate) -> str:
+        if agg.field is None:
+            if agg.fn != "count":
+                raise HTTPException(status_code=422, detail=f"{agg.fn} needs a field")
+            return "count(*)"
+        return self._column(agg.field).aggregate(agg.fn)
+
+    def _column(self, name: str) -> _Column:
+        if is_term_itself(name, self.term):
+            return _Column(self.term.name, "vals", base_kind(self.term.base))
+
+        field = resolve_field(name, self.term)
+        if field is None:
+            raise HTTPException(status_code=422, detail=f"Unknown report field: {name}")
+        if is_multi_valued(field):
+            raise HTTPException(
+                status_code=422, detail=f"Cannot report on multi-valued requisite: {name}"
+            )
+        return self._join_column(field.id, field.name or name)
+
+    def _join_column(self, req_id: int, label: str) -> _Column:
+        if req_id not in self._joined:
+            reference = req_id in self.term.req_refs
+            kind = "text" if reference else value_kind(self.term, req_id)
+            self._joined[req_id] = _Column(
+                label, f"repval_{req_id}", kind, req_id, reference
+            )
+        return self._joined[req_id]
+
+    def _report_filter_column(self, req_id: int) -> None:
+        field = self.term.header_map.get(req_id)
+        if field is None or is_multi_valued(field) or req_id in self.term.req_refs:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Report filter {req_id} must be a single-valued, non-reference requisite",
+            )
+        self._join_column(req_id, field.name or str(req_id))
+
+    def _join(self, col: _Column) -> str:
+        if col.reference:
+            self._params[f"{col.alias}_ref"] = str(col.req_id)
+            return (
+                f"LEFT JOIN {self.db_name} {col.alias} ON {col.alias}.up = vals.id "
+                f"AND {col.alias}.val = :{col.alias}_ref\n"
+                f"  LEFT JOIN {self.db_name} {col.alias}_ref ON {col.alias}_ref.id = {col.alias}.t"
+            )
+        self._params[f"{col.alias}_t"] = col.req_id
+        return (
+            f"LEFT JOIN {self.db_name} {col.alias} ON {col.alias}.up = vals.id "
+            f"AND {col.alias}.t = :{col.alias}_t"
+        )
+
+
+def _report_filter_ids(filters: Dict[str, Any]) -> Set[int]:
+    """Collects the bare requisite IDs (mode "c" keys) of report filters."""
+    ids: Set[int] = set()
+    for key, value in filters.items():
+        if key in GROUP_KEYS:
+            for item in [value] if isinstance(value, dict) else value or []:
+                if isinstance(item, dict):
+                    ids |= _report_filter_ids(item)
+        elif key.isdigit():
+            ids.add(int(key))
+    return ids
+
+
+def report_key(db_name: str, query: ReportQuery) -> Tuple[str, str]:
+    """Identifies a report definition for the cache."""
+    raw = json.dumps(query.model_dump(), ensure_ascii=False, sort_keys=True, default=str)
+    return db_name, hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+async def run_report(
+    conn, db_name: str, term: TermHeader, query: ReportQuery
+) -> Dict[str, Any]:
+    """Runs a report within REPORT_TIMEOUT_MS and returns the columnar payload.
+
+    ``conn`` must be in a transaction: the statement timeout is set locally.
+    """
+    key = report_key(db_name, query)
+    payload = report_cache.get(key)
+    if payload is not None:
+        return payload
+
+    sql, params, names = ReportCompiler(db_name, term, query).compile()
+    await conn.execute(
+        text("SELECT set_config('statement_timeout', :timeout, true)"),
+        {"timeout": str(settings.REPORT_TIMEOUT_MS)},
+    )
+    rows = (await conn.execute(sql, params)).fetchall()
+
+    data: List[List[Any]] = [list(values) for values in zip(*rows)] if rows else [[] for _ in names]
+    payload = {"t": term.id, "name": term.name, "columns": names, "data": data, "rows": len(rows)}
+    report_cache.set(key, payload)
+    return payload
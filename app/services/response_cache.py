@@ -0,0 +1,151 @@
+"""In-process cache of serialized responses of tenant-wide listings.
+
+``GET /{db_name}/terms`` and ``GET /{db_name}/metadata`` are requested by
+every client on start and change rarely. Their bodies are cached per tenant
+as encoded JSON bytes together with the ETag and, for bodies of at least
+RESPONSE_CACHE_GZIP_MIN_SIZE bytes, a gzip-compressed copy. A hit is
+answered without touching the database, including the ``304 Not Modified``
+check.
+
+Entries expire after RESPONSE_CACHE_TTL seconds. The term, requisite and
+reference write endpoints invalidate the tenant immediately; other workers
+see the change when their entry expires. Concurrent misses of the same entry
+share one query (single-flight), and a query that overlaps an invalidation
+is returned to its callers but not stored.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
+import gzip
+import time
+
+from fastapi import Request, Response
+
+from app.services.versions import etag_matches
+from app.settings import settings
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Whether ``Accept-Encoding`` allows gzip."""
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.partition(";")
+        if coding.strip().lower() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """A serialized JSON body with its ETag and optional gzip copy."""
+
+    body: bytes
+    etag: str
+    gzipped: Optional[bytes] = None
+
+    def response(self, request: Request) -> Response:
+        """Renders the entry for ``request``: 304, gzip or identity."""
+        headers = {"Vary": "Accept-Encoding"}
+        body = self.body
+        etag = self.etag
+        if self.gzipped is not None and accepts_gzip(request.headers.get("accept-encoding")):
+            # A strong ETag identifies one representation, so the encodings differ
+            body = self.gzipped
+            etag = f'{self.etag[:-1]}-gzip"'
+            headers["Content-Encoding"] = "gzip"
+        headers["ETag"] = etag
+
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag, "Vary": "Accept-Encoding"})
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+class ResponseCache:
+    """LRU cache of :class:`CachedResponse` keyed by ``(db_name, endpoint)``."""
+
+    def __init__(self, maxsize: int, ttl: float, gzip_min_size: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.gzip_min_size = gzip_min_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, CachedResponse]]" = (
+            OrderedDict()
+        )
+        self._inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._generations: Dict[str, int] = {}
+
+    def get(self, key: Tuple[str, str]) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None or (self.ttl and time.monotonic() - entry[0] > self.ttl):
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    async def get_or_build(
+        self,
+        key: Tuple[str, str],
+        build: Callable[[], Awaitable[Tuple[bytes, str]]],
+    ) -> CachedResponse:
+        """Returns the cached entry, or builds it once for all concurrent callers.
+
+        Args:
+            key: ``(db_name, endpoint)``.
+            build: Coroutine function returning the encoded body and its ETag.
+        """
+        entry = self.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fill(key, build))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # A cancelled caller must not cancel the query the others are waiting for
+        return await asyncio.shield(task)
+
+    async def _fill(
+        self, key: Tuple[str, str], build: Callable[[], Awaitable[Tuple[bytes, str]]]
+    ) -> CachedResponse:
+        generation = self._generations.get(key[0], 0)
+        body, etag = await build()
+        gzipped = None
+        if self.gzip_min_size and len(body) >= self.gzip_min_size:
+            gzipped = await asyncio.to_thread(gzip.compress, body, 6)
+        entry = CachedResponse(body, etag, gzipped)
+
+        if self._generations.get(key[0], 0) == generation:
+            self._entries[key] = (time.monotonic(), entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, db_name: str) -> None:
+        """Drops the tenant's entries; queries already running are not stored."""
+        self._generations[db_name] = self._generations.get(db_name, 0) + 1
+        for key in [key for key in self._entries if key[0] == db_name]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+response_cache = ResponseCache(
+    maxsize=settings.RESPONSE_CACHE_SIZE,
+    ttl=settings.RESPONSE_CACHE_TTL,
+    gzip_min_size=settings.RESPONSE_CACHE_GZIP_MIN_SIZE,
+)
@@ -0,0 +1,52 @@
+"""Substring search over object values of a tenant table.
+
+Matches are ``lower(val) LIKE '%q%'`` over objects of all terms. Tables with
+the optional pg_trgm index ``{db}_trgm_idx`` on ``lower(val)`` answer the
+predicate from the index and rank by trigram similarity; without it matches
+are ranked by the share of the value covered by the query. Exact and prefix
+matches always come first.
+"""
+
+from typing import Any, Dict, List
+
+from app.db.db import get_sql, table_registry
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+async def search_objects(conn, db_name: str, q: str, limit: int) -> List[Dict[str, Any]]:
+    """Returns up to ``limit`` objects whose value contains ``q``, best first.
+
+    Returns:
+        List[Dict[str, Any]]: ``{"id", "up", "t", "term", "val", "score"}`` per match.
+    """
+    q = q.strip().lower()
+    escaped = _escape_like(q)
+    name = (
+        "search_objects_trgm.sql"
+        if table_registry.has_trigram(db_name)
+        else "search_objects.sql"
+    )
+    rows = await conn.execute(
+        get_sql(name, db=db_name),
+        {
+            "q": q,
+            "pattern": f"%{escaped}%",
+            "prefix": f"{escaped}%",
+            "limit": limit,
+        },
+    )
+    # Unpacked by position: Row.t is SQLAlchemy's tuple accessor, not the column
+    return [
+        {
+            "id": obj_id,
+            "up": up,
+            "t": t,
+            "term": term,
+            "val": val,
+            "score": round(float(score), 4),
+        }
+        for obj_id, up, t, term, val, score in rows
+    ]
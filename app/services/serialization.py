@@ -0,0 +1,71 @@
+"""Fast JSON encoding of large list responses.
+
+List endpoints build their payloads as plain dicts straight from DB rows and
+encode them with orjson when it is installed (stdlib ``json`` otherwise).
+The pydantic response models stay on the routes for validation of requests
+and the OpenAPI schema only; constructing and dumping a model per row costs
+more than the queries for large pages.
+"""
+
+from typing import Any, Dict, List, Optional
+import json
+
+from fastapi.responses import JSONResponse
+
+from app.services.metadata_cache import TermHeader
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """Encodes ``content`` as compact UTF-8 JSON, like Starlette's JSONResponse."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with :func:`dumps`."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def header_payload(term: TermHeader) -> List[Dict[str, Any]]:
+    """Returns the header of a term as dumped by ``TermObjectsResponse``."""
+    return [field.model_dump(exclude_none=True) for field in term.header]
+
+
+def object_payload(obj, reqs: Dict[str, Any]) -> Dict[str, Any]:
+    """Returns one object row of a listing as dumped by ``ObjectRow``."""
+    return {"id": int(obj.id), "up": int(obj.up), "val": str(obj.val), "reqs": reqs}
+
+
+def term_objects_payload(
+    term: TermHeader,
+    object_rows,
+    reqs_maps: Dict[int, Dict[str, Any]],
+    next_cursor: Optional[str] = None,
+    total: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Builds the body of an object listing without per-row pydantic models.
+
+    The result is equal to ``TermObjectsResponse(...).model_dump(exclude_none=True)``.
+    """
+    payload = {
+        "t": term.id,
+        "name": term.name,
+        "base": term.base,
+        "header": header_payload(term),
+        "objects": [object_payload(obj, reqs_maps[obj.id]) for obj in object_rows],
+    }
+    if next_cursor is not None:
+        payload["next_cursor"] = next_cursor
+    if total is not None:
+        payload["total"] = total
+    return payload
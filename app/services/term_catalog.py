@@ -0,0 +1,131 @@
+"""Catalog of the metadata rows of each tenant.
+
+``catalog.terms`` keeps one row per term and reference of a tenant: value,
+base type, whether the term is top-level (not the type of another term's
+requisite), its requisite count and the referenced term of a reference. The
+term endpoints list top-level terms with an index scan of the catalog
+instead of checking every metadata row with a self-joined ``NOT EXISTS``.
+
+The term, requisite and reference write endpoints refresh the rows they
+affect in their own transaction. A tenant's catalog is built in the
+background on its first read; until then, and for tenants whose build
+failed, the endpoints use the EAV queries. Direct writes to metadata rows
+outside the API are not seen until the catalog is rebuilt with
+:func:`build_catalog`.
+"""
+
+from typing import Iterable, List, Set
+import asyncio
+
+from sqlalchemy import text
+
+from app.db.db import engine, execute_script, get_sql, load_sql
+from app.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+_ready = False
+_built: Set[str] = set()
+_building: Set[str] = set()
+_failed: Set[str] = set()
+_tasks: Set[asyncio.Task] = set()
+
+
+async def ensure_catalog() -> None:
+    """Creates the catalog tables once per process, in their own transaction."""
+    global _ready
+    if _ready:
+        return
+    async with engine.begin() as conn:
+        await execute_script(conn, load_sql("catalog_setup.sql"))
+    _ready = True
+
+
+async def refresh_terms(conn, db_name: str, term_ids: Iterable[int]) -> None:
+    """Re-reads the catalog rows of the given metadata rows in ``conn``'s transaction.
+
+    Rows that no longer exist are removed.
+    """
+    term_ids = sorted({term_id for term_id in term_ids if term_id})
+    if not term_ids:
+        return
+    await ensure_catalog()
+    await conn.execute(
+        get_sql(
+            "catalog_refresh.sql", rows=load_sql("catalog_rows.sql", db=db_name)
+        ),
+        {"db_name": db_name, "term_ids": term_ids},
+    )
+
+
+async def requisite_types(conn, db_name: str, term_id: int) -> List[int]:
+    """Types of the requisites of a term: their top-level flag depends on it."""
+    rows = await conn.execute(
+        text(f"SELECT DISTINCT t FROM {db_name} WHERE up = :term_id AND t != 0"),
+        {"term_id": term_id},
+    )
+    return [t for t, in rows.fetchall()]
+
+
+async def build_catalog(conn, db_name: str) -> None:
+    """Rebuilds the catalog of a tenant in the caller's transaction.
+
+    Writes to the tenant table wait until it commits (SHARE lock), so no
+    write endpoint refreshes rows the build is about to overwrite.
+    """
+    await ensure_catalog()
+    await conn.exec_driver_sql(f"LOCK TABLE {db_name} IN SHARE MODE")
+    await conn.execute(
+        text("DELETE FROM catalog.terms WHERE db_name = :db_name"), {"db_name": db_name}
+    )
+    await conn.execute(
+        get_sql("catalog_build.sql", rows=load_sql("catalog_rows.sql", db=db_name)),
+        {"db_name": db_name},
+    )
+    await conn.execute(
+        text(
+            "INSERT INTO catalog.tenants (db_name) VALUES (:db_name) "
+            "ON CONFLICT (db_name) DO UPDATE SET built_at = now()"
+        ),
+        {"db_name": db_name},
+    )
+
+
+async def _build(db_name: str) -> None:
+    try:
+        async with engine.begin() as conn:
+            await build_catalog(conn, db_name)
+        # Marked as built once a read connection sees it: replicas may lag
+        logger.info("Built term catalog of %s", db_name)
+    except Exception:
+        _failed.add(db_name)
+        logger.exception("Could not build term catalog of %s", db_name)
+    finally:
+        _building.discard(db_name)
+
+
+async def catalog_ready(conn, db_name: str) -> bool:
+    """Whether the catalog of the tenant can be read on ``conn``.
+
+    Starts the build in the background the first time a tenant without a
+    catalog is read; a failed build is not retried until restart.
+    """
+    if db_name in _built:
+        return True
+
+    built = False
+    if (await conn.execute(text("SELECT to_regclass('catalog.tenants')"))).scalar():
+        built = (
+            await conn.execute(
+                text("SELECT 1 FROM catalog.tenants WHERE db_name = :db_name"),
+                {"db_name": db_name},
+            )
+        ).scalar() is not None
+    if built:
+        _built.add(db_name)
+    elif db_name not in _building and db_name not in _failed:
+        _building.add(db_name)
+        task = asyncio.create_task(_build(db_name))
+        _tasks.add(task)
+        task.add_done_callback(_tasks.discard)
+    return built
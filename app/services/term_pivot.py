@@ -0,0 +1,290 @@
+"""Materialized pivots of hot terms.
+
+A pivot is an opt-in table ``pivot.{db}_{term_id}`` with one row per object
+of the term: ``id, up, t, val`` as in the tenant table plus, for every
+single-valued, non-reference requisite, the raw value ``r{id}`` and for
+NUMBER/FLOAT/DATE/DATETIME requisites the typed sort key ``k{id}``.
+
+Statement triggers on the tenant table keep pivots current within the
+writing transaction, whatever the write path; a change of the term's
+requisites or their modifiers marks the pivot stale instead. Listings read
+a fresh pivot in place of the tenant table (it is aliased ``vals`` like the
+tenant table), filters and sorts on its columns become plain column
+predicates, and requisites it does not cover still use the EAV subqueries.
+Stale pivots are skipped and rebuilt in the background.
+"""
+
+from dataclasses import dataclass, replace
+from typing import Dict, Optional, Set, Tuple
+import asyncio
+import json
+import time
+
+from sqlalchemy import text
+
+from app.db.db import engine, execute_script, load_sql
+from app.logger import setup_logger
+from app.services.metadata_cache import TermHeader, metadata_cache
+from app.services.object_by_term import _get_term_header
+from app.services.object_sort import (
+    DATE_KEY,
+    NUMERIC_KEY,
+    SortSpec,
+    is_multi_valued,
+    value_kind,
+)
+from app.settings import settings
+
+logger = setup_logger(__name__)
+
+KEY_TEMPLATES = {"numeric": NUMERIC_KEY, "date": DATE_KEY}
+
+
+@dataclass(frozen=True)
+class TermPivot:
+    """A built pivot of a term.
+
+    Attributes:
+        db_name: Tenant table.
+        term_id: Term ID.
+        table: Qualified name of the pivot table.
+        columns: Value kind ("text", "numeric" or "date") keyed by requisite ID.
+    """
+
+    db_name: str
+    term_id: int
+    table: str
+    columns: Dict[int, str]
+
+    def cover_sort(self, sort: Optional[SortSpec]) -> Optional[SortSpec]:
+        """Returns ``sort`` reading its requisite from the pivot when covered."""
+        if sort is None or sort.req_id not in self.columns:
+            return sort
+        return replace(sort, pivot=True)
+
+
+def pivot_name(db_name: str, term_id: int) -> str:
+    return f"{db_name}_{term_id}"
+
+
+def pivot_columns(term: TermHeader) -> Dict[int, str]:
+    """Requisites of ``term`` stored in its pivot, with their value kinds."""
+    return {
+        field.id: value_kind(term, field.id)
+        for field in term.header
+        if not is_multi_valued(field) and field.id not in term.req_refs
+    }
+
+
+def _upsert_sql(db_name: str, term_id: int, columns: Dict[int, str]) -> str:
+    names, keys, values = [], [], []
+    for req_id, kind in columns.items():
+        names.append(f"r{req_id}")
+        keys.append(f"obj.r{req_id}")
+        values.append(
+            f"(array_agg(r.val ORDER BY r.id) FILTER (WHERE r.t = {req_id}))[1] AS r{req_id}"
+        )
+        if kind in KEY_TEMPLATES:
+            names.append(f"k{req_id}")
+            keys.append(KEY_TEMPLATES[kind].format(value=f"obj.r{req_id}"))
+    updates = [f"{name} = EXCLUDED.{name}" for name in names]
+    return load_sql(
+        "pivot_upsert.sql",
+        pivot=pivot_name(db_name, term_id),
+        db=db_name,
+        term_id=term_id,
+        req_ids=",".join(str(req_id) for req_id in columns),
+        columns="".join(f", {name}" for name in names),
+        keys="".join(f",\n       {key}" for key in keys),
+        values="".join(f",\n           {value}" for value in values),
+        updates="".join(f", {update}" for update in updates),
+    )
+
+
+async def build_pivot(conn, db_name: str, term: TermHeader) -> TermPivot:
+    """Creates or rebuilds the pivot of ``term`` and installs the triggers.
+
+    Runs in the caller's transaction. Writes to the tenant table are blocked
+    (SHARE lock) until it commits, so no change is missed between the fill
+    and the triggers taking over. Pass the result to ``pivot_registry.set``
+    after the commit.
+    """
+    name = pivot_name(db_name, term.id)
+    columns = pivot_columns(term)
+    ddl = []
+    for req_id, kind in columns.items():
+        ddl.append(f",\n    r{req_id} text NULL")
+        if kind in KEY_TEMPLATES:
+            ddl.append(f",\n    k{req_id} numeric NULL")
+
+    await execute_script(conn, load_sql("pivot_setup.sql"))
+    await conn.exec_driver_sql(f"LOCK TABLE {db_name} IN SHARE MODE")
+    await execute_script(conn, load_sql("pivot_create.sql", pivot=name, columns="".join(ddl)))
+    await conn.execute(
+        text(
+            "INSERT INTO pivot.terms (db_name, term_id, pivot_table, columns, upsert_sql) "
+            "VALUES (:db_name, :term_id, :pivot, CAST(:columns AS jsonb), :upsert) "
+            "ON CONFLICT (db_name, term_id) DO UPDATE SET pivot_table = EXCLUDED.pivot_table, "
+            "columns = EXCLUDED.columns, upsert_sql = EXCLUDED.upsert_sql, "
+            "stale = false, built_at = now()"
+        ),
+        {
+            "db_name": db_name,
+            "term_id": term.id,
+            "pivot": name,
+            "columns": json.dumps(columns),
+            "upsert": _upsert_sql(db_name, term.id, columns),
+        },
+    )
+    await conn.execute(
+        text("SELECT pivot.refresh_rows(:db_name, :term_id, NULL)"),
+        {"db_name": db_name, "term_id": term.id},
+    )
+    for req_id, kind in columns.items():
+        key = f"k{req_id}" if kind in KEY_TEMPLATES else f"lower(left(r{req_id}, 127))"
+        await conn.exec_driver_sql(
+            f"CREATE INDEX {name}_r{req_id}_idx ON pivot.{name} USING btree ({key})"
+        )
+    await conn.exec_driver_sql(f"ANALYZE pivot.{name}")
+    await execute_script(conn, load_sql("pivot_triggers.sql", db=db_name))
+    return TermPivot(db_name, term.id, f"pivot.{name}", columns)
+
+
+async def drop_pivot(conn, db_name: str, term_id: int) -> bool:
+    """Drops the pivot of a term; removes the triggers with the last pivot of the table.
+
+    Returns:
+        bool: Whether the term had a pivot.
+    """
+    pivot_registry.discard(db_name, term_id)
+    if (await conn.execute(text("SELECT to_regclass('pivot.terms')"))).scalar() is None:
+        return False
+
+    deleted = (
+        await conn.execute(
+            text(
+                "DELETE FROM pivot.terms WHERE db_name = :db_name AND term_id = :term_id "
+                "RETURNING pivot_table"
+            ),
+            {"db_name": db_name, "term_id": term_id},
+        )
+    ).scalar()
+    if deleted is None:
+        return False
+
+    await conn.exec_driver_sql(f"DROP TABLE IF EXISTS pivot.{deleted}")
+    remaining = (
+        await conn.execute(
+            text("SELECT 1 FROM pivot.terms WHERE db_name = :db_name LIMIT 1"),
+            {"db_name": db_name},
+        )
+    ).scalar()
+    if remaining is None:
+        await execute_script(conn, load_sql("pivot_drop_triggers.sql", db=db_name))
+    return True
+
+
+async def _rebuild(db_name: str, term_id: int) -> None:
+    try:
+        metadata_cache.invalidate(db_name)
+        pivot = None
+        async with engine.begin() as conn:
+            term = await _get_term_header(conn, db_name, term_id)
+            if term is None:
+                await drop_pivot(conn, db_name, term_id)
+            else:
+                pivot = await build_pivot(conn, db_name, term)
+        if pivot is not None:
+            pivot_registry.set(pivot)
+        logger.info("Rebuilt pivot of term %s in %s", term_id, db_name)
+    except Exception:
+        logger.exception("Could not rebuild pivot of term %s in %s", term_id, db_name)
+    finally:
+        pivot_registry.rebuilding.discard((db_name, term_id))
+
+
+class PivotRegistry:
+    """In-memory catalog of the pivots, reloaded when older than ``ttl`` seconds.
+
+    Pivots built or dropped by this process are applied immediately; other
+    workers pick them up on their next reload.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._pivots: Dict[Tuple[str, int], TermPivot] = {}
+        self._stale: Set[Tuple[str, int]] = set()
+        self.rebuilding: Set[Tuple[str, int]] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def _expired(self) -> bool:
+        return self._loaded_at is None or (
+            self.ttl > 0 and time.monotonic() - self._loaded_at > self.ttl
+        )
+
+    async def refresh(self) -> None:
+        """Reloads the catalog ``pivot.terms``."""
+        pivots, stale = {}, set()
+        async with engine.connect() as conn:
+            if (await conn.execute(text("SELECT to_regclass('pivot.terms')"))).scalar():
+                rows = (
+                    await conn.execute(
+                        text("SELECT db_name, term_id, pivot_table, columns, stale FROM pivot.terms")
+                    )
+                ).fetchall()
+                for db_name, term_id, table, columns, is_stale in rows:
+                    if isinstance(columns, str):
+                        columns = json.loads(columns)
+                    key = (db_name, term_id)
+                    if is_stale:
+                        stale.add(key)
+                    else:
+                        pivots[key] = TermPivot(
+                            db_name,
+                            term_id,
+                            f"pivot.{table}",
+                            {int(req_id): kind for req_id, kind in columns.items()},
+                        )
+        self._pivots, self._stale = pivots, stale
+        self._loaded_at = time.monotonic()
+
+    async def get(self, db_name: str, term_id: int) -> Optional[TermPivot]:
+        """Returns the fresh pivot of a term, or None.
+
+        A stale pivot is rebuilt in the background and None is returned
+        until the rebuild is done.
+        """
+        if self._expired():
+            async with self._lock:
+                if self._expired():
+                    await self.refresh()
+
+        key = (db_name, term_id)
+        if key in self._stale and key not in self.rebuilding:
+            self.rebuilding.add(key)
+            task = asyncio.create_task(_rebuild(db_name, term_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return self._pivots.get(key)
+
+    def set(self, pivot: TermPivot) -> None:
+        key = (pivot.db_name, pivot.term_id)
+        self._pivots[key] = pivot
+        self._stale.discard(key)
+
+    def discard(self, db_name: str, term_id: int) -> None:
+        self._pivots.pop((db_name, term_id), None)
+        self._stale.discard((db_name, term_id))
+
+    def expire(self) -> None:
+        """Reloads the catalog on the next :meth:`get`.
+
+        Called by the term and requisite write endpoints, whose triggers may
+        have marked pivots stale.
+        """
+        self._loaded_at = None
+
+
+pivot_registry = PivotRegistry(ttl=settings.PIVOT_REGISTRY_TTL)
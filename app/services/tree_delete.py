@@ -0,0 +1,76 @@
+"""Deletion of an object or term together with its whole subtree.
+
+The subtree is collected with a recursive CTE over ``up`` and removed with a
+single statement. In batch mode the collected IDs are deleted deepest first in
+separate short transactions, so a huge subtree does not hold locks or a pool
+connection for the whole operation.
+"""
+
+from typing import List
+
+from app.db.db import engine, get_sql
+from app.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+async def check_object_deletable(conn, db_name: str, object_id: int) -> str:
+    """Applies the checks of the delete_object() SQL procedure.
+
+    Returns:
+        str: "1" if the object can be deleted, otherwise an ErrorManager code.
+    """
+    sql = get_sql("get_object_delete_check.sql", db=db_name)
+    row = (await conn.execute(sql, {"id": object_id})).fetchone()
+    if row is None:
+        return "err_obj_not_found"
+    up, pup, cnt = row
+    if pup == 0 or up == 0:
+        return "err_is_metadata"
+    if cnt > 0:
+        return f"err_is_referenced {cnt}"
+    return "1"
+
+
+async def delete_subtree(conn, db_name: str, root_id: int) -> int:
+    """Deletes the row ``root_id`` and all its descendants in one statement.
+
+    Returns:
+        int: Number of deleted rows.
+    """
+    sql = get_sql("delete_subtree.sql", db=db_name)
+    return (await conn.execute(sql, {"root_id": root_id})).scalar_one()
+
+
+async def get_subtree_ids(conn, db_name: str, root_id: int) -> List[int]:
+    """Returns the descendants of ``root_id``, deepest first."""
+    sql = get_sql("get_subtree_ids.sql", db=db_name)
+    return list((await conn.execute(sql, {"root_id": root_id})).scalars().all())
+
+
+async def delete_subtree_batched(
+    db_name: str, root_id: int, ids: List[int], batch_size: int
+) -> int:
+    """Deletes the collected descendants ``ids`` in batches, then the root.
+
+    Every batch runs in its own transaction. The final statement deletes the
+    root with anything added under it while the batches were running.
+
+    Returns:
+        int: Number of deleted rows.
+    """
+    deleted = 0
+    sql = get_sql("delete_rows_bulk.sql", db=db_name)
+    for start in range(0, len(ids), batch_size):
+        async with engine.begin() as conn:
+            result = await conn.execute(sql, {"ids": ids[start:start + batch_size]})
+            deleted += result.rowcount
+
+    async with engine.begin() as conn:
+        deleted += await delete_subtree(conn, db_name, root_id)
+
+    logger.info(
+        "Deleted subtree of %s in %s: %d rows in batches of %d",
+        root_id, db_name, deleted, batch_size,
+    )
+    return deleted
@@ -0,0 +1,116 @@
+"""Version counters of tenant metadata and of the objects of each term.
+
+The write endpoints bump, in their own transaction, the counters of what they
+change: object writes the terms of the written objects (a deleted subtree all
+terms in it), metadata writes the tenant counter (``term_id`` 0) and the term.
+Versions are drawn from one sequence, so they never repeat.
+
+Polled listings derive strong ETags from the counters they depend on. A
+conditional GET whose ETag still matches is answered with ``304 Not Modified``
+after one lookup in ``versions.counters``, without querying the tenant table.
+Counters are read before the listing on the same connection: a write that
+commits in between makes the body newer than its ETag, never older, so the
+next poll simply gets the full response again.
+"""
+
+from typing import Dict, Iterable, List, Optional
+import hashlib
+import json
+
+from fastapi import Request, Response
+from sqlalchemy import text
+
+from app.db.db import engine, execute_script, get_sql, load_sql
+
+# Counter of the tenant's metadata: terms, requisites, modifiers and references
+TENANT = 0
+
+_ready = False
+
+
+async def ensure_versions() -> None:
+    """Creates ``versions.counters`` once per process, in its own transaction."""
+    global _ready
+    if _ready:
+        return
+    async with engine.begin() as conn:
+        await execute_script(conn, load_sql("versions_setup.sql"))
+    _ready = True
+
+
+async def bump_terms(conn, db_name: str, term_ids: Iterable[int]) -> None:
+    """Bumps the counters of the given terms (``TENANT`` for metadata) in ``conn``'s transaction."""
+    await ensure_versions()
+    await conn.execute(
+        get_sql("versions_bump.sql"),
+        {"db_name": db_name, "term_ids": sorted(set(term_ids))},
+    )
+
+
+async def bump_objects(conn, db_name: str, object_ids: Iterable[int]) -> None:
+    """Bumps the counters of the terms of the given objects."""
+    await ensure_versions()
+    await conn.execute(
+        get_sql("versions_bump_objects.sql", db=db_name),
+        {"db_name": db_name, "object_ids": list(object_ids)},
+    )
+
+
+async def bump_subtree(conn, db_name: str, root_id: int) -> List[int]:
+    """Bumps the counters of every term in the subtree of ``root_id``.
+
+    Must run before the subtree is deleted. Returns the bumped terms, to be
+    bumped again after a deletion in separate batches.
+    """
+    await ensure_versions()
+    rows = await conn.execute(
+        get_sql("versions_bump_subtree.sql", db=db_name),
+        {"db_name": db_name, "root_id": root_id},
+    )
+    return [term_id for term_id, in rows.fetchall()]
+
+
+async def get_versions(conn, db_name: str, term_ids: Iterable[int]) -> Dict[int, int]:
+    """Returns the counters of the given terms; terms never written are missing."""
+    global _ready
+    if not _ready:
+        if (await conn.execute(text("SELECT to_regclass('versions.counters')"))).scalar() is None:
+            return {}
+        _ready = True
+    rows = await conn.execute(
+        get_sql("versions_get.sql"), {"db_name": db_name, "term_ids": list(term_ids)}
+    )
+    return dict(rows.fetchall())
+
+
+async def listing_etag(conn, request: Request, db_name: str, term_ids: Iterable[int]) -> str:
+    """Strong ETag of a listing: its URL and the counters it depends on."""
+    term_ids = sorted(set(term_ids))
+    versions = await get_versions(conn, db_name, term_ids)
+    raw = json.dumps(
+        [
+            request.url.path,
+            sorted(request.query_params.multi_items()),
+            [versions.get(term_id, 0) for term_id in term_ids],
+        ],
+        ensure_ascii=False,
+    )
+    return '"' + hashlib.sha1(raw.encode("utf-8")).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluates ``If-None-Match`` against ``etag`` (weak comparison, RFC 9110)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """Returns the 304 response when the client's copy is current, else None."""
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
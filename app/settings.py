@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from pathlib import Path
+from typing import Optional
 
 
 class Settings(BaseSettings):
@@ -8,8 +9,63 @@ class Settings(BaseSettings):
     DB_NAME: str
     DB_USER: str
     DB_PASSWORD: str
+    DB_READ_HOST: str = ""
+    DB_READ_PORT: Optional[int] = None
+    DB_READ_USER: Optional[str] = None
+    DB_READ_PASSWORD: Optional[str] = None
+    DB_READ_STRATEGY: str = "round_robin"
+    READ_YOUR_WRITES_HEADER: str = "X-Read-Your-Writes"
     BOOLEAN_MODIFIERS: list[str] = ["NOT NULL", "ORDER", "MULTIPLE", "UNIQUE"]
     SQL_DIR: Path = Path(__file__).parent / "sql"
+    SQL_CACHE_SIZE: int = 512
+    TABLE_REGISTRY_TTL: float = 300.0
+    BULK_MAX_ITEMS: int = 10000
+    STREAM_CHUNK_SIZE: int = 500
+    TREE_MAX_DEPTH: int = 32
+    METADATA_CACHE_SIZE: int = 1024
+    METADATA_CACHE_TTL: float = 300.0
+    SEARCH_DEFAULT_LIMIT: int = 20
+    COUNT_CACHE_SIZE: int = 1024
+    COUNT_CACHE_TTL: float = 10.0
+    COUNT_EXACT_TIMEOUT_MS: int = 5000
+    SEARCH_MAX_LIMIT: int = 100
+    REPORT_MAX_ROWS: int = 10000
+    REPORT_CACHE_SIZE: int = 256
+    REPORT_CACHE_TTL: float = 30.0
+    REPORT_TIMEOUT_MS: int = 10000
+    PIVOT_REGISTRY_TTL: float = 5.0
+    RESPONSE_CACHE_SIZE: int = 256
+    RESPONSE_CACHE_TTL: float = 60.0
+    RESPONSE_CACHE_GZIP_MIN_SIZE: int = 1024
+    AUTH_JWT_SECRET: Optional[str] = None
+    AUTH_JWT_ALGORITHMS: list[str] = ["HS256"]
+    AUTH_JWT_AUDIENCE: Optional[str] = None
+    AUTH_JWT_ISSUER: Optional[str] = None
+    AUTH_JWT_LEEWAY: float = 30.0
+    AUTH_STATIC_TOKEN: str = "secret-token"
+    AUTH_VERIFIER: str = ""
+    AUTH_TOKEN_CACHE_SIZE: int = 4096
+    AUTH_TOKEN_CACHE_TTL: float = 60.0
+    METRICS_ENABLED: bool = True
+    METRICS_PUBLIC: bool = False
+    METRICS_HTTP_BUCKETS: list[float] = [
+        0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+    ]
+    METRICS_SQL_BUCKETS: list[float] = [
+        0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0
+    ]
+    SQL_PROFILE_HEADER: str = "X-SQL-Profile"
+    SQL_PROFILE_SAMPLE_RATE: float = 0.0
+    SQL_PROFILE_SLOW_MS: float = 100.0
+    SQL_PROFILE_EXPLAIN: bool = True
+    SQL_PROFILE_EXPLAIN_LIMIT: int = 3
+    SQL_PROFILE_EXPLAIN_TIMEOUT_MS: int = 10000
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: dict[str, str] = {}
+    LOG_JSON: bool = False
+    LOG_FILE: Optional[str] = None
+    LOG_DEBUG_SAMPLE_PER_SECOND: int = 10
+    SQL_ECHO: bool = False
 
     class Config:
         env_file = ".env"
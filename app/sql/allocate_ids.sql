@@ -0,0 +1,2 @@
+SELECT nextval(pg_get_serial_sequence(:table, 'id')) id
+  FROM generate_series(1, :count);
\ No newline at end of file
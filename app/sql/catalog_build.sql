@@ -0,0 +1,2 @@
+INSERT INTO catalog.terms (db_name, id, val, base, top_level, req_count, ref_id)
+{rows};
@@ -0,0 +1,19 @@
+WITH ids AS (
+    SELECT DISTINCT unnest(CAST(:term_ids AS int8[])) AS id
+), fresh AS (
+    {rows}
+      AND obj.id IN (SELECT id FROM ids)
+), deleted AS (
+    DELETE FROM catalog.terms c
+    WHERE c.db_name = :db_name
+      AND c.id IN (SELECT id FROM ids)
+      AND c.id NOT IN (SELECT id FROM fresh)
+)
+INSERT INTO catalog.terms (db_name, id, val, base, top_level, req_count, ref_id)
+SELECT * FROM fresh
+ON CONFLICT (db_name, id) DO UPDATE SET
+    val = EXCLUDED.val,
+    base = EXCLUDED.base,
+    top_level = EXCLUDED.top_level,
+    req_count = EXCLUDED.req_count,
+    ref_id = EXCLUDED.ref_id;
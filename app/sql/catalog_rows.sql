@@ -0,0 +1,16 @@
+SELECT CAST(:db_name AS text) AS db_name,
+       obj.id,
+       obj.val,
+       obj.t AS base,
+       NOT EXISTS (
+           SELECT 1 FROM {db} reqs JOIN {db} oth ON oth.id = reqs.up
+           WHERE reqs.t = obj.id AND oth.up = 0 AND oth.id != obj.id
+       ) AS top_level,
+       (
+           SELECT count(*) FROM {db} reqs JOIN {db} req_defs ON req_defs.id = reqs.t
+           WHERE reqs.up = obj.id AND req_defs.t != 0
+       ) AS req_count,
+       refs.id AS ref_id
+FROM {db} obj
+LEFT JOIN {db} refs ON refs.id = obj.t AND refs.t != refs.id
+WHERE obj.up = 0 AND obj.id != obj.t AND obj.t != 0
@@ -0,0 +1,25 @@
+SELECT pg_advisory_xact_lock(hashtext('catalog.terms'));
+
+CREATE SCHEMA IF NOT EXISTS catalog;
+
+-- Metadata rows (terms and references) of every tenant; see term_catalog.py
+CREATE TABLE IF NOT EXISTS catalog.terms (
+    db_name text NOT NULL,
+    id int8 NOT NULL,
+    val text NULL,
+    base int8 NOT NULL,
+    top_level boolean NOT NULL,
+    req_count int4 NOT NULL,
+    ref_id int8 NULL,
+    CONSTRAINT terms_pk PRIMARY KEY (db_name, id)
+);
+
+CREATE INDEX IF NOT EXISTS terms_top_level_idx
+    ON catalog.terms USING btree (db_name, id) WHERE top_level AND val <> '';
+
+-- Tenants whose catalog is complete
+CREATE TABLE IF NOT EXISTS catalog.tenants (
+    db_name text NOT NULL,
+    built_at timestamptz NOT NULL DEFAULT now(),
+    CONSTRAINT tenants_pk PRIMARY KEY (db_name)
+);
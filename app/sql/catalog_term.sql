@@ -0,0 +1,3 @@
+SELECT id, val, base
+FROM catalog.terms
+WHERE db_name = :db_name AND id = :term_id AND top_level AND val <> '';
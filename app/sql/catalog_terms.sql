@@ -0,0 +1,4 @@
+SELECT id, val, base
+FROM catalog.terms
+WHERE db_name = :db_name AND top_level AND val <> ''
+ORDER BY id;
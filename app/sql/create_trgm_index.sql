@@ -0,0 +1 @@
+CREATE INDEX CONCURRENTLY IF NOT EXISTS {db}_trgm_idx ON {db} USING gin (lower(val) gin_trgm_ops);
@@ -0,0 +1 @@
+DELETE FROM {db} WHERE id = ANY(CAST(:ids AS bigint[]));
\ No newline at end of file
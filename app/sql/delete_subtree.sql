@@ -0,0 +1,11 @@
+WITH RECURSIVE tree AS (
+    SELECT id FROM {db} WHERE up = :root_id AND id != up
+    UNION ALL
+    SELECT objs.id FROM {db} objs JOIN tree ON objs.up = tree.id WHERE objs.id != objs.up
+), deleted AS (
+    DELETE FROM {db} objs
+      USING (SELECT CAST(:root_id AS bigint) AS id UNION ALL SELECT id FROM tree) ids
+      WHERE objs.id = ids.id
+      RETURNING objs.id
+)
+SELECT count(*) FROM deleted;
@@ -0,0 +1,5 @@
+SELECT 1
+  FROM {db} vals
+  {joins}
+  WHERE vals.t=:term_id AND vals.up=:parent_id
+    {where_clauses}
@@ -0,0 +1,4 @@
+SELECT objs.id, objs.t, objs.up, objs.val
+  FROM {db} objs
+  JOIN unnest(CAST(:ts AS bigint[]), CAST(:ups AS bigint[]), CAST(:vals AS text[])) AS keys(t, up, val)
+    ON objs.t=keys.t AND objs.up=keys.up AND objs.val=keys.val;
\ No newline at end of file
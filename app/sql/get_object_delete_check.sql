@@ -0,0 +1,6 @@
+SELECT obj.up, par.up AS pup, count(refs.id) AS cnt
+  FROM {db} obj
+  JOIN {db} par ON par.id = obj.up
+  LEFT JOIN {db} refs ON refs.t = obj.id
+  WHERE obj.id = :id
+  GROUP BY 1, 2;
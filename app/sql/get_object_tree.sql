@@ -0,0 +1,10 @@
+WITH RECURSIVE tree(id, up, t, val, depth, path) AS (
+    SELECT id, up, t, val, 0, ARRAY[id] FROM {db} WHERE id = :object_id
+    UNION ALL
+    SELECT objs.id, objs.up, objs.t, objs.val, tree.depth + 1, tree.path || objs.id
+      FROM tree
+      JOIN {db} objs ON objs.up = tree.id AND objs.id != objs.up
+      JOIN {db} typs ON typs.id = objs.t AND typs.up = 0
+      WHERE tree.depth < :depth
+)
+SELECT id, up, t, val, depth FROM tree ORDER BY path;
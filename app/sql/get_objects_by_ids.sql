@@ -0,0 +1 @@
+SELECT id, t, up, val FROM {db} WHERE id = ANY(:ids);
\ No newline at end of file
@@ -0,0 +1,5 @@
+SELECT vals.id, vals.up, vals.t, vals.val
+  FROM {db} vals
+  WHERE vals.up = ANY(CAST(:obj_ids AS bigint[]))
+    AND (vals.t = ANY(CAST(:req_ids AS bigint[])) OR vals.val = ANY(CAST(:ref_req_ids AS text[])))
+  ORDER BY vals.id;
@@ -0,0 +1,4 @@
+SELECT reqs.up obj_id, reqs.val req_val, typs.id req_t, typs.val refr, '' arr_num
+  FROM {db} reqs JOIN {db} typs ON typs.id=reqs.t
+  WHERE reqs.up = ANY(:obj_ids)
+  ORDER BY reqs.up, reqs.id;
\ No newline at end of file
@@ -0,0 +1,6 @@
+SELECT reqs.up obj_id, CASE WHEN typs.up=0 THEN '' ELSE reqs.val END req_val
+, typs.id req_t, typs.val refr
+, sum(CASE WHEN typs.up=0 THEN 1 END) arr_num
+  FROM {db} reqs JOIN {db} typs ON typs.id=reqs.t and typs.id = ANY(:array_ids)
+  WHERE reqs.up = ANY(:obj_ids)
+  GROUP BY obj_id, req_val, req_t, refr;
\ No newline at end of file
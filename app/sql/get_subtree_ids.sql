@@ -0,0 +1,6 @@
+WITH RECURSIVE tree(id, depth) AS (
+    SELECT id, 1 FROM {db} WHERE up = :root_id AND id != up
+    UNION ALL
+    SELECT objs.id, tree.depth + 1 FROM {db} objs JOIN tree ON objs.up = tree.id WHERE objs.id != objs.up
+)
+SELECT id FROM tree ORDER BY depth DESC, id;
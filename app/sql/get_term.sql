@@ -4,7 +4,7 @@ WHERE obj.up = 0
   AND obj.id != obj.t
   AND obj.val != ''
   AND obj.t != 0
-  AND obj.id = {term_id}
+  AND obj.id = :term_id
   AND NOT EXISTS (
       SELECT 1
       FROM {db} oth
@@ -9,7 +9,9 @@ SELECT obj.id,
        reqs.val AS ord,
        reqs.t AS req_t,
        req_defs.val AS req_val,
+       req_defs.t AS req_base,
        ref_reqs.val AS ref_val,
+       ref_reqs.id AS req_ref_id,
        req_defaults.val AS default_val,
        ARRAY_AGG(DISTINCT CONCAT(mod_defs.val, ' ', mods.val))
            FILTER (WHERE mods.t != 0) AS mods,
@@ -29,10 +31,10 @@ LEFT JOIN ({db} mods CROSS JOIN {db} mod_defs)
   ON mods.up=reqs.id AND mod_defs.id=mods.t AND mod_defs.t = 0
 LEFT JOIN LATERAL (
     SELECT EXISTS (
-        SELECT 1 FROM rep subreqs
+        SELECT 1 FROM {db} subreqs
         WHERE subreqs.up = req_defs.id AND subreqs.t != 0
     ) AS is_table_req
 ) tblreq ON true
-WHERE obj.up = 0 AND obj.id != obj.t AND obj.id = {term_id} AND obj.t != 0
-GROUP BY obj.id, obj, base, ref_id, req_id, req_t, ref_base, req_defs.val, ref_reqs.val, default_val, tblreq.is_table_req
+WHERE obj.up = 0 AND obj.id != obj.t AND obj.id = :term_id AND obj.t != 0
+GROUP BY obj.id, obj, base, ref_id, req_id, req_t, ref_base, req_defs.val, req_defs.t, ref_reqs.val, ref_reqs.id, default_val, tblreq.is_table_req
 ORDER BY ord;
\ No newline at end of file
@@ -1,7 +1,9 @@
-SELECT row_number() OVER() ord, vals.id, vals.t, vals.val, vals.up 
+SELECT row_number() OVER() ord, vals.id, vals.t, vals.val, vals.up,
+       lower(left(vals.val, 127)) sort_key{sort_column}
   FROM {db} vals
   {joins}
-  WHERE vals.t={term_id} AND vals.up={parent_id}
+  {sort_join}
+  WHERE vals.t=:term_id AND vals.up=:parent_id
     {where_clauses}
-  ORDER BY vals.t, lower(left(vals.val, 127))
-  LIMIT {limit} OFFSET {offset};
\ No newline at end of file
+  ORDER BY {order_by}
+  LIMIT :limit OFFSET :offset;
\ No newline at end of file
@@ -0,0 +1,3 @@
+UPDATE {db} objs SET t = u.t, val = u.val
+  FROM unnest(CAST(:ids AS bigint[]), CAST(:ts AS bigint[]), CAST(:vals AS text[])) AS u(id, t, val)
+  WHERE objs.id = u.id;
@@ -0,0 +1,9 @@
+DROP TABLE IF EXISTS pivot.{pivot};
+CREATE TABLE pivot.{pivot} (
+    id int8 NOT NULL,
+    up int8 NOT NULL,
+    t int8 NOT NULL,
+    val text NULL{columns},
+    CONSTRAINT {pivot}_pk PRIMARY KEY (id)
+);
+CREATE INDEX {pivot}_upval_idx ON pivot.{pivot} USING btree (up, lower(left(val, 127)), id);
\ No newline at end of file
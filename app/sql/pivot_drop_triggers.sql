@@ -0,0 +1,3 @@
+DROP TRIGGER IF EXISTS {db}_pivot_ins ON {db};
+DROP TRIGGER IF EXISTS {db}_pivot_upd ON {db};
+DROP TRIGGER IF EXISTS {db}_pivot_del ON {db};
\ No newline at end of file
@@ -0,0 +1,90 @@
+CREATE SCHEMA IF NOT EXISTS pivot;
+
+CREATE TABLE IF NOT EXISTS pivot.terms (
+    db_name text NOT NULL,
+    term_id int8 NOT NULL,
+    pivot_table text NOT NULL,
+    columns jsonb NOT NULL,
+    upsert_sql text NOT NULL,
+    stale boolean NOT NULL DEFAULT false,
+    built_at timestamptz NOT NULL DEFAULT now(),
+    CONSTRAINT terms_pk PRIMARY KEY (db_name, term_id)
+);
+
+-- Re-reads the given objects of a term (all of them for NULL) into its pivot
+CREATE OR REPLACE FUNCTION pivot.refresh_rows(tbl text, term int8, ids int8[])
+RETURNS void
+LANGUAGE plpgsql AS
+$$
+DECLARE
+    pivot_tbl text;
+    upsert text;
+BEGIN
+    SELECT pivot_table, upsert_sql INTO pivot_tbl, upsert
+      FROM pivot.terms WHERE db_name = tbl AND term_id = term;
+    IF NOT FOUND THEN
+        RETURN;
+    END IF;
+
+    IF ids IS NOT NULL THEN
+        EXECUTE format(
+            'DELETE FROM pivot.%I p WHERE p.id = ANY($1) AND NOT EXISTS (
+                SELECT 1 FROM %I o WHERE o.id = p.id AND o.t = $2 AND o.up != 0
+            )', pivot_tbl, tbl
+        ) USING ids, term;
+    END IF;
+    EXECUTE upsert USING ids;
+END;
+$$;
+
+-- Statement trigger of a tenant table: refreshes the pivots of the changed
+-- objects, or marks a pivot stale when requisites of its term change
+CREATE OR REPLACE FUNCTION pivot.refresh_changed()
+RETURNS trigger
+LANGUAGE plpgsql AS
+$$
+DECLARE
+    changed int8[];
+    term int8;
+    requisites_changed boolean;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(DISTINCT x) INTO changed
+          FROM new_rows, LATERAL (VALUES (new_rows.id), (new_rows.up)) v(x);
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(DISTINCT x) INTO changed
+          FROM old_rows, LATERAL (VALUES (old_rows.id), (old_rows.up)) v(x);
+    ELSE
+        SELECT array_agg(DISTINCT x) INTO changed FROM (
+            SELECT x FROM new_rows, LATERAL (VALUES (new_rows.id), (new_rows.up)) v(x)
+            UNION
+            SELECT x FROM old_rows, LATERAL (VALUES (old_rows.id), (old_rows.up)) v(x)
+        ) c;
+    END IF;
+
+    IF changed IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    FOR term IN
+        SELECT term_id FROM pivot.terms WHERE db_name = TG_TABLE_NAME AND NOT stale
+    LOOP
+        -- The term row, one of its requisites, or a modifier/default of a requisite
+        requisites_changed := term = ANY(changed);
+        IF NOT requisites_changed THEN
+            EXECUTE format(
+                'SELECT EXISTS (SELECT 1 FROM %I WHERE id = ANY($1) AND up = $2)', TG_TABLE_NAME
+            ) INTO requisites_changed USING changed, term;
+        END IF;
+
+        IF requisites_changed THEN
+            UPDATE pivot.terms SET stale = true
+             WHERE db_name = TG_TABLE_NAME AND term_id = term;
+        ELSE
+            PERFORM pivot.refresh_rows(TG_TABLE_NAME, term, changed);
+        END IF;
+    END LOOP;
+
+    RETURN NULL;
+END;
+$$;
@@ -0,0 +1,9 @@
+CREATE OR REPLACE TRIGGER {db}_pivot_ins AFTER INSERT ON {db}
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION pivot.refresh_changed();
+CREATE OR REPLACE TRIGGER {db}_pivot_upd AFTER UPDATE ON {db}
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION pivot.refresh_changed();
+CREATE OR REPLACE TRIGGER {db}_pivot_del AFTER DELETE ON {db}
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION pivot.refresh_changed();
\ No newline at end of file
@@ -0,0 +1,11 @@
+INSERT INTO pivot.{pivot} AS p (id, up, t, val{columns})
+SELECT obj.id, obj.up, obj.t, obj.val{keys}
+  FROM (
+    SELECT vals.id, vals.up, vals.t, vals.val{values}
+      FROM {db} vals
+      LEFT JOIN {db} r ON r.up = vals.id AND r.t = ANY(CAST('{{{req_ids}}}' AS int8[]))
+     WHERE vals.t = {term_id} AND vals.up != 0
+       AND (CAST($1 AS int8[]) IS NULL OR vals.id = ANY($1))
+     GROUP BY vals.id
+  ) obj
+ON CONFLICT (id) DO UPDATE SET up = EXCLUDED.up, t = EXCLUDED.t, val = EXCLUDED.val{updates}
\ No newline at end of file
@@ -0,0 +1,2 @@
+INSERT INTO {db} (id, up, t, val)
+SELECT * FROM unnest(CAST(:ids AS bigint[]), CAST(:ups AS bigint[]), CAST(:ts AS bigint[]), CAST(:vals AS text[]));
\ No newline at end of file
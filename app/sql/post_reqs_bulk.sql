@@ -0,0 +1,2 @@
+INSERT INTO {db} (up, t, val)
+SELECT * FROM unnest(CAST(:ups AS bigint[]), CAST(:ts AS bigint[]), CAST(:vals AS text[]));
@@ -0,0 +1,8 @@
+SELECT {columns}
+  FROM {db} vals
+  {joins}
+  WHERE vals.t=:term_id
+    {where_clauses}
+  {group_by}
+  {order_by}
+  LIMIT :limit;
\ No newline at end of file
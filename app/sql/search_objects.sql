@@ -0,0 +1,9 @@
+SELECT objs.id, objs.up, objs.t, typs.val AS term, objs.val,
+       CASE WHEN lower(objs.val) = :q THEN 1.0
+            ELSE length(CAST(:q AS text))::float / greatest(length(objs.val), 1) END AS score
+  FROM {db} objs
+  JOIN {db} typs ON typs.id = objs.t AND typs.up = 0 AND typs.t != 0
+  JOIN {db} parents ON parents.id = objs.up AND parents.up != 0
+  WHERE lower(objs.val) LIKE :pattern
+  ORDER BY lower(objs.val) = :q DESC, lower(objs.val) LIKE :prefix DESC, score DESC, objs.id
+  LIMIT :limit;
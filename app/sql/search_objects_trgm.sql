@@ -0,0 +1,8 @@
+SELECT objs.id, objs.up, objs.t, typs.val AS term, objs.val,
+       similarity(lower(objs.val), :q) AS score
+  FROM {db} objs
+  JOIN {db} typs ON typs.id = objs.t AND typs.up = 0 AND typs.t != 0
+  JOIN {db} parents ON parents.id = objs.up AND parents.up != 0
+  WHERE lower(objs.val) LIKE :pattern
+  ORDER BY lower(objs.val) = :q DESC, lower(objs.val) LIKE :prefix DESC, score DESC, objs.id
+  LIMIT :limit;
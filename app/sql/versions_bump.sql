@@ -0,0 +1,4 @@
+INSERT INTO versions.counters (db_name, term_id, version)
+SELECT :db_name, terms.id, nextval('versions.seq')
+FROM (SELECT DISTINCT unnest(CAST(:term_ids AS int8[])) AS id ORDER BY 1) terms
+ON CONFLICT (db_name, term_id) DO UPDATE SET version = EXCLUDED.version;
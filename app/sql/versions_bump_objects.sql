@@ -0,0 +1,8 @@
+INSERT INTO versions.counters (db_name, term_id, version)
+SELECT :db_name, terms.id, nextval('versions.seq')
+FROM (
+    SELECT DISTINCT objs.t AS id FROM {db} objs
+    WHERE objs.id = ANY(CAST(:object_ids AS int8[])) AND objs.id != objs.t
+    ORDER BY 1
+) terms
+ON CONFLICT (db_name, term_id) DO UPDATE SET version = EXCLUDED.version;
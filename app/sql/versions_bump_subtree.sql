@@ -0,0 +1,14 @@
+WITH RECURSIVE tree AS (
+    SELECT id, t FROM {db} WHERE id = :root_id
+    UNION ALL
+    SELECT objs.id, objs.t FROM {db} objs JOIN tree ON objs.up = tree.id WHERE objs.id != objs.up
+)
+INSERT INTO versions.counters (db_name, term_id, version)
+SELECT :db_name, terms.id, nextval('versions.seq')
+FROM (
+    SELECT DISTINCT tree.t AS id FROM tree
+    JOIN {db} term ON term.id = tree.t AND term.up = 0
+    ORDER BY 1
+) terms
+ON CONFLICT (db_name, term_id) DO UPDATE SET version = EXCLUDED.version
+RETURNING term_id;
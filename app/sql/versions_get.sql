@@ -0,0 +1,2 @@
+SELECT term_id, version FROM versions.counters
+WHERE db_name = :db_name AND term_id = ANY(CAST(:term_ids AS int8[]));
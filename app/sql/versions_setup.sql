@@ -0,0 +1,15 @@
+SELECT pg_advisory_xact_lock(hashtext('versions.counters'));
+
+CREATE SCHEMA IF NOT EXISTS versions;
+
+-- Versions are drawn from one sequence, so a term deleted and created again
+-- never repeats a version it had before
+CREATE SEQUENCE IF NOT EXISTS versions.seq;
+
+-- term_id 0 is the version of the tenant's metadata
+CREATE TABLE IF NOT EXISTS versions.counters (
+    db_name text NOT NULL,
+    term_id int8 NOT NULL,
+    version int8 NOT NULL,
+    CONSTRAINT counters_pk PRIMARY KEY (db_name, term_id)
+);
@@ -0,0 +1,120 @@
+"""Microbenchmark: serialization of a 10k-row object listing and metadata list.
+
+Compares the previous approach (an ``ObjectRow`` per row inside a
+``TermObjectsResponse``, ``model_dump(exclude_none=True)`` and Starlette's
+``JSONResponse``; a ``TermRequisite``/``TermMetadata`` per metadata row) with
+the plain-dict payloads and ``FastJSONResponse`` of ``app.services.serialization``.
+
+Usage:
+    python -m benchmarks.bench_serialization [rows]
+"""
+
+import os
+import sys
+import timeit
+from types import SimpleNamespace
+
+for var, default in {
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_NAME": "integram",
+    "DB_USER": "bench",
+    "DB_PASSWORD": "bench",
+}.items():
+    os.environ.setdefault(var, default)
+
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from app.models.objects import HeaderField, ObjectRow, TermObjectsResponse  # noqa: E402
+from app.models.terms import TermMetadata, TermRequisite  # noqa: E402
+from app.services import serialization  # noqa: E402
+from app.services.metadata_cache import TermHeader  # noqa: E402
+from app.services.term_builder import build_terms_from_rows  # noqa: E402
+
+HEADER = [
+    HeaderField(id=100 + i, t=200 + i, name=f"Поле {i}", base=3, ref=None, is_table_req=False)
+    for i in range(8)
+]
+TERM = TermHeader(
+    id=114, name="Клиент", base=3, header=HEADER,
+    header_map={f.id: f for f in HEADER}, table_reqs={}, ordered_table_reqs={},
+)
+
+
+def make_page(rows: int):
+    object_rows = [SimpleNamespace(id=1000 + i, up=1, val=f"Клиент {i}") for i in range(rows)]
+    reqs_maps = {
+        obj.id: {f.name: f"значение {obj.id}-{f.id}" for f in HEADER} for obj in object_rows
+    }
+    return object_rows, reqs_maps
+
+
+def make_metadata_rows(rows: int):
+    return [
+        {
+            "id": 1000 + i // 8, "obj": f"Термин {i // 8}", "base": 3, "obj_mods": None,
+            "req_id": 5000 + i, "ord": str(i % 8 + 1), "req_t": 100 + i % 8,
+            "req_val": f"Поле {i % 8}", "ref_val": None, "default_val": None, "mods": None,
+        }
+        for i in range(rows)
+    ]
+
+
+def pydantic_listing(object_rows, reqs_maps):
+    objects = [
+        ObjectRow(id=int(obj.id), up=int(obj.up), val=str(obj.val), reqs=reqs_maps[obj.id])
+        for obj in object_rows
+    ]
+    return JSONResponse(
+        TermObjectsResponse(
+            t=TERM.id, name=TERM.name, base=TERM.base, header=TERM.header, objects=objects,
+        ).model_dump(exclude_none=True)
+    ).body
+
+
+def fast_listing(object_rows, reqs_maps):
+    return serialization.FastJSONResponse(
+        serialization.term_objects_payload(TERM, object_rows, reqs_maps)
+    ).body
+
+
+def pydantic_metadata(rows):
+    terms, reqs = {}, {}
+    for row in rows:
+        terms.setdefault(row["id"], {
+            "id": row["id"], "up": 0, "type": row["base"], "val": row["obj"],
+            "unique": 0, "mods": [],
+        })
+        reqs.setdefault(row["id"], []).append(TermRequisite(
+            num=row["ord"], id=str(row["req_id"]), val=row["req_val"],
+            type=str(row["req_t"]), ref=row["ref_val"],
+            default_val=row["default_val"], mods=row["mods"],
+        ).model_dump(exclude_none=True))
+    return JSONResponse([
+        TermMetadata(**{**term, "reqs": reqs[term_id]}).model_dump(exclude_none=True)
+        for term_id, term in terms.items()
+    ]).body
+
+
+def fast_metadata(rows):
+    return serialization.FastJSONResponse(build_terms_from_rows(rows)).body
+
+
+def main(rows: int = 10000) -> None:
+    encoder = "orjson" if serialization.orjson is not None else "json"
+    print(f"{rows} rows per page, fast path encoder: {encoder}")
+    page = make_page(rows)
+    metadata_rows = make_metadata_rows(rows)
+    cases = (
+        ("listing: pydantic", lambda: pydantic_listing(*page)),
+        ("listing: plain dicts", lambda: fast_listing(*page)),
+        ("metadata: pydantic", lambda: pydantic_metadata(metadata_rows)),
+        ("metadata: plain dicts", lambda: fast_metadata(metadata_rows)),
+    )
+    for label, func in cases:
+        best = min(timeit.repeat(func, number=5, repeat=5)) / 5
+        print(f"  {label:<22} {best * 1e3:8.2f} ms/page")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,57 @@
+"""Microbenchmark: per-request SQL template overhead of an object listing.
+
+Compares the previous approach (read the .sql file from disk, ``str.format``
+it and wrap it in ``text()`` on every call) with the preloaded template
+registry used by ``app.db.db.get_sql``.
+
+Usage:
+    python -m benchmarks.bench_sql_templates [iterations]
+"""
+
+import os
+import sys
+import timeit
+
+for var, default in {
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_NAME": "integram",
+    "DB_USER": "bench",
+    "DB_PASSWORD": "bench",
+}.items():
+    os.environ.setdefault(var, default)
+
+from sqlalchemy import text  # noqa: E402
+
+from app.db.db import get_sql  # noqa: E402
+from app.settings import settings  # noqa: E402
+
+# Templates rendered by GET /{db_name}/objects/{term_id}
+LISTING_TEMPLATES = [
+    ("get_term_metadata.sql", {"db": "rep"}),
+    ("get_term_objects.sql", {"db": "rep", "joins": "", "where_clauses": ""}),
+    ("get_objects_table_reqs.sql", {"db": "rep"}),
+    ("get_objects_reqs.sql", {"db": "rep"}),
+]
+
+
+def per_call_disk_read():
+    for name, replacements in LISTING_TEMPLATES:
+        content = (settings.SQL_DIR / name).read_text(encoding="utf-8")
+        text(content.format(**replacements))
+
+
+def registry():
+    for name, replacements in LISTING_TEMPLATES:
+        get_sql(name, **replacements)
+
+
+def main(iterations: int = 20000) -> None:
+    print(f"{iterations} simulated listing requests, {len(LISTING_TEMPLATES)} templates each")
+    for label, func in (("disk read + format", per_call_disk_read), ("registry", registry)):
+        best = min(timeit.repeat(func, number=iterations, repeat=5))
+        print(f"  {label:<20} {best / iterations * 1e6:8.2f} us/request")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
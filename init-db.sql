@@ -21,6 +21,13 @@ BEGIN
     EXECUTE format(
         'CREATE INDEX IF NOT EXISTS %I_tval_idx ON %I USING btree (t, lower(left(val, 127)));', dbname, dbname
     );
+
+    -- Триграммный индекс для поиска по подстроке, если установлено расширение pg_trgm
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') THEN
+        EXECUTE format(
+            'CREATE INDEX IF NOT EXISTS %I_trgm_idx ON %I USING gin (lower(val) gin_trgm_ops);', dbname, dbname
+        );
+    END IF;
     
     EXECUTE format(
         'SELECT setval(''%I_id_seq'', 110);', dbname
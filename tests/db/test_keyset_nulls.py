@@ -0,0 +1,76 @@
+"""Keyset pagination over objects without a value, against a real PostgreSQL.
+
+Pages are read with the cursor of the previous page and must add up to the
+full listing; the tests are skipped when the database is not reachable.
+"""
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.db.db import DATABASE_URL
+from app.models.objects import HeaderField
+from app.services.metadata_cache import TermHeader
+from app.services.object_by_term import _fetch_objects, _next_cursor
+from app.services.object_sort import parse_sort
+from app.services.pagination import decode_cursor
+
+TABLE = "keyset_nulls"
+TERM_ID, INN_ID = 10, 20
+
+HEADER = [HeaderField(id=INN_ID, t=13, name="ИНН", base=13, ref=None, is_table_req=False)]
+TERM = TermHeader(
+    id=TERM_ID, name="Клиент", base=3, header=HEADER, header_map={INN_ID: HEADER[0]},
+    table_reqs={}, ordered_table_reqs={},
+)
+
+SETUP = [
+    f"CREATE TEMP TABLE {TABLE} (id bigserial PRIMARY KEY, up bigint NOT NULL, t bigint NOT NULL, val text)",
+    # Every third object has no value, every fourth no ИНН
+    f"INSERT INTO {TABLE} (id, up, t, val) SELECT g, 1, {TERM_ID}, "
+    "CASE WHEN g % 3 = 0 THEN NULL ELSE 'client ' || (g % 5) END "
+    "FROM generate_series(100, 129) g",
+    f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), 129)",
+    f"INSERT INTO {TABLE} (up, t, val) SELECT g, {INN_ID}, (g % 7)::text "
+    "FROM generate_series(100, 129) g WHERE g % 4 <> 0",
+]
+
+
+@pytest_asyncio.fixture
+async def conn():
+    engine = create_async_engine(DATABASE_URL, poolclass=NullPool)
+    try:
+        connection = await engine.connect()
+    except Exception as e:
+        await engine.dispose()
+        pytest.skip(f"PostgreSQL is not available: {e}")
+    try:
+        for statement in SETUP:
+            await connection.execute(text(statement))
+        yield connection
+    finally:
+        await connection.close()
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sort_param", [None, "-Клиент", "f20", "-f20"])
+async def test_pages_cover_objects_without_value(conn, sort_param):
+    """Every object is listed exactly once, in order, whatever NULL the cursor stops at"""
+    sort = parse_sort(sort_param, TERM) if sort_param else None
+    everything = await _fetch_objects(conn, TABLE, TERM_ID, 1, limit=100, offset=0, sort=sort)
+    assert any(row.sort_key is None for row in everything)
+
+    paged, cursor = [], None
+    for _ in range(len(everything)):
+        rows = await _fetch_objects(
+            conn, TABLE, TERM_ID, 1, limit=4, offset=0, sort=sort,
+            cursor=decode_cursor(cursor, sort_param) if cursor else None,
+        )
+        paged.extend(rows)
+        cursor = _next_cursor(rows, 4, sort)
+        if cursor is None:
+            break
+
+    assert [row.id for row in paged] == [row.id for row in everything]
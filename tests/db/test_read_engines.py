@@ -0,0 +1,57 @@
+"""Tests for read-replica engine selection"""
+import pytest
+from unittest.mock import MagicMock
+from starlette.requests import Request
+
+from app.db import db
+from app.db.db import ReadEngines, get_read_engine
+
+
+def make_engine(checkedout=0):
+    engine = MagicMock()
+    engine.pool.checkedout.return_value = checkedout
+    return engine
+
+
+def make_request(headers=None):
+    raw = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "headers": raw})
+
+
+def test_without_replicas_reads_go_to_primary():
+    """The primary serves reads when no replica is configured"""
+    primary = make_engine()
+    engines = ReadEngines(primary, [], "round_robin")
+
+    assert engines.get() is primary
+
+
+def test_round_robin():
+    """Replicas are used in turn"""
+    replicas = [make_engine(), make_engine()]
+    engines = ReadEngines(make_engine(), replicas, "round_robin")
+
+    assert [engines.get() for _ in range(4)] == replicas * 2
+
+
+def test_least_connections():
+    """The replica with the fewest checked-out connections is picked"""
+    replicas = [make_engine(5), make_engine(1), make_engine(3)]
+    engines = ReadEngines(make_engine(), replicas, "least_connections")
+
+    assert engines.get() is replicas[1]
+
+
+def test_unknown_strategy():
+    with pytest.raises(ValueError):
+        ReadEngines(make_engine(), [], "random")
+
+
+def test_read_your_writes_header_selects_primary(monkeypatch):
+    """The override header sends the request to the primary"""
+    replica = make_engine()
+    monkeypatch.setattr(db, "read_engines", ReadEngines(db.engine, [replica], "round_robin"))
+
+    assert get_read_engine(make_request()) is replica
+    assert get_read_engine(make_request({"X-Read-Your-Writes": "1"})) is db.engine
+    assert get_read_engine(make_request({"X-Read-Your-Writes": "0"})) is replica
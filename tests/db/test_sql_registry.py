@@ -0,0 +1,42 @@
+"""Tests for the SQL template registry"""
+import pytest
+
+from app.db.sql_registry import SqlRegistry
+
+
+@pytest.fixture
+def registry(tmp_path):
+    (tmp_path / "get_rows.sql").write_text(
+        "SELECT id FROM {db} WHERE t = :term_id {where_clauses}", encoding="utf-8"
+    )
+    return SqlRegistry(tmp_path, maxsize=2)
+
+
+def test_templates_are_parsed_once(registry):
+    """Placeholders are only structural; values stay bind parameters"""
+    template = registry.template("get_rows.sql")
+
+    assert template.fields == {"db", "where_clauses"}
+
+
+def test_clause_is_reused(registry):
+    """The same replacements return the same clause object"""
+    first = registry.text("get_rows.sql", db="rep", where_clauses="")
+
+    assert registry.text("get_rows.sql", db="rep", where_clauses="") is first
+    assert registry.text("get_rows.sql", db="dup", where_clauses="") is not first
+    assert "term_id" in first._bindparams
+
+
+def test_clause_cache_is_bounded(registry):
+    """The least recently used clause is evicted"""
+    first = registry.text("get_rows.sql", db="a", where_clauses="")
+    registry.text("get_rows.sql", db="b", where_clauses="")
+    registry.text("get_rows.sql", db="c", where_clauses="")
+
+    assert registry.text("get_rows.sql", db="a", where_clauses="") is not first
+
+
+def test_unknown_template(registry):
+    with pytest.raises(FileNotFoundError):
+        registry.text("missing.sql", db="rep")
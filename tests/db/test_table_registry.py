@@ -0,0 +1,63 @@
+"""Tests for the cached tenant-table registry"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.db import db
+from app.db.db import TableRegistry
+
+
+def setup_engine_mock(monkeypatch, tables, trigram=()):
+    """Mocks the engine so the catalog contains the given tables."""
+    conn = AsyncMock()
+
+    async def execute(query, params=None):
+        result = MagicMock()
+        if params:
+            result.scalar.return_value = 1 if params["table"] in tables else None
+        else:
+            result.fetchall.return_value = [(name, name in trigram) for name in tables]
+        return result
+
+    conn.__aenter__.return_value.execute.side_effect = execute
+    engine = MagicMock()
+    engine.connect.return_value = conn
+    monkeypatch.setattr(db, "engine", engine)
+    return conn.__aenter__.return_value
+
+
+@pytest.mark.asyncio
+async def test_known_table_needs_no_query(monkeypatch):
+    """Once loaded, known tables are validated from memory"""
+    conn = setup_engine_mock(monkeypatch, {"rep"})
+    registry = TableRegistry(ttl=0)
+
+    assert await registry.exists("rep")
+    assert await registry.exists("rep")
+    assert conn.execute.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_new_table_is_confirmed_on_miss(monkeypatch):
+    """A table created after the load is found and remembered"""
+    tables = {"rep"}
+    conn = setup_engine_mock(monkeypatch, tables)
+    registry = TableRegistry(ttl=0)
+    await registry.refresh()
+
+    tables.add("dup")
+
+    assert await registry.exists("dup")
+    assert await registry.exists("dup")
+    assert not await registry.exists("missing")
+    assert conn.execute.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_trigram_index_is_loaded_with_tables(monkeypatch):
+    """Tables with the pg_trgm index are known after a refresh"""
+    setup_engine_mock(monkeypatch, {"rep", "dup"}, trigram={"rep"})
+    registry = TableRegistry(ttl=0)
+    await registry.refresh()
+
+    assert registry.has_trigram("rep")
+    assert not registry.has_trigram("dup")
@@ -0,0 +1,90 @@
+"""The term catalog against a real PostgreSQL.
+
+Everything runs in one transaction on a temporary tenant table and is rolled
+back; the tests are skipped when the database is not reachable.
+"""
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.db.db import DATABASE_URL, get_sql
+from app.services.term_catalog import build_catalog, refresh_terms, requisite_types
+
+TABLE = "catalog_check"
+
+# 10 uses 11 and the reference 13 (to 12) as requisite types; 14 has a modifier only
+SETUP = [
+    f"CREATE TEMP TABLE {TABLE} (id bigserial PRIMARY KEY, up bigint NOT NULL, t bigint NOT NULL, val text)",
+    f"CREATE INDEX ON {TABLE} (up, t)",
+    f"CREATE INDEX ON {TABLE} (t, lower(left(val, 127)))",
+    f"INSERT INTO {TABLE} (id, up, t, val) VALUES (3, 0, 3, 'CHARS'), (30, 0, 0, 'NOT NULL'), "
+    "(10, 0, 3, 'Клиент'), (11, 0, 3, 'ИНН'), (12, 0, 3, 'Роль'), (13, 0, 12, ''), "
+    "(14, 0, 3, 'Заметка'), (20, 10, 11, '1'), (21, 10, 13, '2'), (22, 14, 30, '')",
+    f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), 100)",
+]
+
+
+@pytest_asyncio.fixture
+async def conn():
+    engine = create_async_engine(DATABASE_URL, poolclass=NullPool)
+    try:
+        connection = await engine.connect()
+    except Exception as e:
+        await engine.dispose()
+        pytest.skip(f"PostgreSQL is not available: {e}")
+    transaction = await connection.begin()
+    try:
+        for statement in SETUP:
+            await connection.execute(text(statement))
+        yield connection
+    finally:
+        await transaction.rollback()
+        await connection.close()
+        await engine.dispose()
+
+
+async def catalog_terms(conn):
+    rows = await conn.execute(get_sql("catalog_terms.sql"), {"db_name": TABLE})
+    return [tuple(row) for row in rows.fetchall()]
+
+
+async def eav_terms(conn):
+    rows = await conn.execute(get_sql("get_terms.sql", db=TABLE))
+    return sorted(tuple(row) for row in rows.fetchall())
+
+
+@pytest.mark.asyncio
+async def test_catalog_lists_the_same_terms(conn):
+    """The catalog selects the top-level terms of get_terms.sql"""
+    await build_catalog(conn, TABLE)
+
+    assert await catalog_terms(conn) == await eav_terms(conn)
+    assert [row[0] for row in await catalog_terms(conn)] == [10, 12, 14]
+
+    row = (
+        await conn.execute(
+            text("SELECT req_count, ref_id FROM catalog.terms WHERE db_name = :db AND id = 13"),
+            {"db": TABLE},
+        )
+    ).one()
+    assert tuple(row) == (0, 12)
+
+
+@pytest.mark.asyncio
+async def test_refresh_follows_requisite_changes(conn):
+    """Refreshing the rows of a write keeps the catalog equal to the EAV query"""
+    await build_catalog(conn, TABLE)
+
+    # 14 gets 12 as a requisite: 12 is no longer top-level
+    await conn.execute(text(f"INSERT INTO {TABLE} (up, t, val) VALUES (14, 12, '1')"))
+    await refresh_terms(conn, TABLE, [14, 12])
+    assert await catalog_terms(conn) == await eav_terms(conn)
+
+    # Deleting 10 makes its requisite types top-level again
+    types = await requisite_types(conn, TABLE, 10)
+    await conn.execute(text(f"DELETE FROM {TABLE} WHERE id = 10 OR up = 10"))
+    await refresh_terms(conn, TABLE, [10, *types])
+    assert await catalog_terms(conn) == await eav_terms(conn)
+    assert [row[0] for row in await catalog_terms(conn)] == [11, 14]
@@ -0,0 +1,130 @@
+"""Term pivots against a real PostgreSQL.
+
+Everything runs in one transaction on a temporary tenant table and is rolled
+back; the tests are skipped when the database is not reachable.
+"""
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.db.db import DATABASE_URL
+from app.models.objects import HeaderField
+from app.services.filter_builder import FilterBuilder
+from app.services.metadata_cache import TermHeader
+from app.services.object_by_term import _objects_query
+from app.services.object_sort import parse_sort
+from app.services.term_pivot import build_pivot
+
+TABLE = "pivot_check"
+TERM_ID, INN_ID, CITY_ID, DATE_ID = 10, 20, 21, 22
+OBJECTS = 200
+
+HEADER = [
+    HeaderField(id=INN_ID, t=13, name="ИНН", base=3, is_table_req=False),
+    HeaderField(id=CITY_ID, t=3, name="Город", base=3, is_table_req=False),
+    HeaderField(id=DATE_ID, t=9, name="Дата", base=3, is_table_req=False),
+]
+TERM = TermHeader(
+    id=TERM_ID,
+    name="Клиент",
+    base=3,
+    header=HEADER,
+    header_map={field.id: field for field in HEADER},
+    table_reqs={},
+    ordered_table_reqs={},
+    req_bases={INN_ID: 13, CITY_ID: 3, DATE_ID: 9},
+)
+
+SETUP = [
+    f"CREATE TEMP TABLE {TABLE} (id bigserial PRIMARY KEY, up bigint NOT NULL, t bigint NOT NULL, val text)",
+    f"CREATE INDEX ON {TABLE} (up, t)",
+    f"INSERT INTO {TABLE} (id, up, t, val) VALUES ({TERM_ID}, 0, 3, 'Клиент'), "
+    f"({INN_ID}, {TERM_ID}, 13, ''), ({CITY_ID}, {TERM_ID}, 3, ''), ({DATE_ID}, {TERM_ID}, 9, '')",
+    f"INSERT INTO {TABLE} (id, up, t, val) SELECT g, 1, {TERM_ID}, 'client ' || g "
+    f"FROM generate_series(100, {OBJECTS + 99}) g",
+    f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), {OBJECTS + 99})",
+    f"INSERT INTO {TABLE} (up, t, val) SELECT g, {INN_ID}, (g % 13)::text "
+    f"FROM generate_series(100, {OBJECTS + 99}) g",
+    f"INSERT INTO {TABLE} (up, t, val) SELECT g, {CITY_ID}, 'city ' || (g % 7) "
+    f"FROM generate_series(100, {OBJECTS + 99}, 2) g",
+    f"INSERT INTO {TABLE} (up, t, val) SELECT g, {DATE_ID}, "
+    f"lpad((g % 28 + 1)::text, 2, '0') || '.0' || (g % 9 + 1) || '.2024' "
+    f"FROM generate_series(100, {OBJECTS + 99}) g",
+]
+
+
+@pytest_asyncio.fixture
+async def conn():
+    engine = create_async_engine(DATABASE_URL, poolclass=NullPool)
+    try:
+        connection = await engine.connect()
+    except Exception as e:
+        await engine.dispose()
+        pytest.skip(f"PostgreSQL is not available: {e}")
+    transaction = await connection.begin()
+    try:
+        for statement in SETUP:
+            await connection.execute(text(statement))
+        yield connection
+    finally:
+        await transaction.rollback()
+        await connection.close()
+        await engine.dispose()
+
+
+async def page_ids(conn, filters, sort, pivot=None):
+    _, where_clause, params = FilterBuilder(
+        filters, term_id=TERM_ID, term_name="Клиент", header=HEADER, db_name=TABLE,
+        pivot_columns=pivot.columns if pivot else None,
+    ).build()
+    spec = parse_sort(sort, TERM)
+    sql, sql_params = _objects_query(
+        TABLE, TERM_ID, 1, where_clause=where_clause, sql_params=params, limit=50,
+        sort=pivot.cover_sort(spec) if pivot else spec,
+        source=pivot.table if pivot else None,
+    )
+    return [row.id for row in (await conn.execute(sql, sql_params)).fetchall()]
+
+
+@pytest.mark.asyncio
+async def test_pivot_listing_matches_eav(conn):
+    """Filters and typed sorts over the pivot return the pages of the EAV query"""
+    pivot = await build_pivot(conn, TABLE, TERM)
+
+    for filters, sort in [
+        ({"ИНН": "5"}, "-Дата"),
+        ({"Город": "city%"}, "f20"),
+        ({"$or": [{"f20": "1"}, {"f21": "city 3"}]}, "-f21"),
+    ]:
+        expected = await page_ids(conn, filters, sort)
+        assert expected
+        assert await page_ids(conn, filters, sort, pivot) == expected
+
+
+@pytest.mark.asyncio
+async def test_triggers_keep_pivot_current(conn):
+    """Writes of any path update the pivot; a requisite change marks it stale"""
+    pivot = await build_pivot(conn, TABLE, TERM)
+
+    obj_id = (await conn.execute(text(
+        f"INSERT INTO {TABLE} (up, t, val) VALUES (1, {TERM_ID}, 'new') RETURNING id"
+    ))).scalar()
+    await conn.execute(text(
+        f"INSERT INTO {TABLE} (up, t, val) VALUES (:id, {INN_ID}, ' 12,5'), (:id, {DATE_ID}, '2024-03-01')"
+    ), {"id": obj_id})
+    row = (await conn.execute(text(
+        f"SELECT r{INN_ID}, k{INN_ID}, k{DATE_ID} FROM {pivot.table} WHERE id = :id"
+    ), {"id": obj_id})).one()
+    assert (row[0], float(row[1]), int(row[2])) == (" 12,5", 12.5, 20240301)
+
+    await conn.execute(text(f"DELETE FROM {TABLE} WHERE id = :id"), {"id": obj_id})
+    assert (await conn.execute(text(
+        f"SELECT count(*) FROM {pivot.table} WHERE id = :id"
+    ), {"id": obj_id})).scalar() == 0
+
+    await conn.execute(text(f"INSERT INTO {TABLE} (up, t, val) VALUES ({TERM_ID}, 12, '')"))
+    assert (await conn.execute(text(
+        "SELECT stale FROM pivot.terms WHERE db_name = :db AND term_id = :term"
+    ), {"db": TABLE, "term": TERM_ID})).scalar() is True
@@ -0,0 +1,57 @@
+"""Tests for compiling object filters into SQL"""
+import pytest
+
+from app.models.objects import HeaderField
+from app.services.filter_builder import FilterBuilder
+
+HEADER = [HeaderField(id=120, t=116, name="ИНН", base=3, ref=None, is_table_req=False)]
+
+
+def build(filters):
+    return FilterBuilder(
+        filters, term_id=114, term_name="Клиент", header=HEADER, db_name="rep"
+    ).build()
+
+
+def test_requisite_filter_is_exists_semi_join():
+    """Requisite filters add no joins and bind both the type and the value"""
+    joins, where, params = build({"ИНН": "10%", "up": "1", "limit": "20"})
+
+    assert joins == ""
+    assert where == (
+        "AND EXISTS (SELECT 1 FROM rep f120 WHERE f120.up = vals.id "
+        "AND f120.t = :filter_0_t AND lower(f120.val) LIKE :filter_0)"
+    )
+    assert params == {"filter_0_t": 120, "filter_0": "10%"}
+
+
+def test_nested_groups():
+    """$or/$not groups nest and the same field may appear several times"""
+    _, where, params = build(
+        {"f114": "client%", "$or": [{"f120": "1001"}, {"$not": {"f120": "1002"}}]}
+    )
+
+    assert where.startswith("AND (lower(vals.val) LIKE :filter_0 AND (EXISTS (")
+    assert " OR NOT (EXISTS (" in where
+    assert params == {
+        "filter_0": "client%",
+        "filter_1_t": 120, "filter_1": "1001",
+        "filter_2_t": 120, "filter_2": "1002",
+    }
+
+
+def test_invalid_group_is_rejected():
+    """A group must contain filter objects"""
+    with pytest.raises(ValueError):
+        build({"$or": "1001"})
+
+
+def test_pivot_columns_are_compared_directly():
+    """Requisites stored in the term pivot need no semi-join"""
+    _, where, params = FilterBuilder(
+        {"ИНН": "10%"}, term_id=114, term_name="Клиент", header=HEADER, db_name="rep",
+        pivot_columns={120},
+    ).build()
+
+    assert where == "AND lower(vals.r120) LIKE :filter_0"
+    assert params == {"filter_0": "10%"}
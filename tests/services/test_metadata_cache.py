@@ -0,0 +1,61 @@
+"""Tests for the term metadata cache"""
+import pytest
+
+from app.services.metadata_cache import MetadataCache, TermHeader
+
+
+def make_term(term_id):
+    return TermHeader(
+        id=term_id, name=f"term {term_id}", base=3, header=[], header_map={},
+        table_reqs={}, ordered_table_reqs={},
+    )
+
+
+def test_hit_and_miss_counters():
+    """Lookups update hit/miss counters"""
+    cache = MetadataCache(maxsize=4, ttl=0)
+
+    assert cache.get("rep", 1) is None
+    cache.set("rep", 1, make_term(1))
+    assert cache.get("rep", 1).name == "term 1"
+
+    assert cache.stats() == {"size": 1, "maxsize": 4, "hits": 1, "misses": 1}
+
+
+def test_least_recently_used_entry_is_evicted():
+    """The least recently used entry is dropped when the cache is full"""
+    cache = MetadataCache(maxsize=2, ttl=0)
+    cache.set("rep", 1, make_term(1))
+    cache.set("rep", 2, make_term(2))
+    cache.get("rep", 1)
+    cache.set("rep", 3, make_term(3))
+
+    assert cache.get("rep", 2) is None
+    assert cache.get("rep", 1) is not None
+    assert cache.get("rep", 3) is not None
+
+
+def test_invalidate_tenant():
+    """Invalidating a tenant keeps entries of other tenants"""
+    cache = MetadataCache(maxsize=4, ttl=0)
+    cache.set("rep", 1, make_term(1))
+    cache.set("rep", 2, make_term(2))
+    cache.set("dup", 1, make_term(1))
+
+    cache.invalidate("rep")
+
+    assert cache.get("rep", 1) is None
+    assert cache.get("rep", 2) is None
+    assert cache.get("dup", 1) is not None
+
+
+def test_expired_entry_is_a_miss(monkeypatch):
+    """Entries older than the TTL are not served"""
+    now = [100.0]
+    monkeypatch.setattr("app.services.metadata_cache.time.monotonic", lambda: now[0])
+    cache = MetadataCache(maxsize=4, ttl=10)
+    cache.set("rep", 1, make_term(1))
+
+    now[0] += 11
+
+    assert cache.get("rep", 1) is None
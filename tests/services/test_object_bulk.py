@@ -0,0 +1,164 @@
+"""Tests for set-based bulk object creation"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.models.objects import BulkObjectPatchItem, HeaderField, ObjectCreateRequest
+from app.services import object_bulk
+from app.services.metadata_cache import TermHeader
+
+
+CLIENT = TermHeader(
+    id=114, name="Клиент", base=3, header=[],
+    header_map={
+        120: HeaderField(id=120, t=116, name="ИНН", base=3, ref=None),
+        122: HeaderField(id=122, t=119, name=None, base=3, ref=None, original_name="Роль"),
+    },
+    table_reqs={}, ordered_table_reqs={}, unique=True, req_refs={122: 71},
+)
+
+
+def setup_conn_mock(*results):
+    """Creates a mocked connection returning the given results in order."""
+    conn = AsyncMock()
+    side_effect = []
+    for rows in results:
+        result = MagicMock()
+        result.fetchall.return_value = rows
+        result.scalars.return_value.all.return_value = rows
+        side_effect.append(result)
+    conn.execute.side_effect = side_effect
+    return conn
+
+
+@pytest.fixture
+def terms(monkeypatch):
+    async def get_term_header(conn, db_name, term_id):
+        return CLIENT if term_id == 114 else None
+
+    monkeypatch.setattr(object_bulk, "_get_term_header", get_term_header)
+
+
+@pytest.mark.asyncio
+async def test_insert_objects_single_insert(terms):
+    """Objects and requisites of all valid items go into one INSERT"""
+    conn = setup_conn_mock(
+        [(127, 71, 1, "admin")],          # referenced objects
+        [],                               # existing unique values
+        [301, 302, 303, 304],             # allocated IDs
+        [],                               # insert
+    )
+    items = [
+        ObjectCreateRequest(id=114, up=1, attrs={"t114": "A", "t120": 5001, "t122": 127}),
+        ObjectCreateRequest(id=114, up=1, attrs={"t114": "B"}),
+    ]
+
+    results = await object_bulk.insert_objects(conn, "rep", items)
+
+    assert [(r.id, r.status) for r in results] == [(301, 200), (304, 200)]
+    assert conn.execute.await_count == 4
+    rows = conn.execute.await_args_list[-1].args[1]
+    assert rows == {
+        "ids": [301, 302, 303, 304],
+        "ups": [1, 301, 301, 1],
+        "ts": [114, 120, 127, 114],
+        "vals": ["A", "5001", "122", "B"],
+    }
+
+
+@pytest.mark.asyncio
+async def test_insert_objects_reports_invalid_items(terms):
+    """Invalid items get their error and are not inserted"""
+    conn = setup_conn_mock(
+        [(128, 72, 1, "guest")],          # referenced object of a wrong term
+        [(129, 114, 1, "Client 01")],     # existing unique value
+        [305],                            # allocated IDs
+        [],                               # insert
+    )
+    items = [
+        ObjectCreateRequest(id=114, up=1, attrs={"t114": "C", "t122": 128}),
+        ObjectCreateRequest(id=114, up=1, attrs={"t114": "Client 01"}),
+        ObjectCreateRequest(id=114, up=1, attrs={"t114": "D"}),
+        ObjectCreateRequest(id=114, up=1, attrs={"t114": "D"}),
+        ObjectCreateRequest(id=999, up=1, attrs={"t999": "E"}),
+    ]
+
+    results = await object_bulk.insert_objects(conn, "rep", items)
+
+    assert [(r.id, r.status) for r in results] == [
+        (None, 400), (129, 409), (305, 200), (None, 409), (None, 400),
+    ]
+    assert results[0].error == "Invalid reference"
+
+
+@pytest.mark.asyncio
+async def test_patch_objects_batches_changes(terms):
+    """Changes of all objects are grouped into one UPDATE, INSERT and DELETE"""
+    conn = setup_conn_mock(
+        [                                 # patched and referenced objects
+            (201, 114, 1, "A"), (202, 114, 1, "B"),
+            (127, 71, 1, "admin"), (128, 71, 1, "user"),
+        ],
+        [],                               # existing unique values
+        [                                 # current requisite rows
+            (211, 201, 120, "5001"), (212, 201, 127, "122"), (221, 202, 120, "5002"),
+        ],
+        [], [], [],                       # update, insert, delete
+    )
+    items = [
+        BulkObjectPatchItem(id=201, t114="A2", t120="5001", t122=128),
+        BulkObjectPatchItem(id=202, t114="B", t120="", t122=127),
+    ]
+
+    results = await object_bulk.patch_objects(conn, "rep", items)
+
+    assert [(r.id, r.val, r.status) for r in results] == [(201, "A2", 200), (202, "B", 200)]
+    update, insert, delete = (call.args[1] for call in conn.execute.await_args_list[3:])
+    assert update == {"ids": [201, 212], "ts": [114, 128], "vals": ["A2", "122"]}
+    assert insert == {"ups": [202], "ts": [127], "vals": ["122"]}
+    assert delete == {"ids": [221]}
+
+
+@pytest.mark.asyncio
+async def test_patch_objects_reports_invalid_items(terms):
+    """Invalid objects get their error and nothing is written"""
+    conn = setup_conn_mock(
+        [(201, 114, 1, "A"), (202, 114, 1, "B"), (114, 3, 0, "Клиент")],
+        [(203, 114, 1, "C")],             # existing unique value
+    )
+    items = [
+        BulkObjectPatchItem(id=201, t114="C"),
+        BulkObjectPatchItem(id=202, t114="B", t122=999),
+        BulkObjectPatchItem(id=202, t120="5002"),
+        BulkObjectPatchItem(id=114, t3="Client"),
+        BulkObjectPatchItem(id=404, t114="D"),
+    ]
+
+    results = await object_bulk.patch_objects(conn, "rep", items)
+
+    assert [r.status for r in results] == [409, 400, 422, 400, 404]
+    assert results[1].error == "Invalid reference"
+    assert conn.execute.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_patch_objects_rejects_repeated_objects(terms):
+    """Only the first valid item of an object is applied, later ones get a conflict"""
+    conn = setup_conn_mock(
+        [(201, 114, 1, "A")],             # patched objects
+        [],                               # existing unique values
+        [],                               # current requisite rows
+        [], [],                           # update, insert
+    )
+    items = [
+        BulkObjectPatchItem(id=201, t120="5001"),
+        BulkObjectPatchItem(id=201, t114="A2", t120="5001"),
+        BulkObjectPatchItem(id=201, t114="A3", t120="5003"),
+    ]
+
+    results = await object_bulk.patch_objects(conn, "rep", items)
+
+    assert [r.status for r in results] == [422, 200, 409]
+    assert results[2].error == "Object is already changed by an earlier item of the request"
+    update, insert = (call.args[1] for call in conn.execute.await_args_list[3:])
+    assert update == {"ids": [201], "ts": [114], "vals": ["A2"]}
+    assert insert == {"ups": [201], "ts": [120], "vals": ["5001"]}
@@ -0,0 +1,52 @@
+"""Tests for batched requisite loading of term object listings"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.models.objects import HeaderField
+from app.services.object_by_term import _build_reqs_maps
+
+
+HEADER_MAP = {
+    120: HeaderField(id=120, t=116, name="ИНН", base=3, ref=None),
+    122: HeaderField(id=122, t=119, name=None, base=3, ref=None, original_name="Роль"),
+}
+
+
+def setup_conn_mock(*results):
+    """Creates a mocked connection returning the given row lists in order."""
+    conn = AsyncMock()
+    side_effect = []
+    for rows in results:
+        result = MagicMock()
+        result.fetchall.return_value = rows
+        side_effect.append(result)
+    conn.execute.side_effect = side_effect
+    return conn
+
+
+@pytest.mark.asyncio
+async def test_build_reqs_maps_single_query_per_page():
+    """All objects of a page are resolved with one requisites query"""
+    conn = setup_conn_mock([
+        (201, "1001", 120, "ИНН", ""),
+        (201, "122", 127, "admin", ""),
+        (202, "1002", 120, "ИНН", ""),
+    ])
+
+    reqs = await _build_reqs_maps(conn, "rep", [201, 202, 203], HEADER_MAP, {})
+
+    assert conn.execute.await_count == 1
+    assert reqs == {
+        201: {"ИНН": "1001", "Роль": "admin"},
+        202: {"ИНН": "1002"},
+        203: {},
+    }
+
+
+@pytest.mark.asyncio
+async def test_build_reqs_maps_empty_page():
+    """An empty page does not touch the database"""
+    conn = setup_conn_mock()
+
+    assert await _build_reqs_maps(conn, "rep", [], HEADER_MAP, {}) == {}
+    conn.execute.assert_not_awaited()
@@ -0,0 +1,82 @@
+"""Tests for listing totals"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from sqlalchemy.exc import DBAPIError
+
+from app.services import object_count
+from app.services.object_count import count_objects, filter_hash
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    object_count.count_cache.clear()
+    yield
+    object_count.count_cache.clear()
+
+
+def setup_conn_mock():
+    conn = AsyncMock()
+    conn.begin_nested.return_value = AsyncMock()
+    return conn
+
+
+def query_canceled():
+    orig = Exception("canceling statement due to statement timeout")
+    orig.sqlstate = "57014"
+    return DBAPIError("SELECT count(*)", {}, orig)
+
+
+@pytest.mark.asyncio
+async def test_exact_count_is_cached_per_filter(monkeypatch):
+    """The same listing is counted once within the TTL, other filters are counted again"""
+    exact = AsyncMock(return_value=30)
+    monkeypatch.setattr(object_count, "_exact_count", exact)
+    conn = setup_conn_mock()
+
+    assert await count_objects(conn, "rep", 114, 1, "exact") == 30
+    assert await count_objects(conn, "rep", 114, 1, "exact") == 30
+    assert await count_objects(
+        conn, "rep", 114, 1, "exact", "", "AND x = :filter_0", {"filter_0": "a"}
+    ) == 30
+    assert exact.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_exact_count_timeout_falls_back_to_estimate(monkeypatch):
+    """A count cancelled by statement_timeout returns the planner estimate"""
+    monkeypatch.setattr(object_count, "_exact_count", AsyncMock(side_effect=query_canceled()))
+    monkeypatch.setattr(object_count, "_estimated_count", AsyncMock(return_value=1200000))
+
+    assert await count_objects(setup_conn_mock(), "rep", 114, 1, "exact") == 1200000
+
+
+@pytest.mark.asyncio
+async def test_none_mode_does_not_query():
+    """count=none never touches the database"""
+    conn = setup_conn_mock()
+
+    assert await count_objects(conn, "rep", 114, 1, "none") is None
+    conn.execute.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_exact_count_runs_in_rolled_back_savepoint():
+    """The statement timeout of the count does not outlive it on the page's connection"""
+    conn = setup_conn_mock()
+    conn.execute.side_effect = [MagicMock(), MagicMock(scalar_one=MagicMock(return_value=7))]
+
+    assert await object_count._exact_count(conn, "SELECT count(*)", {}) == 7
+    conn.begin_nested.return_value.rollback.assert_awaited_once()
+
+    conn.execute.side_effect = [MagicMock(), query_canceled()]
+    with pytest.raises(DBAPIError):
+        await object_count._exact_count(conn, "SELECT count(*)", {})
+    assert conn.begin_nested.return_value.rollback.await_count == 2
+
+
+def test_filter_hash_depends_on_values():
+    """Filters differing only in bound values get different keys"""
+    where = "AND lower(vals.val) LIKE :filter_0"
+    assert filter_hash("", where, {"filter_0": "a%"}) != filter_hash("", where, {"filter_0": "b%"})
+    assert filter_hash("", where, {"filter_0": "a%"}) == filter_hash("", where, {"filter_0": "a%"})
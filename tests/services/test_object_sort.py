@@ -0,0 +1,111 @@
+"""Tests for ordering object listings by requisites"""
+import pytest
+from fastapi import HTTPException
+
+from app.models.objects import HeaderField
+from app.services.metadata_cache import TermHeader
+from app.services.object_sort import DEFAULT_SORT, parse_sort
+
+HEADER = [
+    HeaderField(id=120, t=116, name="ИНН", base=3, is_table_req=False),
+    HeaderField(id=121, t=117, name="Дата рег", base=3, is_table_req=False),
+    HeaderField(id=122, t=119, name="Менеджер", base=3, is_table_req=False),
+    HeaderField(id=124, t=118, name="Контакт", base=3, is_table_req=True),
+    HeaderField(id=126, t=81, name="Примечание", base=3, is_table_req=False),
+]
+
+TERM = TermHeader(
+    id=114,
+    name="Клиент",
+    base=3,
+    header=HEADER,
+    header_map={field.id: field for field in HEADER},
+    table_reqs={118: HEADER[3]},
+    ordered_table_reqs={},
+    req_refs={122: 71},
+    req_bases={120: 13, 121: 9, 122: 71, 124: 3, 126: 12},
+)
+
+
+@pytest.mark.parametrize(
+    "sort, req_id, descending, kind, reference",
+    [
+        ("f120", 120, False, "numeric", False),
+        ("-Дата рег", 121, True, "date", False),
+        ("примечание", 126, False, "text", False),
+        ("-f122", 122, True, "text", True),
+        ("-Клиент", None, True, "text", False),
+        ("f114", None, False, "text", False),
+    ],
+)
+def test_sort_is_resolved_through_header(sort, req_id, descending, kind, reference):
+    """IDs and names resolve to the requisite and its typed ordering"""
+    spec = parse_sort(sort, TERM)
+
+    assert (spec.req_id, spec.descending, spec.kind, spec.reference) == (
+        req_id, descending, kind, reference
+    )
+    assert spec.param == sort
+
+
+@pytest.mark.parametrize("sort", ["f999", "Нет такого", "f124"])
+def test_unsortable_fields_are_rejected(sort):
+    """Unknown and table requisites are rejected"""
+    with pytest.raises(HTTPException) as exc:
+        parse_sort(sort, TERM)
+
+    assert exc.value.status_code == 422
+
+
+def test_numeric_sort_clauses():
+    """A numeric requisite joins its row over (up, t) and orders by a guarded cast"""
+    spec = parse_sort("-f120", TERM)
+    join, column, order_by = spec.clauses("rep")
+
+    assert join == "LEFT JOIN rep srt ON srt.up = vals.id AND srt.t = :sort_t"
+    assert column == f", {spec.key} AS sort_value"
+    assert "AS numeric" in spec.key
+    assert order_by == (
+        f"{spec.key} DESC NULLS LAST, lower(left(vals.val, 127)) DESC, vals.id DESC"
+    )
+    assert spec.params() == {"sort_t": 120}
+
+
+def test_keyset_after_sorted_cursor():
+    """Rows after the cursor compare by value, then object value and ID; missing values come last"""
+    spec = parse_sort("f120", TERM)
+    params = {}
+
+    ranges = spec.keyset(("client 03", 137, "1003"), params)
+
+    assert ranges == [
+        f"AND {spec.key} >= CAST(:cursor_sort AS numeric) "
+        f"AND ({spec.key} > CAST(:cursor_sort AS numeric) "
+        f"OR {spec.key} = CAST(:cursor_sort AS numeric) "
+        "AND (((lower(left(vals.val, 127)), vals.id) > (:cursor_key, :cursor_id)) "
+        "OR (lower(left(vals.val, 127)) IS NULL)))",
+        f"AND {spec.key} IS NULL",
+    ]
+    assert params == {"cursor_key": "client 03", "cursor_id": 137, "cursor_sort": "1003"}
+
+    params = {}
+    assert all(
+        where.startswith(f"AND {spec.key} IS NULL AND ")
+        for where in spec.keyset(("client 03", 137, None), params)
+    )
+
+
+def test_keyset_reads_objects_without_value_as_own_range():
+    """The cursor comparison is never OR-ed with the NULL tail, which is a range of its own"""
+    params = {}
+    assert DEFAULT_SORT.keyset(("client 03", 137), params) == [
+        "AND (lower(left(vals.val, 127)), vals.id) > (:cursor_key, :cursor_id)",
+        "AND lower(left(vals.val, 127)) IS NULL",
+    ]
+    assert parse_sort("-Клиент", TERM).keyset(("client 03", 137), params) == [
+        "AND (lower(left(vals.val, 127)), vals.id) < (:cursor_key, :cursor_id)",
+    ]
+    assert parse_sort("-Клиент", TERM).keyset((None, 137), params) == [
+        "AND lower(left(vals.val, 127)) IS NULL AND vals.id < :cursor_id",
+        "AND lower(left(vals.val, 127)) IS NOT NULL",
+    ]
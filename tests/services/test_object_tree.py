@@ -0,0 +1,51 @@
+"""Tests for the streamed object tree document"""
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services import object_tree
+
+
+ROWS = [
+    (129, 1, 114, "Client 01", 0),
+    (190, 129, 118, "contact 1", 1),
+    (195, 190, 300, "call", 2),
+    (191, 129, 118, "contact 2", 1),
+]
+
+
+def setup_conn_mock(rows):
+    async def partitions(size):
+        for start in range(0, len(rows), size):
+            yield rows[start:start + size]
+
+    result = MagicMock()
+    result.partitions = partitions
+    conn = AsyncMock()
+    conn.stream.return_value = result
+    return conn
+
+
+@pytest.fixture
+def reqs(monkeypatch):
+    async def tree_reqs_maps(conn, db_name, rows):
+        return {row[0]: {"n": str(row[0])} for row in rows}
+
+    monkeypatch.setattr(object_tree, "_tree_reqs_maps", tree_reqs_maps)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("chunk_size", [1, 2, 10])
+async def test_stream_object_tree_nests_rows(reqs, chunk_size):
+    """Depth-first rows become a nested document whatever the chunk size"""
+    conn = setup_conn_mock(ROWS)
+
+    parts = [
+        part async for part in object_tree.stream_object_tree(conn, "rep", 129, 5, chunk_size)
+    ]
+    doc = json.loads("".join(parts))
+
+    assert doc["id"] == 129 and doc["reqs"] == {"n": "129"}
+    assert [child["id"] for child in doc["children"]] == [190, 191]
+    assert doc["children"][0]["children"][0]["val"] == "call"
+    assert doc["children"][1]["children"] == []
@@ -0,0 +1,45 @@
+"""Tests for keyset cursor encoding"""
+import pytest
+from fastapi import HTTPException
+
+from app.services.pagination import encode_cursor, decode_cursor
+
+
+def test_cursor_round_trip():
+    """Cursor decodes back to the original keyset position"""
+    cursor = encode_cursor("пользователь 1", 252)
+
+    assert decode_cursor(cursor) == ("пользователь 1", 252)
+
+
+def test_null_sort_key_round_trip():
+    """An object without a value keeps its NULL sort key"""
+    assert decode_cursor(encode_cursor(None, 5)) == (None, 5)
+    assert decode_cursor(encode_cursor(None, 5, "1001", "f120"), "f120") == (None, 5, "1001")
+
+
+@pytest.mark.parametrize("cursor", ["zzz", "e30", encode_cursor("a", 1)[:-2]])
+def test_decode_invalid_cursor(cursor):
+    """Malformed cursors are rejected with 400"""
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor)
+
+    assert exc.value.status_code == 400
+
+
+def test_sorted_cursor_round_trip():
+    """A cursor of a sorted listing keeps the sort value"""
+    cursor = encode_cursor("client 01", 129, "1001", "-f120")
+
+    assert decode_cursor(cursor, "-f120") == ("client 01", 129, "1001")
+
+
+@pytest.mark.parametrize("sort", [None, "f120"])
+def test_sorted_cursor_rejected_for_other_sort(sort):
+    """A cursor is only valid for the ordering it was produced with"""
+    cursor = encode_cursor("client 01", 129, None, "-f120")
+
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor, sort)
+
+    assert exc.value.status_code == 400
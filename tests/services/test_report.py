@@ -0,0 +1,94 @@
+"""Tests for compiling and caching reports"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from fastapi import HTTPException
+
+from app.models.report import ReportQuery
+from app.services import report
+from app.services.report import ReportCompiler, run_report
+from tests.services.test_object_sort import TERM
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    report.report_cache.clear()
+    yield
+    report.report_cache.clear()
+
+
+def compile_report(**definition):
+    return ReportCompiler("rep", TERM, ReportQuery(term_id=114, **definition)).compile()
+
+
+def test_group_by_with_typed_aggregates():
+    """Each requisite is joined once and aggregated with a numeric cast"""
+    sql, params, names = compile_report(
+        group_by=["Дата рег"],
+        aggregates=[{"fn": "count"}, {"fn": "sum", "field": "f120", "name": "Сумма"},
+                    {"fn": "max", "field": "ИНН"}],
+    )
+
+    assert names == ["Дата рег", "count", "Сумма", "max(ИНН)"]
+    assert sql.text.count("LEFT JOIN rep repval_120 ON") == 1
+    assert "GROUP BY repval_121.val" in sql.text
+    assert "CAST(sum(CASE WHEN" in sql.text
+    assert params == {
+        "repval_121_t": 121, "repval_120_t": 120,
+        "parent_id": 1, "term_id": 114, "limit": 1000,
+    }
+
+
+def test_reference_groups_by_referenced_value():
+    """A reference requisite is grouped by the value of the referenced object"""
+    sql, params, _ = compile_report(group_by=["f122"])
+
+    assert "LEFT JOIN rep repval_122_ref ON repval_122_ref.id = repval_122.t" in sql.text
+    assert "GROUP BY repval_122_ref.val" in sql.text
+    assert params["repval_122_ref"] == "122"
+
+
+def test_report_filters_use_joined_columns():
+    """Bare requisite IDs filter on the report column (mode "c") and join it when needed"""
+    sql, params, _ = compile_report(up=None, filters={"$or": [{"120": "1001"}, {"120": "1002"}]})
+
+    assert "LEFT JOIN rep repval_120 ON" in sql.text
+    assert "lower(left(repval_120.val, 127)) = :filter_0" in sql.text
+    assert "parent_id" not in params
+
+
+@pytest.mark.parametrize(
+    "definition",
+    [
+        {"aggregates": [{"fn": "avg", "field": "Примечание"}]},
+        {"group_by": ["Контакт"]},
+        {"group_by": ["f999"]},
+        {"aggregates": [{"fn": "sum"}]},
+        {"aggregates": []},
+        {"filters": {"122": "admin"}},
+    ],
+)
+def test_invalid_reports_are_rejected(definition):
+    """Mistyped, unknown and multi-valued fields are rejected with 422"""
+    with pytest.raises(HTTPException) as exc:
+        compile_report(**definition)
+
+    assert exc.value.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_report_is_columnar_and_cached():
+    """Rows are returned per column and the same definition is served from the cache"""
+    conn = MagicMock()
+    rows = MagicMock()
+    rows.fetchall.return_value = [("20240101", 3), ("20240102", 4)]
+    conn.execute = AsyncMock(return_value=rows)
+    query = ReportQuery(term_id=114, group_by=["f121"])
+
+    payload = await run_report(conn, "rep", TERM, query)
+    assert await run_report(conn, "rep", TERM, query) is payload
+
+    assert payload == {
+        "t": 114, "name": "Клиент", "columns": ["Дата рег", "count"],
+        "data": [["20240101", "20240102"], [3, 4]], "rows": 2,
+    }
+    assert conn.execute.await_count == 2  # statement_timeout and the report, once
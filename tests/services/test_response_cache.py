@@ -0,0 +1,79 @@
+"""Tests for the serialized response cache"""
+import asyncio
+import gzip
+
+import pytest
+from starlette.requests import Request
+
+from app.services.response_cache import ResponseCache, accepts_gzip
+
+
+def make_request(**headers):
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/rep/metadata",
+            "query_string": b"",
+            "headers": [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()],
+        }
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_build_once():
+    """A cold entry requested many times at once runs the query once"""
+    cache = ResponseCache(maxsize=4, ttl=0, gzip_min_size=0)
+    calls = 0
+
+    async def build():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return b"[]", '"v1"'
+
+    entries = await asyncio.gather(*[cache.get_or_build(("rep", "terms"), build) for _ in range(20)])
+
+    assert calls == 1
+    assert {entry.body for entry in entries} == {b"[]"}
+    assert (await cache.get_or_build(("rep", "terms"), build)).etag == '"v1"'
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_build_overlapping_invalidation_is_not_stored():
+    """A body read before a write is served to its callers but not cached"""
+    cache = ResponseCache(maxsize=4, ttl=0, gzip_min_size=0)
+
+    async def build():
+        cache.invalidate("rep")
+        return b"[]", '"v1"'
+
+    await cache.get_or_build(("rep", "terms"), build)
+    assert cache.get(("rep", "terms")) is None
+
+
+@pytest.mark.asyncio
+async def test_gzip_copy_and_conditional_response():
+    """Large bodies are served gzipped to clients that accept it, with their own ETag"""
+    cache = ResponseCache(maxsize=4, ttl=0, gzip_min_size=10)
+
+    async def build():
+        return b'{"terms": []}' * 10, '"v1"'
+
+    entry = await cache.get_or_build(("rep", "metadata"), build)
+
+    response = entry.response(make_request(accept_encoding="gzip, br"))
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(response.body) == entry.body
+    assert response.headers["etag"] == '"v1-gzip"'
+
+    assert entry.response(make_request()).body == entry.body
+    assert entry.response(make_request(if_none_match='"v1"')).status_code == 304
+
+
+def test_accept_encoding():
+    assert accepts_gzip("gzip")
+    assert accepts_gzip("deflate, gzip;q=0.5")
+    assert not accepts_gzip("gzip;q=0")
+    assert not accepts_gzip(None)
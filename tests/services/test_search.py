@@ -0,0 +1,42 @@
+"""Tests for the object search"""
+import pytest
+from unittest.mock import AsyncMock
+
+from app.services import search
+from app.services.search import search_objects
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("trigram, template", [
+    (False, "search_objects.sql"),
+    (True, "search_objects_trgm.sql"),
+])
+async def test_search_template_depends_on_trigram_index(monkeypatch, trigram, template):
+    """The trigram query is used only when the table has the index"""
+    monkeypatch.setattr(search.table_registry, "has_trigram", lambda name: trigram)
+    get_sql = lambda name, db: name
+    monkeypatch.setattr(search, "get_sql", get_sql)
+    conn = AsyncMock()
+    conn.execute.return_value = [(129, 1, 114, "Клиент", "Client 01", 0.88888)]
+
+    results = await search_objects(conn, "rep", "  Client 0 ", 5)
+
+    sql, params = conn.execute.await_args.args
+    assert sql == template
+    assert params == {"q": "client 0", "pattern": "%client 0%", "prefix": "client 0%", "limit": 5}
+    assert results == [
+        {"id": 129, "up": 1, "t": 114, "term": "Клиент", "val": "Client 01", "score": 0.8889}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_like_wildcards_in_query_are_literal(monkeypatch):
+    """% and _ typed by the user match only themselves"""
+    monkeypatch.setattr(search, "get_sql", lambda name, db: name)
+    conn = AsyncMock()
+    conn.execute.return_value = []
+
+    await search_objects(conn, "rep", "50%_off", 5)
+
+    _, params = conn.execute.await_args.args
+    assert params["pattern"] == "%50\\%\\_off%"
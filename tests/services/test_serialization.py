@@ -0,0 +1,69 @@
+"""Tests for the fast serialization of list responses"""
+import json
+from types import SimpleNamespace
+
+from fastapi.responses import JSONResponse
+
+from app.models.objects import HeaderField, ObjectRow, TermObjectsResponse
+from app.services.metadata_cache import TermHeader
+from app.services.serialization import FastJSONResponse, term_objects_payload
+from app.services.term_builder import build_terms_from_rows
+
+
+HEADER = [
+    HeaderField(id=120, t=116, name="ИНН", base=3, ref=None, is_table_req=False),
+    HeaderField(id=122, t=119, name=None, base=3, ref=71, is_table_req=False, original_name="Роль"),
+]
+TERM = TermHeader(
+    id=114, name="Клиент", base=3, header=HEADER,
+    header_map={f.id: f for f in HEADER}, table_reqs={}, ordered_table_reqs={},
+)
+ROWS = [
+    SimpleNamespace(id=201, up=1, val="Client 01"),
+    SimpleNamespace(id=202, up=1, val=1002),
+]
+REQS_MAPS = {201: {"ИНН": "1001", "71": "admin"}, 202: {}}
+
+
+def test_term_objects_payload_matches_pydantic_dump():
+    """The plain payload equals the dumped response model"""
+    expected = TermObjectsResponse(
+        t=TERM.id, name=TERM.name, base=TERM.base, header=TERM.header,
+        objects=[
+            ObjectRow(id=row.id, up=row.up, val=str(row.val), reqs=REQS_MAPS[row.id])
+            for row in ROWS
+        ],
+        next_cursor="abc",
+    ).model_dump(exclude_none=True)
+
+    assert term_objects_payload(TERM, ROWS, REQS_MAPS, "abc") == expected
+    assert "next_cursor" not in term_objects_payload(TERM, ROWS, REQS_MAPS)
+
+
+def test_fast_response_renders_same_bytes_as_json_response():
+    """The fast encoder produces the bytes of Starlette's JSONResponse"""
+    payload = term_objects_payload(TERM, ROWS, REQS_MAPS)
+
+    assert FastJSONResponse(payload).body == JSONResponse(payload).body
+
+
+def test_build_terms_from_rows_skips_missing_values():
+    """Requisites without a name (references) are built without 'val'"""
+    rows = [
+        {"id": 114, "obj": "Клиент", "base": 3, "obj_mods": ["UNIQUE "],
+         "req_id": 120, "ord": "1", "req_t": 116, "req_val": "ИНН", "mods": None},
+        {"id": 114, "obj": "Клиент", "base": 3, "obj_mods": ["UNIQUE "],
+         "req_id": 122, "ord": "2", "req_t": 119, "req_val": None, "ref_val": "Роль"},
+        {"id": 116, "obj": "ИНН", "base": 13, "obj_mods": None, "req_id": None},
+    ]
+
+    terms = build_terms_from_rows(rows)
+
+    assert json.loads(json.dumps(terms)) == [
+        {"id": 114, "up": 0, "type": 3, "val": "Клиент", "unique": 1, "mods": ["UNIQUE "],
+         "reqs": [
+             {"num": 1, "id": "120", "val": "ИНН", "type": "116"},
+             {"num": 2, "id": "122", "type": "119", "ref": "Роль"},
+         ]},
+        {"id": 116, "up": 0, "type": 13, "val": "ИНН", "unique": 0, "mods": [], "reqs": []},
+    ]
@@ -0,0 +1,65 @@
+"""Tests for recursive subtree deletion"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services import tree_delete
+
+
+def setup_conn_mock(row):
+    conn = AsyncMock()
+    result = MagicMock()
+    result.fetchone.return_value = row
+    conn.execute.return_value = result
+    return conn
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "row, expected",
+    [
+        (None, "err_obj_not_found"),
+        ((0, 0, 0), "err_is_metadata"),
+        ((114, 0, 0), "err_is_metadata"),
+        ((1, 1, 2), "err_is_referenced 2"),
+        ((1, 1, 0), "1"),
+    ],
+)
+async def test_check_object_deletable(row, expected):
+    """Checks follow the delete_object() SQL procedure"""
+    conn = setup_conn_mock(row)
+
+    assert await tree_delete.check_object_deletable(conn, "rep", 201) == expected
+
+
+@pytest.mark.asyncio
+async def test_delete_subtree_batched(monkeypatch):
+    """Descendants go in batches of their own transactions, then the root"""
+    batches = []
+    conns = []
+
+    def begin():
+        conn = AsyncMock()
+
+        async def execute(sql, params):
+            result = MagicMock()
+            if "ids" in params:
+                batches.append(params["ids"])
+                result.rowcount = len(params["ids"])
+            else:
+                result.scalar_one.return_value = 1
+            return result
+
+        conn.execute.side_effect = execute
+        context = MagicMock()
+        context.__aenter__ = AsyncMock(return_value=conn)
+        context.__aexit__ = AsyncMock(return_value=False)
+        conns.append(conn)
+        return context
+
+    monkeypatch.setattr(tree_delete, "engine", MagicMock(begin=begin))
+
+    deleted = await tree_delete.delete_subtree_batched("rep", 201, [205, 204, 203, 202], 3)
+
+    assert batches == [[205, 204, 203], [202]]
+    assert len(conns) == 3
+    assert deleted == 5
@@ -0,0 +1,47 @@
+"""Tests for version counters and ETags"""
+import pytest
+from unittest.mock import AsyncMock
+
+from starlette.requests import Request
+
+from app.services import versions
+from app.services.versions import etag_matches, listing_etag, not_modified
+
+
+def make_request(path="/rep/objects/114", query=b"", if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request(
+        {"type": "http", "method": "GET", "path": path, "query_string": query, "headers": headers}
+    )
+
+
+def test_if_none_match_lists_and_weak_tags():
+    """Any listed tag matches, weak comparison ignores W/, * matches everything"""
+    assert etag_matches('"a", "b"', '"b"')
+    assert etag_matches('W/"b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"b"')
+
+
+@pytest.mark.asyncio
+async def test_etag_follows_counters_and_url(monkeypatch):
+    """The ETag changes with any counter it depends on and with the query"""
+    get_versions = AsyncMock(return_value={0: 5, 114: 7})
+    monkeypatch.setattr(versions, "get_versions", get_versions)
+    request = make_request()
+
+    etag = await listing_etag(None, request, "rep", [0, 114, 71])
+    assert etag == await listing_etag(None, request, "rep", [114, 0, 71])
+    assert etag != await listing_etag(None, make_request(query=b"limit=3"), "rep", [0, 114, 71])
+
+    get_versions.return_value = {0: 5, 114: 7, 71: 9}
+    assert etag != await listing_etag(None, request, "rep", [0, 114, 71])
+
+
+def test_not_modified_only_for_current_tag():
+    """A matching If-None-Match gets an empty 304 carrying the ETag"""
+    response = not_modified(make_request(if_none_match='"v1"'), '"v1"')
+    assert response.status_code == 304
+    assert response.headers["etag"] == '"v1"'
+    assert not_modified(make_request(if_none_match='"v0"'), '"v1"') is None
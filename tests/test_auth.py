@@ -0,0 +1,167 @@
+"""Tests for token verification and the auth middleware"""
+import base64
+import hashlib
+import hmac
+import json
+import time
+
+import pytest
+from fastapi import FastAPI, Request, WebSocket
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.auth import auth
+from app.auth.auth import InvalidToken, JwtVerifier, StaticTokenVerifier, TokenCache
+from app.middleware.auth_middleware import AuthMiddleware
+
+SECRET = "test-secret"
+
+
+def b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def make_jwt(claims, secret=SECRET, alg="HS256"):
+    signing_input = f"{b64(json.dumps({'alg': alg, 'typ': 'JWT'}).encode())}.{b64(json.dumps(claims).encode())}"
+    digest = JwtVerifier.DIGESTS[alg]
+    signature = hmac.new(secret.encode(), signing_input.encode(), digest).digest()
+    return f"{signing_input}.{b64(signature)}"
+
+
+def test_jwt_signature_and_claims():
+    """Signature, expiry and audience are checked"""
+    verifier = JwtVerifier(SECRET, ["HS256"], audience="integram")
+
+    claims = {"sub": "42", "aud": "integram", "exp": time.time() + 60}
+    assert verifier(make_jwt(claims))["sub"] == "42"
+
+    with pytest.raises(InvalidToken):
+        verifier(make_jwt(claims, secret="other"))
+    with pytest.raises(InvalidToken):
+        verifier(make_jwt({**claims, "exp": time.time() - 60}))
+    with pytest.raises(InvalidToken):
+        verifier(make_jwt({**claims, "aud": "other"}))
+    with pytest.raises(InvalidToken):
+        verifier(make_jwt(claims, alg="HS512"))
+    with pytest.raises(InvalidToken):
+        verifier("not-a-jwt")
+
+
+def test_cache_never_outlives_token_expiry():
+    """Cached claims expire with the token even if the TTL is longer"""
+    cache = TokenCache(maxsize=2, ttl=3600)
+    cache.set("a", {"exp": time.time() - 1})
+    cache.set("b", {"sub": "b"})
+
+    assert cache.get("a") is None
+    assert cache.get("b") == {"sub": "b"}
+
+
+def test_static_token_with_non_ascii_characters():
+    """Non-ASCII tokens are rejected as invalid, not with an error"""
+    verifier = StaticTokenVerifier("secret-token")
+    with pytest.raises(InvalidToken):
+        verifier("séкрет")
+    assert StaticTokenVerifier("séкрет")("séкрет")["username"] == "admin"
+
+
+def test_non_ascii_bearer_token_is_forbidden(monkeypatch):
+    """A non-ASCII token in the header gets 403 through the static verifier"""
+    monkeypatch.setattr(auth, "verifier", StaticTokenVerifier("secret-token"))
+    monkeypatch.setattr(auth, "token_cache", TokenCache(maxsize=16, ttl=60))
+    app = FastAPI()
+
+    @app.get("/me")
+    async def me(request: Request):
+        return request.state.user
+
+    app.add_middleware(AuthMiddleware)
+    response = TestClient(app).get("/me", headers={"Authorization": "Bearer séкрет".encode()})
+    assert response.status_code == 403
+
+
+def test_jwt_with_non_ascii_segments_is_malformed():
+    """Non-ASCII characters in the signed part are rejected before the signature check"""
+    with pytest.raises(InvalidToken, match="Malformed"):
+        JwtVerifier(SECRET)("eyJhbGciOiJIUzI1NiJ9.\xe9.AAAA")
+
+
+@pytest.mark.parametrize("claim", ["exp", "nbf"])
+@pytest.mark.parametrize("value", ["soon", None, True, [1]])
+def test_jwt_with_non_numeric_dates_is_invalid(claim, value):
+    """Signed tokens with exp or nbf that are not numbers are rejected, not an error"""
+    with pytest.raises(InvalidToken, match="not a number"):
+        JwtVerifier(SECRET)(make_jwt({"sub": "42", claim: value}))
+
+
+def test_cache_skips_claims_with_unusable_expiry():
+    """Claims of a custom verifier with a non-numeric exp are not served from the cache"""
+    cache = TokenCache(maxsize=2, ttl=3600)
+    cache.set("a", {"exp": "soon"})
+
+    assert cache.get("a") is None
+
+
+@pytest.fixture
+def client(monkeypatch):
+    calls = []
+
+    def verifier(token):
+        calls.append(token)
+        if token != "good":
+            raise InvalidToken("Invalid token")
+        return {"sub": "1"}
+
+    monkeypatch.setattr(auth, "verifier", verifier)
+    monkeypatch.setattr(auth, "token_cache", TokenCache(maxsize=16, ttl=60))
+
+    app = FastAPI()
+
+    @app.get("/me")
+    async def me(request: Request):
+        return request.state.user
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"chunk {i}\n".encode()
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.websocket("/ws")
+    async def ws(websocket: WebSocket):
+        await websocket.accept()
+        await websocket.send_json(websocket.state.user)
+        await websocket.close()
+
+    app.add_middleware(AuthMiddleware)
+    test_client = TestClient(app)
+    test_client.calls = calls
+    return test_client
+
+
+def test_http_requests(client):
+    """Claims reach the route, verification is cached, failures keep their status"""
+    headers = {"Authorization": "Bearer good"}
+    assert client.get("/me", headers=headers).json() == {"sub": "1"}
+    assert client.get("/me", headers=headers).status_code == 200
+    assert client.calls == ["good"]
+
+    assert client.get("/me").status_code == 401
+    assert client.get("/me", headers={"Authorization": "Bearer bad"}).status_code == 403
+    assert client.get("/stream", headers=headers).text == "chunk 0\nchunk 1\nchunk 2\n"
+
+
+def test_websocket_handshake(client):
+    """Websockets authenticate by header or access_token and are closed with 1008 otherwise"""
+    with client.websocket_connect("/ws", headers={"Authorization": "Bearer good"}) as ws:
+        assert ws.receive_json() == {"sub": "1"}
+    with client.websocket_connect("/ws?access_token=good") as ws:
+        assert ws.receive_json() == {"sub": "1"}
+
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with client.websocket_connect("/ws?access_token=bad"):
+            pass
+    assert exc.value.code == 1008
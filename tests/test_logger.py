@@ -0,0 +1,42 @@
+"""Tests for the logging subsystem"""
+import json
+import logging
+
+from app.logger import DebugSampler, JsonFormatter
+
+
+def make_record(level=logging.DEBUG, lineno=10, msg="row %s", args=(1,)):
+    return logging.LogRecord("app.test", level, __file__, lineno, msg, args, None)
+
+
+def test_debug_records_are_sampled_per_call_site():
+    """Only the first N debug records of a call site pass within a second"""
+    sampler = DebugSampler(per_second=3)
+
+    passed = [sampler.filter(make_record()) for _ in range(10)]
+    assert passed.count(True) == 3
+    assert sampler.filter(make_record(lineno=11))
+
+
+def test_higher_levels_are_never_sampled():
+    """Warnings pass regardless of the debug budget"""
+    sampler = DebugSampler(per_second=1)
+
+    assert all(sampler.filter(make_record(level=logging.WARNING)) for _ in range(5))
+
+
+def test_sampling_disabled_with_zero_budget():
+    """A budget of 0 turns sampling off"""
+    sampler = DebugSampler(per_second=0)
+
+    assert all(sampler.filter(make_record()) for _ in range(100))
+
+
+def test_json_formatter_formats_message_lazily():
+    """Arguments are merged into the message only when formatted"""
+    record = make_record(level=logging.INFO, msg="Объект %s", args=(42,))
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["message"] == "Объект 42"
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "app.test"
@@ -0,0 +1,102 @@
+"""Tests for the Prometheus metrics"""
+from types import SimpleNamespace
+
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app import metrics
+from app.api.video.service import VideoStreamService
+from app.db.db import get_sql
+from app.metrics import Counter, Histogram, MetricsRegistry
+from app.middleware.metrics_middleware import MetricsMiddleware
+
+
+def test_histogram_buckets_are_cumulative():
+    """Each bucket counts the observations up to its bound"""
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), [0.1, 1])
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value, ("/a",))
+
+    lines = histogram.render()
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 2.0' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1.0"} 3.0' in lines
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4.0' in lines
+    assert 'latency_seconds_count{route="/a"} 4.0' in lines
+    assert 'latency_seconds_sum{route="/a"} 3.65' in lines
+
+
+def test_label_values_are_escaped():
+    """Quotes, backslashes and newlines are escaped in label values"""
+    counter = Counter("errors_total", "Errors.", ("reason",))
+    counter.inc(('say "hi"\\\n',))
+
+    assert 'errors_total{reason="say \\"hi\\"\\\\\\n"} 1.0' in counter.render()
+
+
+def test_collectors_run_on_render():
+    """Gauges are built by the collectors at scrape time"""
+    registry = MetricsRegistry()
+    calls = []
+
+    @registry.collector
+    def collect():
+        calls.append(1)
+        gauge = metrics.Gauge("queue_size", "Queue size.")
+        gauge.set((), len(calls))
+        return [gauge]
+
+    assert "queue_size 1.0" in registry.render()
+    assert "queue_size 2.0" in registry.render()
+
+
+def test_statements_are_labelled_with_their_template():
+    """Clauses from app/sql are named after their file, others are inline or raw"""
+    def context(statement):
+        return SimpleNamespace(compiled=SimpleNamespace(statement=statement))
+
+    assert metrics.statement_template(context(get_sql("versions_get.sql"))) == "versions_get.sql"
+    assert metrics.statement_template(context(text("SELECT 1"))) == "inline"
+    assert metrics.statement_template(SimpleNamespace(compiled=None)) == "raw"
+
+
+def test_middleware_labels_requests_by_route_template():
+    """Requests are counted per route template and status, unknown paths as unmatched"""
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/{db_name}/things/{thing_id}")
+    async def thing(db_name: str, thing_id: int):
+        if thing_id == 0:
+            raise HTTPException(status_code=404, detail="Not found")
+        return {"id": thing_id}
+
+    client = TestClient(app)
+    route = "/{db_name}/things/{thing_id}"
+    before_ok = metrics.http_requests.value(("GET", route, "200"))
+    before_missing = metrics.http_requests.value(("GET", route, "404"))
+    before_unmatched = metrics.http_requests.value(("GET", "unmatched", "404"))
+    before_count = metrics.http_duration.count(("GET", route))
+
+    client.get("/rep/things/1")
+    client.get("/rep/things/2")
+    client.get("/rep/things/0")
+    client.get("/nowhere")
+
+    assert metrics.http_requests.value(("GET", route, "200")) == before_ok + 2
+    assert metrics.http_requests.value(("GET", route, "404")) == before_missing + 1
+    assert metrics.http_requests.value(("GET", "unmatched", "404")) == before_unmatched + 1
+    assert metrics.http_duration.count(("GET", route)) == before_count + 3
+
+
+def test_video_viewers_are_counted_while_streaming():
+    """A viewer is counted inside the block and released after it"""
+    service = VideoStreamService()
+    service._info["d1"] = {"fps": 25.0, "frame_count": 7}
+
+    with service.viewer("d1"):
+        with service.viewer("d1"):
+            assert service.stats()["d1"]["viewers"] == 2
+    assert service.stats()["d1"] == {
+        "fps": 25.0, "frame_count": 7, "queued_frames": 0, "viewers": 0
+    }
@@ -1,8 +1,11 @@
+import asyncio
+
 import pytest
 from httpx import AsyncClient, post as httpx_post
 from httpx import ASGITransport
 from unittest.mock import AsyncMock, MagicMock
 from fastapi import status
+from sqlalchemy.exc import OperationalError
 
 
 from app.main import app
@@ -65,3 +68,77 @@ def test_post_object_real_server(payload):
     assert data["val"] == payload["attrs"][f"t{payload['id']}"]
     assert data["t"] == payload["id"]
     assert data["up"] == payload["up"]
+
+
+@pytest.fixture
+def listing_app(monkeypatch):
+    """The object listings with a mocked term header and engine"""
+    term = MagicMock(name="term", req_refs={}, table_reqs=[], header=[])
+    term.name = "Клиент"
+    monkeypatch.setattr(objects, "_get_term_header", AsyncMock(return_value=term))
+    monkeypatch.setattr(objects, "listing_etag", AsyncMock(return_value='"etag"'))
+    monkeypatch.setattr(objects.pivot_registry, "get", AsyncMock(return_value=None))
+
+    read_engine = MagicMock()
+    read_engine.connect.return_value.__aenter__ = AsyncMock(return_value=AsyncMock())
+    read_engine.connect.return_value.__aexit__ = AsyncMock(return_value=False)
+    app.dependency_overrides[objects.get_read_engine] = lambda: read_engine
+    app.dependency_overrides[objects.validate_table_exists] = lambda: "rep"
+    yield app
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", [
+    "/rep/objects/114?$or=abc",
+    "/rep/objects/114?$or=[1]",
+    "/rep/objects/114/stream?$or=abc",
+])
+async def test_malformed_filter_group_is_rejected(listing_app, auth_headers, path):
+    """A malformed filter group in the query string is a 422, not a server error"""
+    transport = ASGITransport(app=listing_app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get(path, headers=auth_headers)
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert "$or" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_stream_failing_midway_is_not_completed(listing_app, auth_headers, monkeypatch):
+    """A database error after the first chunk aborts the export instead of ending it cleanly"""
+    async def stream_objects(*args, **kwargs):
+        yield [MagicMock(id=252, up=1, val="John Doe")]
+        raise OperationalError("FETCH", {}, Exception("connection lost"))
+
+    monkeypatch.setattr(objects, "_stream_objects", stream_objects)
+    monkeypatch.setattr(objects, "_build_reqs_maps", AsyncMock(return_value={252: {}}))
+    monkeypatch.setattr(objects, "object_payload", lambda obj, reqs: {"id": obj.id})
+
+    scope = {
+        "type": "http", "method": "GET", "path": "/rep/objects/114/stream",
+        "raw_path": b"/rep/objects/114/stream", "query_string": b"", "root_path": "",
+        "scheme": "http", "server": ("test", 80), "http_version": "1.1",
+        "headers": [(b"authorization", auth_headers["Authorization"].encode())],
+    }
+    sent = []
+    requests = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        await asyncio.Event().wait()  # the client never disconnects
+
+    async def send(message):
+        sent.append(message)
+
+    with pytest.raises(OperationalError):
+        await listing_app(scope, receive, send)
+
+    assert sent[0]["status"] == 200
+    bodies = [message for message in sent if message["type"] == "http.response.body"]
+    assert b"".join(m["body"] for m in bodies).splitlines() == [
+        b'{"id":252}', b'{"error":"Database error"}'
+    ]
+    # The chunked response is never terminated, so the client sees a broken transfer
+    assert all(message.get("more_body") for message in bodies)
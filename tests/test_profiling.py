@@ -0,0 +1,86 @@
+"""Tests for per-request SQL profiling"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import profiling
+from app.db import db  # noqa: F401  registers the engines with the profiler
+from app.middleware.profiling_middleware import ProfilingMiddleware
+from app.profiling import RequestProfile, SlowStatement, current_profile
+from app.settings import settings
+
+
+def make_client():
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+
+    @app.get("/listing")
+    async def listing():
+        profile = current_profile.get()
+        if profile is not None:
+            profile.add("get_term_objects.sql", 0.002, 20)
+            profile.add("get_objects_reqs.sql", 0.005, 76)
+            profile.add("get_objects_reqs.sql", 0.001, 4)
+        return {"profiled": profile is not None}
+
+    return TestClient(app)
+
+
+def test_server_timing_totals_and_templates():
+    """The header has the request totals, then each template, slowest first"""
+    profile = RequestProfile()
+    profile.add("get_term_objects.sql", 0.002, 20)
+    profile.add("get_objects_reqs.sql", 0.005, 76)
+    profile.add("get_objects_reqs.sql", 0.001, 4)
+
+    assert profile.server_timing() == (
+        'db;dur=8.0;desc="3 statements, 100 rows", '
+        'sql.get_objects_reqs.sql;dur=6.0;desc="2x, 80 rows", '
+        'sql.get_term_objects.sql;dur=2.0;desc="1x, 20 rows"'
+    )
+
+
+def test_requests_are_profiled_on_demand():
+    """Only requests with the header get a profile and a Server-Timing header"""
+    client = make_client()
+
+    plain = client.get("/listing")
+    assert plain.json() == {"profiled": False}
+    assert "server-timing" not in plain.headers
+
+    profiled = client.get("/listing", headers={settings.SQL_PROFILE_HEADER: "1"})
+    assert profiled.json() == {"profiled": True}
+    assert profiled.headers["server-timing"].startswith('db;dur=8.0;desc="3 statements, 100 rows"')
+
+    disabled = client.get("/listing", headers={settings.SQL_PROFILE_HEADER: "false"})
+    assert disabled.json() == {"profiled": False}
+
+
+def test_sampled_requests_are_profiled(monkeypatch):
+    """A sample rate of 1 profiles every request"""
+    monkeypatch.setattr(settings, "SQL_PROFILE_SAMPLE_RATE", 1.0)
+
+    response = make_client().get("/listing")
+    assert response.json() == {"profiled": True}
+    assert "server-timing" in response.headers
+
+
+def test_profile_is_reported_after_the_response(monkeypatch):
+    """The profile is handed over for the slow statement report once the request ends"""
+    reported = []
+    monkeypatch.setattr(
+        "app.middleware.profiling_middleware.schedule_report",
+        lambda profile, method, path: reported.append((method, path)),
+    )
+
+    make_client().get("/listing", headers={settings.SQL_PROFILE_HEADER: "1"})
+    assert reported == [("GET", "/listing")]
+
+
+@pytest.mark.asyncio
+async def test_writes_are_not_explained():
+    """EXPLAIN ANALYZE is only run for read statements"""
+    slow = SlowStatement("primary", "inline", "DELETE FROM rep WHERE id = $1", (1,), 1.0)
+
+    assert "primary" in profiling._engines
+    assert await profiling.explain(slow) is None
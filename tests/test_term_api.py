@@ -140,3 +140,29 @@ async def test_post_term_mocked(monkeypatch, auth_headers):
     assert response.json()["id"] == 123
     assert response.json()["t"] == 3
     assert response.json()["val"] == "Оператор"
+
+
+@pytest.mark.asyncio
+async def test_cached_listing_is_built_on_primary(monkeypatch):
+    """A cache fill never reads a replica, which may lag behind the invalidating write"""
+    from starlette.requests import Request
+    from app.services.response_cache import ResponseCache
+
+    primary = MagicMock()
+    primary.connect.return_value = AsyncMock()
+    replica = MagicMock()
+    replica.connect.side_effect = AssertionError("replica used for a cache fill")
+    monkeypatch.setattr(terms, "engine", primary)
+    monkeypatch.setattr(terms, "listing_etag", AsyncMock(return_value='"v2"'))
+    monkeypatch.setattr(
+        terms, "response_cache", ResponseCache(maxsize=4, ttl=60, gzip_min_size=0)
+    )
+    request = Request({"type": "http", "method": "GET", "path": "/rep/terms", "headers": []})
+
+    async def load(conn):
+        return [MOCKED_TERM]
+
+    response = await terms._tenant_listing(request, "rep", replica, "terms", load)
+
+    assert response.headers["etag"] == '"v2"'
+    assert primary.connect.call_count == 1